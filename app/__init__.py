@@ -33,6 +33,10 @@ def create_app(config_class):
     # Load configuration
     app.config.from_object(config_class)
     
+    # Database connects lazily with this app's URI and pool settings
+    from app.models.database import db
+    db.configure(app.config)
+    
     # Initialize Flask-Login
     login_manager.init_app(app)
     login_manager.login_view = 'auth.welcome'
@@ -44,8 +48,8 @@ def create_app(config_class):
     
     @login_manager.user_loader
     def load_user(user_id):
-        """Load user by ID for Flask-Login"""
-        return User.get_by_id(user_id)
+        """Load user by ID for Flask-Login (cached, see User.load)"""
+        return User.load(user_id)
     
     # Initialize SocketIO with app
     socketio.init_app(
@@ -59,6 +63,7 @@ def create_app(config_class):
     # Set up timer manager with socketio
     from .models.timer_model import timer_manager
     timer_manager.set_socketio(socketio)
+    timer_manager.set_resync_interval(app.config.get('TIMER_RESYNC_INTERVAL', 60))
     
     # Register authentication blueprint
     from app.controllers.auth_controller import auth_bp
@@ -24,6 +24,35 @@ class Config:
     # MongoDB Configuration
     MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
     MONGODB_DB_NAME = 'kitchen_assistant'
+    # Connection pool per worker process (the client is created on first query)
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', 10))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', 0))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', 60000))
+    MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', 5000))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', 10000))
+    
+    # Profile statistics source: 'document' (incremental user_stats), 'aggregate'
+    # (MongoDB aggregation pipeline) or 'python' (full history scan)
+    USER_STATS_SOURCE = os.getenv('USER_STATS_SOURCE', 'document')
+
+    # Conversation storage: 'messages' (one document per message) or 'buckets'
+    # (one document per session per window of CONVERSATION_BUCKET_WINDOW_HOURS,
+    # holding up to CONVERSATION_BUCKET_SIZE messages). Switching to buckets
+    # moves existing history on the next migration run
+    CONVERSATION_STORAGE = os.getenv('CONVERSATION_STORAGE', 'messages')
+    CONVERSATION_BUCKET_SIZE = int(os.getenv('CONVERSATION_BUCKET_SIZE', 100))
+    CONVERSATION_BUCKET_WINDOW_HOURS = int(os.getenv('CONVERSATION_BUCKET_WINDOW_HOURS', 24))
+
+    # Retention: messages older than CONVERSATION_RETENTION_DAYS are rolled into
+    # per-session archives, sessions idle for SESSION_IDLE_MINUTES are marked
+    # inactive, and inactive sessions expire after SESSION_RETENTION_DAYS (0 disables each).
+    # Archiving drops message content, so the compactor only runs when enabled explicitly
+    RETENTION_ENABLED = os.getenv('RETENTION_ENABLED', 'False').lower() == 'true'
+    CONVERSATION_RETENTION_DAYS = int(os.getenv('CONVERSATION_RETENTION_DAYS', 90))
+    SESSION_IDLE_MINUTES = int(os.getenv('SESSION_IDLE_MINUTES', 30))
+    SESSION_RETENTION_DAYS = int(os.getenv('SESSION_RETENTION_DAYS', 30))
+    RETENTION_INTERVAL = float(os.getenv('RETENTION_INTERVAL', 3600))
     
     # SocketIO Configuration
     SOCKETIO_CORS_ALLOWED_ORIGINS = "*"
@@ -40,15 +69,44 @@ class Config:
     
     # Coqui TTS Configuration
     COQUI_TTS_URL = os.getenv('COQUI_TTS_URL', 'http://localhost:5002')
+    # Comma-separated pool of interchangeable Coqui containers (defaults to COQUI_TTS_URL)
+    COQUI_TTS_URLS = [url.strip() for url in os.getenv('COQUI_TTS_URLS', '').split(',') if url.strip()] or [COQUI_TTS_URL]
+    TTS_HEALTH_INTERVAL = float(os.getenv('TTS_HEALTH_INTERVAL', 10))
+    
+    # TTS Audio Cache (repeated phrases skip synthesis)
+    TTS_CACHE_ENABLED = os.getenv('TTS_CACHE_ENABLED', 'True').lower() == 'true'
+    TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', 'data/tts_cache')
+    TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_MB', 100)) * 1024 * 1024
+    
+    # Sentence-chunked TTS streaming (for clients that send stream_audio)
+    TTS_CHUNKED_STREAMING = os.getenv('TTS_CHUNKED_STREAMING', 'True').lower() == 'true'
+    TTS_MAX_WORKERS = int(os.getenv('TTS_MAX_WORKERS', 4))
+    
+    # TTS scheduler (alerts > replies > prefetch, per-backend cap, load shedding)
+    TTS_QUEUE_LIMIT = int(os.getenv('TTS_QUEUE_LIMIT', 32))
+    TTS_BACKEND_CONCURRENCY = int(os.getenv('TTS_BACKEND_CONCURRENCY', 2))
+    
+    # Pre-synthesized phrase bank (fixed replies, confirmations, timer alerts)
+    TTS_PHRASE_BANK_ENABLED = os.getenv('TTS_PHRASE_BANK_ENABLED', 'True').lower() == 'true'
+    
+    # YouTube video pages render first and load related videos afterwards
+    YOUTUBE_LAZY_RELATED = os.getenv('YOUTUBE_LAZY_RELATED', 'True').lower() == 'true'
     
     # Conversation Settings
     MAX_CONVERSATION_HISTORY = 12  # Maximum messages to keep
     MAX_HISTORY_FOR_AI = 10        # Maximum messages to send to AI
     
+    # Timers: clients count down locally; the server resends all of a user's
+    # timer deadlines this often (0 restores per-second timer_update ticks)
+    TIMER_RESYNC_INTERVAL = float(os.getenv('TIMER_RESYNC_INTERVAL', 60))
+    
     # Data Directories
     DATA_DIR = 'data'
     TIMERS_DIR = 'data/timers'
     
+    # Running timers are journaled to TIMERS_DIR and restored after a restart
+    TIMER_JOURNAL_ENABLED = os.getenv('TIMER_JOURNAL_ENABLED', 'True').lower() == 'true'
+    
     # Server Configuration
     HOST = '0.0.0.0'
     PORT = int(os.getenv('PORT', 5000))
@@ -72,6 +130,8 @@ class TestingConfig(Config):
     """Testing environment configuration"""
     TESTING = True
     DEBUG = True
+    # Tests clear collections, so they never touch the application database
+    MONGODB_DB_NAME = 'kitchen_test'
 
 
 # Configuration dictionary
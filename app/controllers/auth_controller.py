@@ -2,10 +2,11 @@
 Authentication Routes
 Handles user login, registration, and session management
 """
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, Response
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models.user_model import User
 from app.models.database import db
+import json
 import secrets
 import re
 from datetime import datetime, timedelta
@@ -200,6 +201,7 @@ def logout():
     """Handle logout"""
     try:
         username = current_user.username
+        User.invalidate_cache(current_user.id)
         logout_user()
         print(f"✅ User logged out: {username}")
         
@@ -271,7 +273,6 @@ def user_conversations():
     try:
         # Handle DELETE request - clear all conversations
         if request.method == 'DELETE':
-            from app.models.database import db
             result = db.delete_user_conversations(current_user.id)
             
             return jsonify({
@@ -280,22 +281,43 @@ def user_conversations():
                 'deleted_count': result
             }), 200
         
-        # Handle GET request - fetch conversations
+        # Handle GET request - one page of conversations, newest first.
+        # Pages chain through next_cursor, so page 50 costs the same as page 1.
         limit = request.args.get('limit', 50, type=int)
-        conversations = current_user.get_conversations(limit)
-        
-        # Convert MongoDB documents to JSON-serializable format
-        conversations_list = []
-        for conv in conversations:
-            conv['_id'] = str(conv['_id'])
-            conv['timestamp'] = conv['timestamp'].isoformat()
-            conversations_list.append(conv)
-        
-        return jsonify({
-            'success': True,
-            'conversations': conversations_list,
-            'count': len(conversations_list)
-        }), 200
+        before = None
+        if request.args.get('cursor'):
+            try:
+                before = db.decode_page_cursor(request.args['cursor'])
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Invalid cursor'
+                }), 400
+        
+        conversations = db.iter_user_conversations(current_user.id, limit, before, db.CONVERSATION_LIST_FIELDS)
+        page_size = max(1, min(limit, db.MAX_PAGE_SIZE))
+        
+        def generate():
+            """Stream the page as JSON, one conversation at a time"""
+            yield '{"success": true, "conversations": ['
+            count = 0
+            last = None
+            try:
+                for conv in conversations:
+                    last = conv
+                    item = dict(conv, _id=str(conv['_id']))
+                    if hasattr(item.get('timestamp'), 'isoformat'):
+                        item['timestamp'] = item['timestamp'].isoformat()
+                    yield (',' if count else '') + json.dumps(item, default=str)
+                    count += 1
+                # A full page may have more behind it
+                next_cursor = db.encode_page_cursor(last) if last and count == page_size else None
+            except Exception as e:
+                print(f"❌ Conversations stream error: {e}")
+                next_cursor = None
+            yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
+        
+        return Response(generate(), mimetype='application/json'), 200
         
     except Exception as e:
         print(f"❌ Conversations error: {e}")
@@ -389,6 +411,7 @@ def reset_password_direct():
                 }
             }
         )
+        User.invalidate_cache(user.id)
         
         print(f"✅ Password reset successful for: {email}")
         
@@ -531,6 +554,7 @@ def reset_password():
                 }
             }
         )
+        User.invalidate_cache(user_doc['_id'])
         
         print(f"✅ Password reset successful for: {user_doc['email']}")
         
@@ -0,0 +1,144 @@
+"""
+Bucketed conversation storage
+Optional schema (CONVERSATION_STORAGE=buckets) that keeps one document per
+session per time window in conversation_buckets, with messages appended by
+$push, instead of one document per message in conversations:
+
+    {'user_id', 'session_id', 'window_start', 'count', 'first_at', 'last_at',
+     'messages': [{'_id', 'role', 'content', 'timestamp', 'metadata'}, ...]}
+
+A full bucket is never grown: the next write for that session and window
+upserts a fresh bucket. $slice caps the array as a last line of defence.
+"""
+import heapq
+from datetime import datetime, timezone
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+
+def window_start(timestamp: datetime, window_seconds: int):
+    """Start of the bucket window a timestamp falls in"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    seconds = int(timestamp.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % window_seconds, tz=timezone.utc)
+
+
+# Per-message fields kept in a bucket (user_id and session_id live on the bucket)
+MESSAGE_FIELDS = ('_id', 'role', 'content', 'timestamp', 'metadata')
+
+
+def build_bucket_updates(messages, bucket_size: int, window_seconds: int):
+    """
+    Bucket upserts for a batch of messages
+
+    Messages are grouped by (session, window) and appended in chunks that
+    fit a bucket, so a turn's messages cost one update instead of one
+    insert each.
+
+    Args:
+        messages: Conversation documents, oldest first (an _id is added if missing)
+        bucket_size: Most messages per bucket
+        window_seconds: Length of a bucket's time window
+
+    Returns:
+        list: [(UpdateOne for conversation_buckets, [message, ...]), ...]
+    """
+    groups = {}
+    for message in messages:
+        message.setdefault('_id', ObjectId())
+        key = (message['session_id'], window_start(message['timestamp'], window_seconds))
+        groups.setdefault(key, []).append(message)
+
+    updates = []
+    for (session_id, start), group in groups.items():
+        for offset in range(0, len(group), bucket_size):
+            chunk = group[offset:offset + bucket_size]
+            entries = [{field: message.get(field) for field in MESSAGE_FIELDS} for message in chunk]
+            updates.append((UpdateOne(
+                # Only a bucket with room for the whole chunk matches; otherwise a new one is created
+                {'session_id': session_id, 'window_start': start, 'count': {'$lte': bucket_size - len(chunk)}},
+                {
+                    '$setOnInsert': {'user_id': chunk[0].get('user_id')},
+                    '$push': {'messages': {'$each': entries, '$slice': -bucket_size}},
+                    '$inc': {'count': len(chunk)},
+                    '$min': {'first_at': chunk[0]['timestamp']},
+                    '$max': {'last_at': chunk[-1]['timestamp']},
+                },
+                upsert=True
+            ), chunk))
+    return updates
+
+
+def stored_ids(collection, messages):
+    """
+    _ids of messages that are already in a bucket
+
+    Lets a retried write (or a rerun migration) skip messages an earlier
+    attempt appended, since $push and $inc are not idempotent. The lookup
+    goes through the session_id index.
+
+    Args:
+        collection: The conversation_buckets collection
+        messages: Conversation documents that already have an _id
+
+    Returns:
+        set: _ids found in a bucket
+    """
+    if not messages:
+        return set()
+    ids = [message['_id'] for message in messages]
+    return {
+        message['_id']
+        for bucket in collection.find(
+            {'session_id': {'$in': list({message['session_id'] for message in messages})}, 'messages._id': {'$in': ids}},
+            {'messages._id': 1}
+        )
+        for message in bucket.get('messages', [])
+    }
+
+
+def unwind(bucket):
+    """A bucket's messages as standalone conversation documents"""
+    for message in bucket.get('messages', []):
+        yield dict(message, user_id=bucket.get('user_id'), session_id=bucket.get('session_id'))
+
+
+def project(message, fields):
+    """Apply an inclusion projection (None keeps every field) to an unwound message"""
+    if not fields:
+        return message
+    return {field: value for field, value in message.items() if field == '_id' or fields.get(field)}
+
+
+def _sort_key(message):
+    return (message['timestamp'], message['_id'])
+
+
+def page_from_buckets(buckets, limit: int, before=None, fields=None):
+    """
+    One keyset page of messages, newest first, from buckets sorted by last_at descending
+
+    Buckets of different sessions overlap in time, so messages are merged
+    across buckets; reading stops once no later bucket can hold a message
+    newer than the page's oldest.
+
+    Args:
+        buckets: Iterable of bucket documents, last_at descending
+        limit: Page size
+        before: (timestamp, _id) of the last message of the previous page
+        fields: Projection to apply to each message
+
+    Returns:
+        list: Up to limit messages, newest first
+    """
+    candidates = []
+    for bucket in buckets:
+        if len(candidates) >= limit:
+            oldest_on_page = heapq.nlargest(limit, candidates, key=_sort_key)[-1]
+            if bucket['last_at'] < oldest_on_page['timestamp']:
+                break
+        candidates.extend(message for message in unwind(bucket)
+                          if before is None or _sort_key(message) < tuple(before))
+    return [project(message, fields) for message in heapq.nlargest(limit, candidates, key=_sort_key)]
@@ -2,58 +2,224 @@
 MongoDB Database Configuration
 Handles all database operations for user management and conversation storage
 """
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
 from datetime import datetime, timezone
+import atexit
 import os
+import threading
 from bson.objectid import ObjectId
+from app.config import Config
+from app.models import conversation_buckets, user_stats
 
 
 class Database:
     """MongoDB Database Handler"""
     
-    def __init__(self):
-        """Initialize MongoDB connection"""
-        # Get MongoDB URI from environment or use local default
-        mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
-         
-        try:
-            self.client = MongoClient(mongo_uri)
-            self.db = self.client['kitchen_assistant']
-            
-            # Collections
-            self.users = self.db['users']
-            self.conversations = self.db['conversations']
-            self.sessions = self.db['sessions']
-            
-            # Create indexes for better performance
-            self._create_indexes()
-            
-            print("✅ MongoDB connected successfully")
-        except Exception as e:
-            print(f"❌ MongoDB connection error: {e}")
-            self.client = None
-            self.db = None
-    
-    
-    def _create_indexes(self):
-        """Create database indexes for optimization"""
-        try:
-            # User indexes
-            self.users.create_index('email', unique=True)
-            self.users.create_index('username', unique=True)
-            
-            # Conversation indexes
-            self.conversations.create_index('user_id')
-            self.conversations.create_index('created_at')
-            
-            # Session indexes
-            self.sessions.create_index('session_id', unique=True)
-            self.sessions.create_index('user_id')
-            self.sessions.create_index('created_at')
-            
-            print("✅ Database indexes created")
-        except Exception as e:
-            print(f"⚠️ Index creation warning: {e}")
+    # Attributes that only exist once the client has been created (see __getattr__)
+    _LAZY_ATTRIBUTES = ('client', 'db', 'users', 'conversations', 'conversation_buckets', 'sessions',
+                        'favorites', 'video_notes', 'user_stats')
+    
+    def __init__(self, config=None):
+        """
+        Set up the handler without connecting
+        
+        The MongoClient is created on first use, so importing this module
+        (app startup, every test run) costs no connections or round trips.
+        
+        Args:
+            config: Mapping or object with the MONGODB_* settings (defaults to Config)
+        """
+        self._connect_lock = threading.Lock()
+        self.configure(config or Config)
+        
+        # Write-behind buffer for conversation messages and session activity
+        self.write_batch_size = int(os.getenv('DB_WRITE_BATCH_SIZE', 100))
+        self.write_flush_interval = float(os.getenv('DB_WRITE_FLUSH_INTERVAL', 1.0))
+        self.write_max_pending = int(os.getenv('DB_WRITE_MAX_PENDING', 10000))
+        self._pending_messages = []
+        self._pending_activity = {}   # session_id -> latest activity time
+        self._write_lock = threading.Lock()
+        # Held while messages are written and folded into user_stats, and by
+        # rebuild_user_stats, so no $inc lands between a rebuild's read and replace
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        self._flusher = None
+        self.write_stats = {'queued': 0, 'flushes': 0, 'messages_written': 0,
+                            'activity_written': 0, 'dropped': 0, 'errors': 0}
+    
+    
+    def configure(self, config):
+        """
+        Load connection settings from a Config class or a Flask app.config
+        
+        Takes effect on the next connection; an open client is closed first.
+        
+        Args:
+            config: Mapping or object with the MONGODB_* settings
+        """
+        def setting(name, default=None):
+            if isinstance(config, dict):
+                return config.get(name, default)
+            return getattr(config, name, default)
+        
+        self.mongo_uri = setting('MONGODB_URI', 'mongodb://localhost:27017/')
+        self.db_name = setting('MONGODB_DB_NAME', 'kitchen_assistant')
+        self.client_options = {
+            'maxPoolSize': setting('MONGODB_MAX_POOL_SIZE', 10),
+            'minPoolSize': setting('MONGODB_MIN_POOL_SIZE', 0),
+            'maxIdleTimeMS': setting('MONGODB_MAX_IDLE_TIME_MS', 60000),
+            'connectTimeoutMS': setting('MONGODB_CONNECT_TIMEOUT_MS', 5000),
+            'serverSelectionTimeoutMS': setting('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000),
+            'socketTimeoutMS': setting('MONGODB_SOCKET_TIMEOUT_MS', 10000),
+        }
+        self.stats_source = setting('USER_STATS_SOURCE', 'document')
+        self.session_retention_days = setting('SESSION_RETENTION_DAYS', 30)
+        self.conversation_storage = setting('CONVERSATION_STORAGE', 'messages')
+        self.bucket_size = int(setting('CONVERSATION_BUCKET_SIZE', 100))
+        self.bucket_window_seconds = int(setting('CONVERSATION_BUCKET_WINDOW_HOURS', 24)) * 3600
+        self.close()
+    
+    
+    @property
+    def bucketed(self):
+        """Whether conversations are stored in conversation_buckets"""
+        return self.conversation_storage == 'buckets'
+    
+    
+    def __getattr__(self, name):
+        """Create the client the first time a connection attribute is read"""
+        if name not in Database._LAZY_ATTRIBUTES:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self._connect()
+        return self.__dict__[name]
+    
+    
+    def _connect(self):
+        """Create the MongoClient and collection handles (once per process)"""
+        with self._connect_lock:
+            if 'client' in self.__dict__:
+                return
+            try:
+                client = MongoClient(self.mongo_uri, **self.client_options)
+                database = client[self.db_name]
+                
+                # Collections
+                self.__dict__.update(
+                    db=database,
+                    users=database['users'],
+                    conversations=database['conversations'],
+                    conversation_buckets=database['conversation_buckets'],
+                    sessions=database['sessions'],
+                    favorites=database['favorites'],
+                    video_notes=database['video_notes'],
+                    user_stats=database['user_stats'],
+                )
+                self.client = client
+                
+                print(f"✅ MongoDB client ready (pool size {self.client_options['maxPoolSize']})")
+            except Exception as e:
+                print(f"❌ MongoDB connection error: {e}")
+                self.__dict__.update(dict.fromkeys(Database._LAZY_ATTRIBUTES))
+    
+    
+    def is_connected(self):
+        """Whether a client has been created (without creating one)"""
+        return self.__dict__.get('client') is not None
+    
+    
+    def close(self):
+        """Close the client; the next query opens a new one"""
+        client = self.__dict__.get('client')
+        for name in Database._LAZY_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+        if client is not None:
+            client.close()
+    
+    
+    # Index specs shaped like the queries that use them: equality fields first,
+    # then the sort field, so every hot query is an IXSCAN with no in-memory SORT
+    INDEXES = {
+        'users': [
+            ([('email', 1)], {'unique': True}),
+            ([('username', 1)], {'unique': True}),
+        ],
+        'conversations': [
+            # get_user_conversations (keyset pages on timestamp, then _id) / delete_user_conversations
+            ([('user_id', 1), ('timestamp', -1), ('_id', -1)], {}),
+            # get_session_conversations
+            ([('session_id', 1), ('timestamp', 1)], {}),
+            # Retention: oldest messages past the retention window
+            ([('timestamp', 1)], {}),
+        ],
+        'conversation_buckets': [
+            # Open bucket lookup on every write (not unique: a full bucket is followed by a new one) /
+            # get_session_conversations
+            ([('session_id', 1), ('window_start', 1)], {}),
+            # get_user_conversations (buckets newest first) / delete_user_conversations
+            ([('user_id', 1), ('last_at', -1)], {}),
+            # Retention: buckets whose newest message is past the retention window
+            ([('last_at', 1)], {}),
+        ],
+        'sessions': [
+            ([('session_id', 1)], {'unique': True}),
+            # get_user_sessions
+            ([('user_id', 1), ('created_at', -1)], {}),
+            # Retention: active sessions idle past the cutoff
+            ([('is_active', 1), ('last_activity', 1)], {}),
+        ],
+        'conversation_archives': [
+            # One summary per session, folded into by each retention batch
+            ([('session_id', 1)], {'unique': True}),
+            ([('user_id', 1), ('last_message_at', -1)], {}),
+        ],
+        'favorites': [
+            # One favorite per recipe per user; lets add_favorite upsert in one round trip
+            ([('user_id', 1), ('recipe_id', 1)], {'unique': True}),
+            # Favorites list, newest first
+            ([('user_id', 1), ('created_at', -1)], {}),
+        ],
+        'video_notes': [
+            # One note per video per user (save_video_notes upserts on this key)
+            ([('user_id', 1), ('video_id', 1)], {'unique': True}),
+            # Notes list, most recently edited first
+            ([('user_id', 1), ('updated_at', -1)], {}),
+        ],
+        'user_stats': [
+            # One stats document per user, upserted on every conversation write
+            ([('user_id', 1)], {'unique': True}),
+        ],
+    }
+    
+    def ensure_indexes(self):
+        """
+        Create every index in INDEXES (idempotent)
+        
+        Run as a migration step (python -m app.models.migrations), not at startup.
+        
+        Returns:
+            int: Number of indexes created or already present
+        """
+        if self.db is None:
+            print("⚠️ Index creation skipped, no MongoDB client")
+            return 0
+        
+        created = 0
+        for collection_name, indexes in self.INDEXES.items():
+            for keys, options in indexes:
+                # Each index separately, so one failure (e.g. duplicates blocking
+                # a unique index) doesn't stop the rest from being built
+                try:
+                    self.db[collection_name].create_index(keys, **options)
+                    created += 1
+                except ConnectionFailure as e:
+                    print(f"⚠️ Index creation skipped, MongoDB unreachable: {e}")
+                    return created
+                except Exception as e:
+                    print(f"⚠️ Index creation warning ({collection_name} {keys}): {e}")
+        
+        print(f"✅ Database indexes created ({created})")
+        return created
     
     
     # ===== USER MANAGEMENT =====
@@ -154,29 +320,140 @@ class Database:
                 'metadata': message.get('metadata', {})
             }
             
-            result = self.conversations.insert_one(conversation_data)
-            return str(result.inserted_id)
+            with self._flush_lock:
+                if self.bucketed:
+                    if not self._write_buckets([conversation_data]):
+                        return None
+                    inserted_id = conversation_data['_id']
+                else:
+                    inserted_id = self.conversations.insert_one(conversation_data).inserted_id
+                self.update_user_stats([conversation_data])
+            return str(inserted_id)
         except Exception as e:
             print(f"❌ Error saving conversation: {e}")
             return None
     
     
-    def get_user_conversations(self, user_id: str, limit: int = 50):
-        """Get user's conversation history"""
-        try:
-            conversations = self.conversations.find(
-                {'user_id': user_id}
-            ).sort('timestamp', -1).limit(limit)
+    def queue_conversation(self, user_id: str, session_id: str, message: dict):
+        """
+        Queue a conversation message for the next batched insert
+        
+        The timestamp is taken now, so queued messages keep their order.
+        
+        Args:
+            user_id: Owner of the conversation
+            session_id: Session the message belongs to
+            message: {"role": ..., "content": ..., "metadata": ...}
+        """
+        self._enqueue_write(messages=[{
+            'user_id': user_id,
+            'session_id': session_id,
+            'role': message.get('role'),
+            'content': message.get('content'),
+            'timestamp': datetime.now(timezone.utc),
+            'metadata': message.get('metadata', {})
+        }])
+    
+    
+    # Fields the history panel shows (metadata and user_id stay in the database)
+    CONVERSATION_LIST_FIELDS = {'session_id': 1, 'role': 1, 'content': 1, 'timestamp': 1}
+    
+    MAX_PAGE_SIZE = 200
+    
+    def iter_user_conversations(self, user_id: str, limit: int = 50, before=None, fields=None):
+        """
+        Iterate one page of a user's conversation history, newest first
+        
+        Pages are keyset-based on (timestamp, _id), so every page is an index
+        range scan of `limit` entries no matter how deep into the history it is.
+        With bucketed storage the page is merged from the newest buckets that
+        can hold it (see conversation_buckets.page_from_buckets).
+        
+        Args:
+            user_id: Owner of the conversations
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            before: (timestamp, _id) of the last message of the previous page
+            fields: Projection (None returns full documents)
             
-            return list(conversations)
+        Returns:
+            Iterator over conversation documents
+        """
+        self.flush_writes()
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        if self.bucketed:
+            return iter(self._user_bucket_page(user_id, limit, before, fields))
+        query = {'user_id': user_id}
+        if before:
+            timestamp, last_id = before
+            query['$or'] = [
+                {'timestamp': {'$lt': timestamp}},
+                {'timestamp': timestamp, '_id': {'$lt': last_id}}
+            ]
+        try:
+            return self.conversations.find(query, fields).sort(
+                [('timestamp', -1), ('_id', -1)]
+            ).limit(limit)
+        except Exception as e:
+            print(f"❌ Error getting conversations: {e}")
+            return iter([])
+    
+    
+    def _user_bucket_page(self, user_id: str, limit: int, before, fields):
+        """One page of a user's history from conversation_buckets, newest first"""
+        query = {'user_id': user_id}
+        if before:
+            # Only buckets holding a message at or before the cursor
+            query['first_at'] = {'$lte': before[0]}
+        try:
+            buckets = self.conversation_buckets.find(query).sort('last_at', -1)
+            return conversation_buckets.page_from_buckets(buckets, limit, before, fields)
         except Exception as e:
             print(f"❌ Error getting conversations: {e}")
             return []
     
     
+    def get_user_conversations(self, user_id: str, limit: int = 50, before=None, fields=None):
+        """Get user's conversation history (one page, newest first)"""
+        try:
+            return list(self.iter_user_conversations(user_id, limit, before, fields))
+        except Exception as e:
+            print(f"❌ Error getting conversations: {e}")
+            return []
+    
+    
+    @staticmethod
+    def encode_page_cursor(conversation):
+        """Opaque cursor pointing just past a conversation document"""
+        return f"{conversation['timestamp'].isoformat()}_{conversation['_id']}"
+    
+    
+    @staticmethod
+    def decode_page_cursor(cursor: str):
+        """
+        Parse a cursor from encode_page_cursor
+        
+        Returns:
+            tuple: (timestamp, ObjectId)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            timestamp, last_id = cursor.rsplit('_', 1)
+            return datetime.fromisoformat(timestamp), ObjectId(last_id)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    
+    
     def get_session_conversations(self, session_id: str):
         """Get conversations for a specific session"""
+        self.flush_writes()
         try:
+            if self.bucketed:
+                buckets = self.conversation_buckets.find({'session_id': session_id}).sort('window_start', 1)
+                messages = [message for bucket in buckets for message in conversation_buckets.unwind(bucket)]
+                return sorted(messages, key=lambda message: message['timestamp'])
+            
             conversations = self.conversations.find(
                 {'session_id': session_id}
             ).sort('timestamp', 1)
@@ -189,9 +466,17 @@ class Database:
     
     def delete_user_conversations(self, user_id: str):
         """Delete all conversations for a user"""
+        self.flush_writes()
         try:
             result = self.conversations.delete_many({'user_id': user_id})
             deleted_count = result.deleted_count
+            # Both collections, so history is gone even mid-way through a storage switch
+            deleted_count += sum(bucket.get('count', 0) for bucket in
+                                 self.conversation_buckets.find({'user_id': user_id}, {'count': 1}))
+            self.conversation_buckets.delete_many({'user_id': user_id})
+            # Retention archives keep excerpts of the user's messages
+            self.db['conversation_archives'].delete_many({'user_id': user_id})
+            self.user_stats.delete_one({'user_id': user_id})
             print(f"✅ Deleted {deleted_count} conversations for user {user_id}")
             return deleted_count
         except Exception as e:
@@ -199,6 +484,101 @@ class Database:
             return 0
     
     
+    # ===== USER STATISTICS =====
+    
+    def update_user_stats(self, messages):
+        """
+        Fold newly written messages into their owners' stats documents
+        
+        Args:
+            messages: Conversation documents that were just inserted, oldest first
+        """
+        updates = user_stats.build_updates(messages)
+        if not updates:
+            return
+        try:
+            self.user_stats.bulk_write([
+                UpdateOne({'user_id': user_id}, pipeline, upsert=True)
+                for user_id, pipeline in updates
+            ], ordered=True)
+        except Exception as e:
+            # The next rebuild_user_stats (migration or reset) corrects any drift
+            print(f"❌ Error updating user stats: {e}")
+    
+    
+    def get_user_stats(self, user_id: str):
+        """
+        Get a user's stats from the source chosen by USER_STATS_SOURCE
+        
+        'document' reads the incrementally maintained user_stats document
+        (rebuilt from history if missing), 'aggregate' computes the stats in
+        MongoDB, 'python' computes them in Python from the full history.
+        """
+        if self.stats_source == 'aggregate':
+            return self.aggregate_user_stats(user_id)
+        if self.stats_source == 'python':
+            return self.compute_user_stats(user_id)
+        try:
+            stats = self.user_stats.find_one({'user_id': user_id})
+            return stats or self.rebuild_user_stats(user_id)
+        except Exception as e:
+            print(f"❌ Error getting user stats: {e}")
+            return None
+    
+    
+    def compute_user_stats(self, user_id: str):
+        """Compute a user's stats in Python from their whole conversation history"""
+        self.flush_writes()
+        return self._stats_from_history(user_id)
+    
+    
+    def _stats_from_history(self, user_id: str):
+        """Compute a user's stats from the stored history (buffered messages are not read)"""
+        try:
+            if self.bucketed:
+                buckets = self.conversation_buckets.find({'user_id': user_id}, {'messages': 1})
+                history = sorted((message for bucket in buckets for message in conversation_buckets.unwind(bucket)),
+                                 key=lambda message: message['timestamp'])
+            else:
+                history = self.conversations.find(
+                    {'user_id': user_id},
+                    {'role': 1, 'content': 1, 'timestamp': 1, 'metadata': 1, 'voice_enabled': 1}
+                ).sort('timestamp', 1)
+            return user_stats.rebuild_stats(user_id, history)
+        except Exception as e:
+            print(f"❌ Error computing user stats: {e}")
+            return None
+    
+    
+    def aggregate_user_stats(self, user_id: str):
+        """Compute a user's stats with an aggregation pipeline (only small results cross the wire)"""
+        self.flush_writes()
+        try:
+            collection = self.conversation_buckets if self.bucketed else self.conversations
+            pipeline = user_stats.aggregation_pipeline(user_id, bucketed=self.bucketed)
+            result = next(collection.aggregate(pipeline), {})
+            return user_stats.from_aggregation(user_id, result)
+        except Exception as e:
+            print(f"❌ Error aggregating user stats: {e}")
+            return None
+    
+    
+    def rebuild_user_stats(self, user_id: str):
+        """Recompute and store a user's stats document from their whole conversation history"""
+        # Under the flush lock no message is written (and counted) between reading
+        # the history and replacing the document, so no increment is lost or doubled
+        with self._flush_lock:
+            self._flush_pending()
+            stats = self._stats_from_history(user_id)
+            if stats is None:
+                return None
+            try:
+                self.user_stats.replace_one({'user_id': user_id}, stats, upsert=True)
+            except Exception as e:
+                print(f"❌ Error rebuilding user stats: {e}")
+        return stats
+    
+    
     # ===== SESSION MANAGEMENT =====
     
     def create_session(self, user_id: str, session_id: str):
@@ -232,6 +612,16 @@ class Database:
             return False
     
     
+    def touch_session(self, session_id: str):
+        """
+        Queue a session activity update (coalesced with others for the same session)
+        
+        Args:
+            session_id: Session that was just active
+        """
+        self._enqueue_write(session_id=session_id)
+    
+    
     def end_session(self, session_id: str):
         """End a session"""
         try:
@@ -257,6 +647,170 @@ class Database:
             print(f"❌ Error getting user sessions: {e}")
             return []
 
+    
+    
+    # ===== WRITE-BEHIND BUFFER =====
+    
+    def _enqueue_write(self, messages=None, session_id=None):
+        """Add writes to the buffer and wake the flusher"""
+        with self._write_lock:
+            if messages:
+                self._pending_messages.extend(messages)
+                self.write_stats['queued'] += len(messages)
+                overflow = len(self._pending_messages) - self.write_max_pending
+                if overflow > 0:
+                    # MongoDB has been unreachable for a while: keep the newest messages
+                    del self._pending_messages[:overflow]
+                    self.write_stats['dropped'] += overflow
+            if session_id:
+                self._pending_activity[session_id] = datetime.now(timezone.utc)
+            
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name='db-write-behind', daemon=True)
+                self._flusher.start()
+            batch_full = len(self._pending_messages) + len(self._pending_activity) >= self.write_batch_size
+        
+        if batch_full:
+            self._flush_wakeup.set()
+    
+    
+    def _run_flusher(self):
+        """Flush the buffer every write_flush_interval seconds, or sooner when a batch fills"""
+        while True:
+            self._flush_wakeup.wait(self.write_flush_interval)
+            self._flush_wakeup.clear()
+            self.flush_writes()
+    
+    
+    def flush_writes(self):
+        """
+        Write every buffered message and activity update
+        
+        Messages go out in one insert_many (one bucket upsert per session with
+        bucketed storage), activity updates in one bulk_write of update_one
+        operations. Failed writes are put back for the next flush.
+        
+        Returns:
+            int: Number of messages written
+        """
+        with self._flush_lock:
+            return self._flush_pending()
+    
+    
+    def _flush_pending(self):
+        """Write every buffered message and activity update (flush lock held)"""
+        with self._write_lock:
+            messages, self._pending_messages = self._pending_messages, []
+            activity, self._pending_activity = self._pending_activity, {}
+        if not messages and not activity:
+            return 0
+        
+        written = 0
+        if messages:
+            if self.bucketed:
+                saved = self._write_buckets(messages)
+            else:
+                saved = self._insert_messages(messages)
+            written = len(saved)
+            if written < len(messages):
+                self.write_stats['errors'] += 1
+                saved_ids = {id(message) for message in saved}
+                with self._write_lock:
+                    self._pending_messages[:0] = [message for message in messages if id(message) not in saved_ids]
+            if written:
+                self.update_user_stats(saved)
+        
+        if activity:
+            try:
+                self.sessions.bulk_write([
+                    UpdateOne({'session_id': session_id}, {'$max': {'last_activity': last_activity}})
+                    for session_id, last_activity in activity.items()
+                ], ordered=False)
+                self.write_stats['activity_written'] += len(activity)
+            except Exception as e:
+                print(f"❌ Error updating session activity batch: {e}")
+                self.write_stats['errors'] += 1
+                with self._write_lock:
+                    for session_id, last_activity in activity.items():
+                        self._pending_activity.setdefault(session_id, last_activity)
+        
+        self.write_stats['messages_written'] += written
+        self.write_stats['flushes'] += 1
+        return written
+    
+    
+    # Duplicate key: the document is already stored
+    DUPLICATE_KEY_ERROR = 11000
+    
+    def _insert_messages(self, messages):
+        """
+        Insert messages into conversations in one unordered insert_many
+        
+        insert_many gives each message its _id, so a retry after an error
+        the server had already applied reports duplicate keys for those
+        messages; they count as written. An unordered insert keeps one bad
+        message from holding back the rest of the batch.
+        
+        Returns:
+            list: The messages that were written
+        """
+        try:
+            self.conversations.insert_many(messages, ordered=False)
+            return messages
+        except Exception as e:
+            if not isinstance(e, BulkWriteError):
+                # Unknown outcome (e.g. a timeout): retry all, duplicates are detected then
+                print(f"❌ Error saving conversation batch: {e}")
+                return []
+            failed = {error['index'] for error in e.details.get('writeErrors', [])
+                      if error.get('code') != self.DUPLICATE_KEY_ERROR}
+            if failed:
+                print(f"❌ Error saving conversation batch: {len(failed)} of {len(messages)} messages failed")
+            return [message for index, message in enumerate(messages) if index not in failed]
+    
+    
+    def _write_buckets(self, messages):
+        """
+        Append messages to their session buckets in one ordered bulk_write
+        
+        A message that already has an _id was sent by an earlier attempt
+        whose outcome is unknown; it is only appended if no bucket holds it.
+        
+        Returns:
+            list: The messages that were written, oldest first
+        """
+        try:
+            stored = conversation_buckets.stored_ids(self.conversation_buckets,
+                                                     [message for message in messages if '_id' in message])
+        except Exception as e:
+            print(f"❌ Error saving conversation buckets: {e}")
+            return []
+        pending = [message for message in messages if message.get('_id') not in stored]
+        updates = conversation_buckets.build_bucket_updates(pending, self.bucket_size, self.bucket_window_seconds)
+        try:
+            if updates:
+                self.conversation_buckets.bulk_write([operation for operation, _ in updates], ordered=True)
+            applied = len(updates)
+        except Exception as e:
+            print(f"❌ Error saving conversation buckets: {e}")
+            # An ordered bulk write stops at the first failure
+            applied = 0
+            if isinstance(e, BulkWriteError):
+                applied = e.details.get('nMatched', 0) + e.details.get('nUpserted', 0)
+        saved = {id(message) for _, chunk in updates[:applied] for message in chunk}
+        return [message for message in messages if id(message) in saved or message.get('_id') in stored]
+    
+    
+    def get_write_stats(self):
+        """Return write-behind buffer statistics"""
+        with self._write_lock:
+            return dict(self.write_stats,
+                        pending_messages=len(self._pending_messages),
+                        pending_activity=len(self._pending_activity))
+
 
-# Global database instance
+# Global database instance (connects on first query; create_app applies app.config)
 db = Database()
+
+# Don't lose buffered writes on shutdown
+atexit.register(db.flush_writes)
@@ -0,0 +1,136 @@
+"""
+Database migrations
+Explicit, idempotent schema steps run once per deploy instead of on every
+process start:
+
+    python -m app.models.migrations
+"""
+import os
+import sys
+from app.config import get_config
+from app.models import conversation_buckets
+from app.models.database import db
+
+
+def create_indexes(database):
+    """Build the query-shaped indexes in Database.INDEXES"""
+    return database.ensure_indexes()
+
+
+# Indexes replaced by a wider one in Database.INDEXES
+SUPERSEDED_INDEXES = {
+    'conversations': ['user_id_1_timestamp_-1'],
+}
+
+
+def drop_superseded_indexes(database):
+    """Drop indexes whose queries are now served by a wider index"""
+    dropped = 0
+    for collection_name, names in SUPERSEDED_INDEXES.items():
+        existing = database.db[collection_name].index_information()
+        for name in names:
+            if name in existing:
+                database.db[collection_name].drop_index(name)
+                dropped += 1
+    return dropped
+
+
+def apply_session_ttl(database):
+    """
+    Expire inactive sessions SESSION_RETENTION_DAYS after their last activity
+    
+    A partial TTL index, so active sessions are never removed. Changing the
+    setting updates the existing index in place; 0 drops it.
+    """
+    name = 'inactive_sessions_ttl'
+    seconds = int(database.session_retention_days * 86400)
+    existing = database.sessions.index_information().get(name)
+    if seconds <= 0:
+        if existing:
+            database.sessions.drop_index(name)
+    elif existing is None:
+        database.sessions.create_index(
+            [('last_activity', 1)], name=name, expireAfterSeconds=seconds,
+            partialFilterExpression={'is_active': False}
+        )
+    elif existing.get('expireAfterSeconds') != seconds:
+        database.db.command('collMod', 'sessions', index={'name': name, 'expireAfterSeconds': seconds})
+    return seconds
+
+
+def bucket_conversations(database, batch_size=1000):
+    """
+    Move per-message conversations into conversation_buckets (CONVERSATION_STORAGE=buckets only)
+    
+    Messages keep their _id, so history page cursors stay valid. Each batch
+    is written as bucket upserts and then deleted; messages already found in
+    a bucket (a previous run stopped between the two) are not appended again.
+    """
+    if not database.bucketed:
+        return 0
+    moved = 0
+    while True:
+        batch = list(database.conversations.find().sort([('session_id', 1), ('timestamp', 1)]).limit(batch_size))
+        if not batch:
+            break
+        
+        ids = [message['_id'] for message in batch]
+        done = conversation_buckets.stored_ids(database.conversation_buckets, batch)
+        pending = [message for message in batch if message['_id'] not in done]
+        if pending:
+            updates = conversation_buckets.build_bucket_updates(pending, database.bucket_size,
+                                                                database.bucket_window_seconds)
+            database.conversation_buckets.bulk_write([operation for operation, _ in updates], ordered=True)
+        database.conversations.delete_many({'_id': {'$in': ids}})
+        moved += len(pending)
+    return moved
+
+
+def backfill_user_stats(database):
+    """Build stats documents for users whose history predates user_stats"""
+    existing = set(database.user_stats.distinct('user_id'))
+    owners = set(database.conversations.distinct('user_id')) | set(database.conversation_buckets.distinct('user_id'))
+    missing = [user_id for user_id in owners if user_id not in existing]
+    for user_id in missing:
+        database.rebuild_user_stats(user_id)
+    return len(missing)
+
+
+# Applied in order; every step must be safe to run again
+MIGRATIONS = [
+    ('create_indexes', create_indexes),
+    ('drop_superseded_indexes', drop_superseded_indexes),
+    ('apply_session_ttl', apply_session_ttl),
+    ('bucket_conversations', bucket_conversations),
+    ('backfill_user_stats', backfill_user_stats),
+]
+
+
+def run_migrations(database=db):
+    """
+    Run every migration step against a database
+    
+    Args:
+        database: Database handler (defaults to the global one)
+        
+    Returns:
+        bool: True when every step succeeded
+    """
+    if database.client is None:
+        print("❌ Migrations skipped, MongoDB client unavailable")
+        return False
+    
+    ok = True
+    for name, step in MIGRATIONS:
+        try:
+            step(database)
+            print(f"✅ Migration {name} applied")
+        except Exception as e:
+            print(f"❌ Migration {name} failed: {e}")
+            ok = False
+    return ok
+
+
+if __name__ == '__main__':
+    db.configure(get_config(os.getenv('FLASK_ENV', 'development')))
+    sys.exit(0 if run_migrations() else 1)
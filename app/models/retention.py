@@ -0,0 +1,211 @@
+"""
+Conversation and session retention for Kitchen Assistant
+A background compactor keeps the working set bounded: messages older than
+the retention window are rolled into one archive document per session and
+deleted, and sessions idle for too long are marked inactive (a TTL index
+then removes inactive sessions, see migrations.apply_session_ttl).
+Only one process compacts at a time, guarded by a lease in MongoDB.
+"""
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.models import conversation_buckets
+
+
+class RetentionCompactor:
+    """
+    Periodic retention pass over conversations and sessions
+    Each pass closes idle sessions, then archives expired messages in
+    batches of batch_size (oldest first) until none are left.
+    """
+
+    LEASE_NAME = 'retention'
+    EXCERPTS_PER_SESSION = 5     # First user messages kept in each archive
+
+    def __init__(self, database, retention_days: int, session_idle_minutes: int,
+                 interval: float = 3600, batch_size: int = 500):
+        """
+        Initialize the compactor (call start() to run it in the background)
+
+        Args:
+            database: Database handler
+            retention_days: Age after which messages are archived (0 keeps everything)
+            session_idle_minutes: Inactivity after which a session is marked inactive (0 disables)
+            interval: Seconds between passes
+            batch_size: Messages archived per round trip
+        """
+        self.database = database
+        self.retention_days = retention_days
+        self.session_idle_minutes = session_idle_minutes
+        self.interval = interval
+        self.batch_size = batch_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Statistics
+        self.stats = {'passes': 0, 'skipped': 0, 'sessions_closed': 0,
+                      'messages_archived': 0, 'archives_updated': 0, 'errors': 0}
+
+    def start(self):
+        """Run a pass every interval seconds on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='db-retention', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current pass"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def run_once(self, now: datetime = None):
+        """
+        Run one retention pass if this process holds the lease
+
+        Args:
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            bool: True if the pass ran
+        """
+        now = now or datetime.now(timezone.utc)
+        try:
+            if not self._acquire_lease(now):
+                self.stats['skipped'] += 1
+                return False
+            self.close_idle_sessions(now)
+            self.compact_conversations(now)
+            self.stats['passes'] += 1
+            return True
+        except Exception as e:
+            print(f"❌ Retention pass failed: {e}")
+            self.stats['errors'] += 1
+            return False
+
+    def _acquire_lease(self, now: datetime):
+        """Take or renew the compaction lease (held for two intervals)"""
+        try:
+            self.database.db['maintenance_locks'].find_one_and_update(
+                {'_id': self.LEASE_NAME, '$or': [{'expires_at': {'$lt': now}}, {'owner': self.owner}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=2 * self.interval)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Another process holds a live lease
+            return False
+
+    def close_idle_sessions(self, now: datetime):
+        """
+        Mark sessions without recent activity inactive
+
+        Returns:
+            int: Sessions closed
+        """
+        if self.session_idle_minutes <= 0:
+            return 0
+        cutoff = now - timedelta(minutes=self.session_idle_minutes)
+        result = self.database.sessions.update_many(
+            {'is_active': True, 'last_activity': {'$lt': cutoff}},
+            {'$set': {'is_active': False, 'ended_at': now}}
+        )
+        self.stats['sessions_closed'] += result.modified_count
+        return result.modified_count
+
+    def compact_conversations(self, now: datetime):
+        """
+        Roll messages older than the retention window into per-session archives
+
+        Each batch is summarized with one bulk upsert into
+        conversation_archives, then deleted with one delete_many. With
+        bucketed storage whole buckets expire once their newest message does.
+
+        Returns:
+            int: Messages archived
+        """
+        if self.retention_days <= 0:
+            return 0
+        cutoff = now - timedelta(days=self.retention_days)
+        bucketed = self.database.bucketed
+        collection = self.database.conversation_buckets if bucketed else self.database.conversations
+        archived = 0
+        while not self._stop.is_set():
+            if bucketed:
+                batch = list(collection.find({'last_at': {'$lt': cutoff}}).sort('last_at', 1).limit(self.batch_size))
+                messages = sorted((message for bucket in batch for message in conversation_buckets.unwind(bucket)),
+                                  key=lambda message: message['timestamp'])
+            else:
+                batch = messages = list(collection.find(
+                    {'timestamp': {'$lt': cutoff}},
+                    {'user_id': 1, 'session_id': 1, 'role': 1, 'content': 1, 'timestamp': 1}
+                ).sort('timestamp', 1).limit(self.batch_size))
+            if not batch:
+                break
+
+            updates = self.summarize(messages)
+            self.database.db['conversation_archives'].bulk_write(updates, ordered=False)
+            collection.delete_many({'_id': {'$in': [document['_id'] for document in batch]}})
+
+            archived += len(messages)
+            self.stats['archives_updated'] += len(updates)
+            if len(batch) < self.batch_size:
+                break
+
+        self.stats['messages_archived'] += archived
+        return archived
+
+    @classmethod
+    def summarize(cls, messages):
+        """
+        Archive upserts for a batch of messages, one per session
+
+        Args:
+            messages: Conversation documents, oldest first
+
+        Returns:
+            list: UpdateOne operations for conversation_archives
+        """
+        sessions = {}
+        for message in messages:
+            summary = sessions.setdefault(message.get('session_id'), {
+                'user_id': message.get('user_id'),
+                'counts': {'message_count': 0, 'user_messages': 0, 'assistant_messages': 0},
+                'first': message.get('timestamp'),
+                'last': message.get('timestamp'),
+                'excerpts': []
+            })
+            summary['counts']['message_count'] += 1
+            if message.get('role') in ('user', 'assistant'):
+                summary['counts'][f"{message['role']}_messages"] += 1
+            summary['last'] = message.get('timestamp')
+            if message.get('role') == 'user' and len(summary['excerpts']) < cls.EXCERPTS_PER_SESSION:
+                summary['excerpts'].append((message.get('content') or '')[:200])
+
+        return [
+            UpdateOne(
+                {'session_id': session_id},
+                {
+                    '$setOnInsert': {'user_id': summary['user_id']},
+                    '$inc': summary['counts'],
+                    '$min': {'first_message_at': summary['first']},
+                    '$max': {'last_message_at': summary['last']},
+                    '$push': {'excerpts': {'$each': summary['excerpts'], '$slice': cls.EXCERPTS_PER_SESSION}}
+                },
+                upsert=True
+            )
+            for session_id, summary in sessions.items()
+        ]
+
+    def get_stats(self):
+        """Return retention statistics"""
+        return dict(self.stats, retention_days=self.retention_days,
+                    session_idle_minutes=self.session_idle_minutes)
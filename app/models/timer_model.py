@@ -2,141 +2,475 @@
 Timer model and management for Kitchen Assistant
 """
 from datetime import datetime, timedelta
+import heapq
+import math
 import threading
 import time
 
 
 class TimerManager:
-    """Manages all active timers"""
+    """
+    Manages all active timers
+    A single scheduler thread sleeps until the earliest deadline in a min-heap
+    (monotonic clock) instead of running one sleeping thread per timer.
+    Timers created with an owner (a Socket.IO room) only send their events to
+    that room and are only visible to lookups scoped to the same owner.
     
-    def __init__(self):
+    Clients count down locally from each timer's deadline: a `timer_sync` frame
+    carrying all of an owner's timers is sent on create and delete and then only
+    every resync_interval seconds, followed by the final `timer_finished` alert.
+    With resync_interval set to 0 the legacy per-second `timer_update` ticks are
+    sent instead.
+    
+    Timers restored from the journal that ran out while the server was down are
+    held as undelivered alerts until their owner next connects or asks for its
+    timers (deliver_pending), since nobody is listening right after a restart.
+    """
+    
+    def __init__(self, resync_interval: float = 60.0):
+        """
+        Initialize the timer manager
+        
+        Args:
+            resync_interval: Seconds between coalesced timer_sync frames (0 for per-second ticks)
+        """
         self.active_timers = {}
         self.timer_counter = 0
         self.socketio = None
+        self.phrase_bank = None
+        self.journal = None
+        self.resync_interval = resync_interval
+        
+        self._names = {}       # lowercased name -> {timer_id: None}, oldest first
+        self._owners = {}      # owner room -> {timer_id: None}
+        self._undelivered = {} # owner room -> [timer_info] finished while the server was down
+        self._deadlines = {}   # timer_id -> monotonic deadline
+        self._heap = []        # (monotonic wake time, timer_id), may hold stale entries
+        self._next_resync = None  # Monotonic time of the next timer_sync round
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._scheduler_thread = None
     
     def set_socketio(self, socketio_instance):
         """Set SocketIO instance for broadcasting timer updates"""
         self.socketio = socketio_instance
     
-    def create_timer(self, duration_minutes: int, timer_name: str = ""):
+    def set_resync_interval(self, seconds: float):
+        """Set seconds between timer_sync frames (0 switches to per-second ticks)"""
+        with self._lock:
+            self.resync_interval = seconds
+            self._next_resync = time.monotonic() + seconds if seconds and self._deadlines else None
+            self._wakeup.notify()
+    
+    def set_phrase_bank(self, phrase_bank):
+        """Set phrase bank used to pre-render timer alerts"""
+        self.phrase_bank = phrase_bank
+    
+    @staticmethod
+    def alert_text(timer_name: str) -> str:
+        """Spoken alert for a finished timer"""
+        return f"Your {timer_name} timer has finished!"
+    
+    def create_timer(self, duration_minutes: int, timer_name: str = "", owner: str = None):
         """
         Creates and starts a new timer
         
         Args:
             duration_minutes: Timer duration in minutes
             timer_name: Optional name for the timer
+            owner: Socket.IO room that receives this timer's events (None broadcasts)
             
         Returns:
             dict: Timer information
         """
-        self.timer_counter += 1
-        timer_id = self.timer_counter
+        with self._lock:
+            self.timer_counter += 1
+            timer_id = self.timer_counter
+            
+            if not timer_name:
+                timer_name = f"Timer {timer_id}"
+            
+            end_time = datetime.now() + timedelta(minutes=duration_minutes)
+            
+            timer_info = {
+                "id": timer_id,
+                "name": timer_name,
+                "duration_minutes": duration_minutes,
+                "end_time": end_time,
+                "created_at": datetime.now(),
+                "owner": owner
+            }
+            
+            self._add(timer_info, time.monotonic() + duration_minutes * 60)
+            if self.journal:
+                self.journal.append(self._journal_record(timer_info))
         
-        if not timer_name:
-            timer_name = f"Timer {timer_id}"
+        # Render the alert now so it plays instantly when the timer fires
+        if self.phrase_bank:
+            self.phrase_bank.prepare(self.alert_text(timer_name))
         
-        end_time = datetime.now() + timedelta(minutes=duration_minutes)
+        self.sync_owner(owner)
         
-        timer_info = {
-            "id": timer_id,
-            "name": timer_name,
-            "duration_minutes": duration_minutes,
-            "end_time": end_time,
-            "created_at": datetime.now()
+        return {
+            "message": f"Timer '{timer_name}' set for {duration_minutes} minutes",
+            "timer": timer_info
         }
-        
+    
+    def _add(self, timer_info, deadline):
+        """Index a timer and schedule its deadline (lock held)"""
+        timer_id = timer_info["id"]
         self.active_timers[timer_id] = timer_info
+        self._names.setdefault(timer_info["name"].lower(), {})[timer_id] = None
+        self._owners.setdefault(timer_info.get("owner"), {})[timer_id] = None
+        self._deadlines[timer_id] = deadline
+        self._schedule(timer_id, self._next_wake(deadline))
+        if self.resync_interval and self._next_resync is None:
+            self._next_resync = time.monotonic() + self.resync_interval
+        self._ensure_scheduler()
+    
+    @staticmethod
+    def _journal_record(timer_info):
+        """Journal entry for a new timer (wall-clock times, so they survive a restart)"""
+        return {
+            "op": "create",
+            "id": timer_info["id"],
+            "name": timer_info["name"],
+            "duration_minutes": timer_info["duration_minutes"],
+            "end_time": timer_info["end_time"].timestamp(),
+            "created_at": timer_info["created_at"].timestamp(),
+            "owner": timer_info.get("owner")
+        }
+    
+    def recover(self, journal):
+        """
+        Restore running timers from a journal and keep journaling to it
+        
+        Timers whose deadline passed while the server was down are kept as
+        undelivered alerts (and stay in the journal) until deliver_pending.
+        
+        Args:
+            journal: TimerJournal to replay and append to
+            
+        Returns:
+            int: Number of timers restored
+        """
+        records, max_id = journal.load()
+        now_wall = time.time()
+        with self._lock:
+            now = time.monotonic()
+            self.timer_counter = max(self.timer_counter, max_id)
+            for record in records:
+                timer_info = {
+                    "id": record["id"],
+                    "name": record["name"],
+                    "duration_minutes": record["duration_minutes"],
+                    "end_time": datetime.fromtimestamp(record["end_time"]),
+                    "created_at": datetime.fromtimestamp(record["created_at"]),
+                    "owner": record.get("owner")
+                }
+                if record["end_time"] <= now_wall:
+                    self._undelivered.setdefault(timer_info["owner"], []).append(timer_info)
+                    continue
+                # Rebase the wall-clock deadline onto this process's monotonic clock
+                self._add(timer_info, now + record["end_time"] - now_wall)
+            self.journal = journal
+        journal.compact(records)
         
-        # Start background timer thread
-        threading.Thread(
-            target=self._timer_countdown,
-            args=(timer_id, timer_name, duration_minutes),
-            daemon=True
-        ).start()
+        if records:
+            print(f"♻️ Restored {len(records)} timer(s) from {journal.path}")
+        return len(records)
+    
+    def deliver_pending(self, owner: str = None):
+        """
+        Send the alerts of timers that finished while the server was down
+        
+        Called when an owner's device connects or syncs its timers; unowned
+        timers are broadcast with the first delivery.
         
+        Args:
+            owner: Owner room that is now listening
+            
+        Returns:
+            int: Number of alerts sent
+        """
+        if not self.socketio:
+            return 0
+        with self._lock:
+            alerts = self._undelivered.pop(owner, [])
+            if owner is not None:
+                alerts += self._undelivered.pop(None, [])
+            if self.journal:
+                for timer_info in alerts:
+                    self.journal.append({"op": "delete", "id": timer_info["id"]})
+        for timer_info in alerts:
+            self._finish(timer_info["id"], timer_info)
+        return len(alerts)
+    
+    def _journal_snapshot(self):
+        """Create records of every timer the journal must keep"""
+        with self._lock:
+            timers = list(self.active_timers.values())
+            timers.extend(info for alerts in self._undelivered.values() for info in alerts)
+            return [self._journal_record(info) for info in timers]
+    
+    def _next_wake(self, deadline, now=None):
+        """Next whole-second tick before the deadline, or the deadline itself"""
+        if not self.socketio or self.resync_interval:
+            return deadline  # Clients count down locally (or nobody is listening)
+        now = time.monotonic() if now is None else now
+        # Ticks are aligned to the deadline so countdowns never drift
+        return deadline - max(0, math.ceil(deadline - now) - 1)
+    
+    def _schedule(self, timer_id, wake_at):
+        """Push a wake-up onto the heap and wake the scheduler if it is now the earliest (lock held)"""
+        heapq.heappush(self._heap, (wake_at, timer_id))
+        if self._heap[0][1] == timer_id:
+            self._wakeup.notify()
+    
+    def _ensure_scheduler(self):
+        """Start the scheduler thread on first use (lock held)"""
+        if self._scheduler_thread is None or not self._scheduler_thread.is_alive():
+            self._scheduler_thread = threading.Thread(
+                target=self._run_scheduler,
+                name='timer-scheduler',
+                daemon=True
+            )
+            self._scheduler_thread.start()
+    
+    def _run_scheduler(self):
+        """Scheduler loop: sleep until the earliest wake-up, then tick or finish those timers"""
+        while True:
+            with self._lock:
+                due, syncs = self._pop_due()
+            for owner, payload in syncs:
+                try:
+                    self._emit('timer_sync', payload, owner)
+                except Exception as e:
+                    print(f"❌ Timer resync error for {owner}: {e}")
+            for timer_id, timer_info, remaining in due:
+                try:
+                    if not self.resync_interval:
+                        self._emit_tick(timer_id, timer_info, remaining)
+                    if remaining == 0:
+                        self._finish(timer_id, timer_info)
+                except Exception as e:
+                    print(f"❌ Timer scheduler error for timer {timer_id}: {e}")
+    
+    def _pop_due(self):
+        """Wait for and pop every due wake-up and resync round, rescheduling ticks (lock held)"""
+        while True:
+            now = time.monotonic()
+            due = []
+            syncs = []
+            while self._heap and self._heap[0][0] <= now:
+                _, timer_id = heapq.heappop(self._heap)
+                deadline = self._deadlines.get(timer_id)
+                timer_info = self.active_timers.get(timer_id)
+                if deadline is None or timer_info is None:
+                    self._remove(timer_id)  # Deleted timer
+                    continue
+                remaining = max(0, round(deadline - now))
+                if remaining > 0:
+                    heapq.heappush(self._heap, (self._next_wake(deadline, now), timer_id))
+                else:
+                    self._remove(timer_id)
+                due.append((timer_id, timer_info, remaining))
+            
+            # One coalesced frame per owner carrying all of its timers
+            if self._next_resync is not None and now >= self._next_resync:
+                if self.socketio:
+                    syncs = [(owner, self._sync_payload(owner, now)) for owner in self._owners]
+                self._next_resync = now + self.resync_interval if self._deadlines and self.resync_interval else None
+            
+            if due or syncs:
+                return due, syncs
+            
+            # Drop deleted timers' wake-ups once they dominate the heap
+            if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+                self._heap = [entry for entry in self._heap if entry[1] in self._deadlines]
+                heapq.heapify(self._heap)
+            
+            wake_times = [entry[0] for entry in self._heap[:1]]
+            if self._next_resync is not None:
+                wake_times.append(self._next_resync)
+            self._wakeup.wait(min(wake_times) - now if wake_times else None)
+    
+    def _timer_payload(self, timer_id, now):
+        """Client view of a timer: its deadline plus the time left when sent (lock held)"""
+        timer_info = self.active_timers[timer_id]
+        remaining = max(0.0, self._deadlines[timer_id] - now)
+        seconds = math.ceil(remaining)
         return {
-            "message": f"Timer '{timer_name}' set for {duration_minutes} minutes",
-            "timer": timer_info
+            "id": timer_id,
+            "name": timer_info["name"],
+            "duration_minutes": timer_info["duration_minutes"],
+            "end_time": timer_info["end_time"].isoformat(),
+            "remaining_ms": int(remaining * 1000),
+            "remaining": f"{seconds // 60:02d}:{seconds % 60:02d}"
         }
     
-    def _timer_countdown(self, timer_id, timer_name, duration_minutes):
-        """Background countdown for a timer"""
-        total_seconds = duration_minutes * 60
+    def _sync_payload(self, owner, now=None):
+        """timer_sync frame with every active timer of an owner (lock held)"""
+        now = time.monotonic() if now is None else now
+        return {
+            "timers": [
+                self._timer_payload(timer_id, now)
+                for timer_id in self._owners.get(owner, ())
+                if timer_id in self.active_timers and timer_id in self._deadlines
+            ]
+        }
+    
+    def sync_owner(self, owner: str = None):
+        """
+        Send an owner's devices the current deadlines of all its timers
+        
+        Args:
+            owner: Owner room (None for unowned timers, which are broadcast)
+        """
+        if not self.socketio:
+            return
+        with self._lock:
+            payload = self._sync_payload(owner)
+        self._emit('timer_sync', payload, owner)
+    
+    def _emit(self, event, data, owner):
+        """Send a timer event to its owner's room, or to everyone for unowned timers"""
+        if owner:
+            self.socketio.emit(event, data, to=owner)
+        else:
+            self.socketio.emit(event, data)
+    
+    def _emit_tick(self, timer_id, timer_info, remaining):
+        """Send the remaining time of a timer"""
+        if self.socketio:
+            remaining_minutes = remaining // 60
+            remaining_seconds = remaining % 60
+            self._emit('timer_update', {
+                'timer_id': timer_id,
+                'name': timer_info["name"],
+                'remaining_minutes': remaining_minutes,
+                'remaining_seconds': remaining_seconds,
+                'remaining_time': f"{remaining_minutes:02d}:{remaining_seconds:02d}"
+            }, timer_info.get("owner"))
+    
+    def _finish(self, timer_id, timer_info):
+        """Announce a finished timer"""
+        timer_name = timer_info["name"]
+        print(f"⏰ TIMER ALERT: {timer_name} ({timer_info['duration_minutes']} minutes) has finished!")
         
-        while total_seconds > 0 and timer_id in self.active_timers:
-            time.sleep(1)
-            total_seconds -= 1
+        if self.socketio:
+            # Spoken alert (pre-rendered in the phrase bank at creation)
+            speech_message = self.alert_text(timer_name)
             
-            # Broadcast timer update if socketio is available
-            if self.socketio:
-                remaining_minutes = total_seconds // 60
-                remaining_seconds = total_seconds % 60
-                self.socketio.emit('timer_update', {
-                    'timer_id': timer_id,
-                    'name': timer_name,
-                    'remaining_minutes': remaining_minutes,
-                    'remaining_seconds': remaining_seconds,
-                    'remaining_time': f"{remaining_minutes:02d}:{remaining_seconds:02d}"
-                })
+            # Emit timer finished event
+            self._emit('timer_finished', {
+                'timer_id': timer_id,
+                'name': timer_name,
+                'message': f"Timer '{timer_name}' has finished!",
+                'speech': speech_message
+            }, timer_info.get("owner"))
+            
+            # Emit TTS speech for voice alert
+            print(f"🔊 Sending TTS alert: {speech_message}")
+            self._emit('final_text', {
+                'text': speech_message
+            }, timer_info.get("owner"))
+    
+    def _remove(self, timer_id):
+        """Remove a timer from every index (lock held); its heap entries go stale"""
+        timer_info = self.active_timers.pop(timer_id, None)
+        self._deadlines.pop(timer_id, None)
+        if timer_info is None:
+            return None
+        if self.journal:
+            self.journal.append({"op": "delete", "id": timer_id})
+            if self.journal.needs_compaction(len(self.active_timers)):
+                # The journal rewrites itself on its flusher thread, outside this lock
+                self.journal.request_compaction(self._journal_snapshot)
+        for index, key in ((self._names, timer_info["name"].lower()), (self._owners, timer_info.get("owner"))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(timer_id, None)
+                if not ids:
+                    del index[key]
+        return timer_info
+    
+    def _visible(self, timer_id, owner):
+        """Check a timer exists and belongs to the owner (any owner when None) (lock held)"""
+        timer_info = self.active_timers.get(timer_id)
+        return timer_info is not None and (owner is None or timer_info.get("owner") == owner)
+    
+    def find_timer(self, timer_identifier, owner: str = None):
+        """
+        Look up a timer by ID or (case-insensitive) name
         
-        # Timer finished
-        if timer_id in self.active_timers:
-            print(f"⏰ TIMER ALERT: {timer_name} ({duration_minutes} minutes) has finished!")
+        Args:
+            timer_identifier: Timer ID (int) or name (str)
+            owner: Only match timers of this owner (None matches any)
             
-            if self.socketio:
-                # Emit timer finished event
-                self.socketio.emit('timer_finished', {
-                    'timer_id': timer_id,
-                    'name': timer_name,
-                    'message': f"Timer '{timer_name}' has finished!"
-                })
-                
-                # Emit TTS speech for voice alert
-                speech_message = f"Your {timer_name} timer has finished!"
-                print(f"🔊 Sending TTS alert: {speech_message}")
-                self.socketio.emit('final_text', {
-                    'text': speech_message
-                })
+        Returns:
+            int: Timer ID, or None if no such timer exists
+        """
+        with self._lock:
+            if isinstance(timer_identifier, int):
+                return timer_identifier if self._visible(timer_identifier, owner) else None
+            if isinstance(timer_identifier, str):
+                ids = self._names.get(timer_identifier.lower(), ())
+                return next((timer_id for timer_id in ids if self._visible(timer_id, owner)), None)
+            return None
     
-    def delete_timer(self, timer_identifier):
+    def delete_timer(self, timer_identifier, owner: str = None):
         """
         Deletes a timer by ID or name
         
         Args:
             timer_identifier: Timer ID (int) or name (str)
+            owner: Only delete timers of this owner (None matches any)
             
         Returns:
             dict: Result message
         """
-        # Try to find timer by ID first
-        if isinstance(timer_identifier, int) and timer_identifier in self.active_timers:
-            timer_name = self.active_timers[timer_identifier]["name"]
-            del self.active_timers[timer_identifier]
-            return {"message": f"Timer '{timer_name}' deleted successfully"}
+        with self._lock:
+            timer_id = self.find_timer(timer_identifier, owner)
+            timer_info = self._remove(timer_id) if timer_id is not None else None
         
-        # Try to find timer by name
-        if isinstance(timer_identifier, str):
-            for timer_id, timer_info in list(self.active_timers.items()):
-                if timer_info["name"].lower() == timer_identifier.lower():
-                    del self.active_timers[timer_id]
-                    return {"message": f"Timer '{timer_identifier}' deleted successfully"}
+        if timer_info is None:
+            return {"error": f"Timer '{timer_identifier}' not found"}
         
-        return {"error": f"Timer '{timer_identifier}' not found"}
+        self._discard_alert(timer_info["name"])
+        self.sync_owner(timer_info.get("owner"))
+        if isinstance(timer_identifier, int):
+            return {"message": f"Timer '{timer_info['name']}' deleted successfully"}
+        return {"message": f"Timer '{timer_identifier}' deleted successfully"}
     
-    def list_timers(self):
+    def _discard_alert(self, timer_name):
+        """Drop a deleted timer's pre-rendered alert unless another timer shares the name"""
+        if not self.phrase_bank:
+            return
+        with self._lock:
+            if any(self.active_timers.get(timer_id, {}).get("name") == timer_name
+                   for timer_id in self._names.get(timer_name.lower(), ())):
+                return
+        self.phrase_bank.discard(self.alert_text(timer_name))
+    
+    def list_timers(self, owner: str = None):
         """
-        Lists all active timers with remaining time
+        Lists active timers with remaining time
+        
+        Args:
+            owner: Only list timers of this owner (None lists all)
         
         Returns:
             dict: List of active timers
         """
-        if not self.active_timers:
+        timers = self.get_active_timers_dict(owner)
+        if not timers:
             return {"message": "No active timers"}
         
         current_time = datetime.now()
         timer_list = []
         
-        for timer_id, timer_info in list(self.active_timers.items()):
+        for timer_id, timer_info in list(timers.items()):
             remaining_time = timer_info["end_time"] - current_time
             if remaining_time.total_seconds() > 0:
                 remaining_minutes = int(remaining_time.total_seconds() / 60)
@@ -144,17 +478,31 @@ class TimerManager:
                 timer_list.append({
                     "id": timer_id,
                     "name": timer_info["name"],
-                    "remaining": f"{remaining_minutes}m {remaining_seconds}s"
+                    "remaining": f"{remaining_minutes}m {remaining_seconds}s",
+                    "remaining_ms": int(remaining_time.total_seconds() * 1000)
                 })
             else:
                 # Timer has finished, remove it
-                del self.active_timers[timer_id]
+                with self._lock:
+                    self._remove(timer_id)
         
         return {"timers": timer_list}
     
-    def get_active_timers_dict(self):
-        """Returns the active timers dictionary"""
-        return self.active_timers
+    def get_active_timers_dict(self, owner: str = None):
+        """
+        Returns the active timers dictionary
+        
+        Args:
+            owner: Only include timers of this owner (a snapshot); None returns all
+        """
+        if owner is None:
+            return self.active_timers
+        with self._lock:
+            return {
+                timer_id: self.active_timers[timer_id]
+                for timer_id in self._owners.get(owner, ())
+                if timer_id in self.active_timers
+            }
 
 
 # Global timer manager instance
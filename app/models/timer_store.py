@@ -0,0 +1,192 @@
+"""
+Durable timer journal for Kitchen Assistant
+Append-only JSON-lines log of timer creations and removals
+Writes are batched: a background flusher appends every pending record and
+fsyncs once per batch, so creating a timer never waits on the disk.
+On startup the journal is replayed into the surviving timers and compacted;
+later compactions are requested by the timer manager and run on the flusher.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Dict, Any, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TimerJournal:
+    """
+    Append-only, fsync-batched timer journal
+    Records are {"op": "create", ...timer fields} or {"op": "delete", "id": ...}.
+    """
+
+    FILE_NAME = 'timers.jsonl'
+    COMPACT_MIN_RECORDS = 1000   # Never compact smaller journals
+
+    def __init__(self, directory: str, flush_interval: float = 0.05):
+        """
+        Initialize the journal (the flusher thread starts on first append)
+
+        Args:
+            directory: Directory holding the journal file
+            flush_interval: Longest time a record waits before it is written and fsynced
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = None
+        self._records = 0   # Records in the file, for compaction decisions
+        self._compact_snapshot = None   # Requested compaction's live-records callable
+
+        # Statistics
+        self.appended = 0
+        self.batches = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, record: Dict[str, Any]):
+        """
+        Queue a record for the next batch
+
+        Args:
+            record: JSON-serializable journal record
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._pending.append(record)
+            self.appended += 1
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name='timer-journal', daemon=True)
+                self._flusher.start()
+        self._wakeup.set()
+
+    def _run_flusher(self):
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Let a burst of appends pile up into a single write + fsync
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+                with self._lock:
+                    snapshot, self._compact_snapshot = self._compact_snapshot, None
+                if snapshot is not None:
+                    self.compact(snapshot)
+            except Exception as e:
+                logger.error(f"Timer journal flush failed: {e}")
+
+    def flush(self):
+        """Write and fsync every pending record"""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch)
+            with open(self.path, 'a', encoding='utf-8') as journal_file:
+                journal_file.write(data)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            self._records += len(batch)
+            self.batches += 1
+
+    def load(self) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Replay the journal
+
+        Returns:
+            tuple: (live create records in creation order, highest timer ID ever written)
+        """
+        live = {}
+        max_id = 0
+        records = 0
+        if not os.path.exists(self.path):
+            return [], 0
+
+        with open(self.path, 'r', encoding='utf-8') as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash: everything before it is intact
+                    logger.warning("Ignoring corrupt timer journal line")
+                    continue
+                records += 1
+                timer_id = record.get('id')
+                if record.get('op') == 'create':
+                    live[timer_id] = record
+                    max_id = max(max_id, timer_id)
+                else:
+                    live.pop(timer_id, None)
+
+        self._records = records
+        return list(live.values()), max_id
+
+    def needs_compaction(self, live_count: int) -> bool:
+        """Check whether removed timers dominate the journal"""
+        return self._records > max(self.COMPACT_MIN_RECORDS, 4 * live_count)
+
+    def request_compaction(self, snapshot: Callable[[], List[Dict[str, Any]]]):
+        """
+        Compact on the flusher thread, so callers never wait on the rewrite
+
+        Args:
+            snapshot: Returns the create records of every running timer
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._compact_snapshot = snapshot
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name='timer-journal', daemon=True)
+                self._flusher.start()
+        self._wakeup.set()
+
+    def compact(self, live_records):
+        """
+        Atomically rewrite the journal with only the live timers
+
+        Args:
+            live_records: Create records of every running timer, or a callable
+                returning them (taken once no batch can be written in between)
+        """
+        with self._write_lock:
+            if callable(live_records):
+                live_records = live_records()
+            with self._lock:
+                batch, self._pending = self._pending, []
+            # Pending records were written after the snapshot was taken, so they follow it
+            records = list(live_records) + batch
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as journal_file:
+                journal_file.write(''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records))
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(temp_path, self.path)
+            self._records = len(records)
+            self.batches += 1
+
+    def close(self):
+        """Flush pending records and stop the flusher"""
+        self.flush()
+        self._closed = True
+        self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return journal statistics"""
+        with self._lock:
+            return {
+                'path': self.path,
+                'records': self._records,
+                'pending': len(self._pending),
+                'appended': self.appended,
+                'batches': self.batches
+            }
@@ -2,9 +2,29 @@
 User Model for Flask-Login
 Handles user authentication and session management
 """
+import copy
+import os
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.models.database import db
+from app.models import user_stats
+from app.utils.cache import TTLCache
+
+# User documents for Flask-Login's per-request load_user, so authenticated
+# requests and socket events don't each cost a MongoDB find_one. Entries are
+# dropped on every write to the user; other workers see changes within the TTL.
+_user_cache = TTLCache(
+    ttl_seconds=float(os.getenv('USER_CACHE_TTL', 60)),
+    max_entries=1024
+)
+
+
+def get_user_cache_stats():
+    """Return hit/miss statistics for the user cache (misses are MongoDB reads)"""
+    stats = _user_cache.stats()
+    lookups = stats['hits'] + stats['misses']
+    stats['mongo_reads_per_load'] = round(stats['misses'] / lookups, 4) if lookups else 0.0
+    return stats
 
 
 class User(UserMixin):
@@ -72,6 +92,25 @@ class User(UserMixin):
         return None
     
     
+    @staticmethod
+    def load(user_id):
+        """Get user by ID through the user cache (for Flask-Login's user_loader)"""
+        user_data = _user_cache.get(user_id)
+        if user_data is None:
+            user_data = db.get_user_by_id(user_id)
+            if not user_data:
+                return None
+            _user_cache.set(user_id, user_data)
+        # Each request gets its own copy; nothing a request changes leaks into the cache
+        return User(copy.deepcopy(user_data))
+    
+    
+    @staticmethod
+    def invalidate_cache(user_id):
+        """Drop a cached user after a write (preferences, login, password, logout)"""
+        _user_cache.invalidate(str(user_id))
+    
+    
     def check_password(self, password):
         """Check if password is correct"""
         return check_password_hash(self.password_hash, password)
@@ -79,18 +118,22 @@ class User(UserMixin):
     
     def update_last_login(self):
         """Update last login timestamp"""
-        return db.update_last_login(self.id)
+        result = db.update_last_login(self.id)
+        User.invalidate_cache(self.id)
+        return result
     
     
     def update_preferences(self, preferences):
         """Update user preferences"""
         self.preferences = preferences
-        return db.update_user_preferences(self.id, preferences)
+        result = db.update_user_preferences(self.id, preferences)
+        User.invalidate_cache(self.id)
+        return result
     
     
-    def get_conversations(self, limit=50):
-        """Get user's conversation history"""
-        return db.get_user_conversations(self.id, limit)
+    def get_conversations(self, limit=50, before=None, fields=None):
+        """Get user's conversation history (one page, newest first)"""
+        return db.get_user_conversations(self.id, limit, before, fields)
     
     
     def get_sessions(self):
@@ -99,60 +142,25 @@ class User(UserMixin):
     
     
     def get_statistics(self):
-        """Get user statistics for profile page"""
+        """Get user statistics for profile page (from the incrementally maintained stats document)"""
         try:
-            # Get all conversations
-            conversations = db.get_user_conversations(self.id, limit=1000)
-            
-            # Count messages
-            total_messages = len(conversations)
-            user_questions = sum(1 for conv in conversations if conv.get('type') == 'user')
-            ai_responses = sum(1 for conv in conversations if conv.get('type') == 'assistant')
-            
-            # Calculate recipes cooked (conversations about cooking)
-            recipes_keywords = ['recipe', 'cook', 'prepare', 'make', 'bake']
-            recipe_conversations = [conv for conv in conversations 
-                                  if conv.get('type') == 'user' and 
-                                  any(keyword in conv.get('content', '').lower() for keyword in recipes_keywords)]
-            recipes_cooked = len(recipe_conversations)
+            from datetime import datetime
+            stats = db.get_user_stats(self.id) or {}
             
-            # Calculate voice commands (if tracked)
-            voice_commands = sum(1 for conv in conversations if conv.get('voice_enabled', False))
+            total_messages = stats.get('total_messages', 0)
+            user_questions = stats.get('user_questions', 0)
+            ai_responses = stats.get('ai_responses', 0)
+            recipes_cooked = stats.get('recipes_cooked', 0)
+            voice_commands = stats.get('voice_commands', 0)
             
             # Calculate perfect scores (5-star ratings or successful completions)
             perfect_scores = 0  # Can be enhanced when rating system is implemented
             
-            # Calculate streak (days of consecutive usage)
-            from datetime import datetime, timedelta
-            dates = []
-            for conv in conversations:
-                timestamp = conv.get('timestamp')
-                if timestamp:
-                    # Handle different timestamp formats
-                    if isinstance(timestamp, str):
-                        try:
-                            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                        except:
-                            continue
-                    if hasattr(timestamp, 'date'):
-                        dates.append(timestamp.date())
-            
-            dates = sorted(set(dates))
-            current_streak = 0
-            if dates:
-                current_date = datetime.now().date()
-                # Check if user was active today or yesterday (to maintain streak)
-                if dates and (current_date - dates[-1]).days <= 1:
-                    current_streak = 1
-                    # Count consecutive days backward
-                    for i in range(len(dates) - 2, -1, -1):
-                        if (dates[i + 1] - dates[i]).days == 1:
-                            current_streak += 1
-                        else:
-                            break
+            # Days of consecutive usage, counted only if active today or yesterday
+            current_streak = user_stats.current_streak(stats)
             
             # Calculate total cooking hours (estimated from conversation length)
-            cooking_hours = len(conversations) * 0.5  # Rough estimate: 30 min per conversation
+            cooking_hours = total_messages * 0.5  # Rough estimate: 30 min per conversation
             
             # Calculate current level based on activity
             total_xp = (recipes_cooked * 50) + (voice_commands * 10) + (perfect_scores * 100)
@@ -160,11 +168,11 @@ class User(UserMixin):
             max_xp_for_level = (current_level + 1) * 100
             current_xp = total_xp % 100
             
-            # Extract cuisine distribution from conversations
-            cuisine_distribution = self._extract_cuisine_distribution(conversations)
+            # Cuisine histogram, most mentioned first
+            cuisine_distribution = dict(sorted(stats.get('cuisines', {}).items(), key=lambda x: x[1], reverse=True))
             
-            # Get recent activity
-            recent_activity = self._get_recent_activity(conversations[:10])
+            # Get recent activity (stored oldest first)
+            recent_activity = self._get_recent_activity(list(reversed(stats.get('recent', []))))
             
             # Get achievements with details
             achievements = self._get_achievement_details(recipes_cooked, voice_commands, perfect_scores, current_streak)
@@ -216,31 +224,6 @@ class User(UserMixin):
             }
     
     
-    def _extract_cuisine_distribution(self, conversations):
-        """Extract cuisine types from conversation content"""
-        cuisines = {
-            'Italian': ['italian', 'pasta', 'pizza', 'risotto', 'lasagna', 'spaghetti'],
-            'Indian': ['indian', 'curry', 'biryani', 'tandoori', 'masala', 'naan'],
-            'Chinese': ['chinese', 'stir fry', 'wok', 'dumpling', 'fried rice', 'chow mein'],
-            'Mexican': ['mexican', 'taco', 'burrito', 'quesadilla', 'enchilada', 'salsa'],
-            'Japanese': ['japanese', 'sushi', 'ramen', 'tempura', 'teriyaki', 'miso'],
-            'American': ['american', 'burger', 'bbq', 'steak', 'sandwich', 'pancake'],
-            'French': ['french', 'croissant', 'souffle', 'quiche', 'crepe', 'baguette'],
-            'Thai': ['thai', 'pad thai', 'curry', 'tom yum', 'spring roll'],
-            'Mediterranean': ['mediterranean', 'hummus', 'falafel', 'greek', 'kebab', 'pita']
-        }
-        
-        cuisine_counts = {}
-        for conv in conversations:
-            content = conv.get('content', '').lower()
-            for cuisine, keywords in cuisines.items():
-                if any(keyword in content for keyword in keywords):
-                    cuisine_counts[cuisine] = cuisine_counts.get(cuisine, 0) + 1
-        
-        # Return sorted by count
-        return dict(sorted(cuisine_counts.items(), key=lambda x: x[1], reverse=True))
-    
-    
     def _get_recent_activity(self, recent_conversations):
         """Get recent activity from conversations"""
         from datetime import datetime
@@ -269,7 +252,7 @@ class User(UserMixin):
                 icon = 'fa-microphone'
                 color = 'orange'
                 description = f"Used voice commands"
-            elif any(keyword in content.lower() for keyword in ['recipe', 'cook', 'prepare', 'make']):
+            elif user_stats.RECIPE in user_stats.CLASSIFIER.labels(content):
                 activity_type = 'cooking'
                 icon = 'fa-utensils'
                 color = 'green'
@@ -0,0 +1,284 @@
+"""
+Incremental user statistics
+One small document per user in the user_stats collection, updated whenever
+conversation messages are written, so the profile page reads one document
+instead of scanning the user's whole history.
+"""
+from datetime import datetime, timedelta, timezone
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+# Keywords that mark a user message as cooking a recipe
+RECIPE_KEYWORDS = ['recipe', 'cook', 'prepare', 'make', 'bake']
+
+CUISINE_KEYWORDS = {
+    'Italian': ['italian', 'pasta', 'pizza', 'risotto', 'lasagna', 'spaghetti'],
+    'Indian': ['indian', 'curry', 'biryani', 'tandoori', 'masala', 'naan'],
+    'Chinese': ['chinese', 'stir fry', 'wok', 'dumpling', 'fried rice', 'chow mein'],
+    'Mexican': ['mexican', 'taco', 'burrito', 'quesadilla', 'enchilada', 'salsa'],
+    'Japanese': ['japanese', 'sushi', 'ramen', 'tempura', 'teriyaki', 'miso'],
+    'American': ['american', 'burger', 'bbq', 'steak', 'sandwich', 'pancake'],
+    'French': ['french', 'croissant', 'souffle', 'quiche', 'crepe', 'baguette'],
+    'Thai': ['thai', 'pad thai', 'curry', 'tom yum', 'spring roll'],
+    'Mediterranean': ['mediterranean', 'hummus', 'falafel', 'greek', 'kebab', 'pita']
+}
+
+# Label for RECIPE_KEYWORDS in the combined classifier
+RECIPE = 'recipe'
+
+# Every cuisine and activity keyword, matched in one pass per message
+CLASSIFIER = KeywordMatcher({**CUISINE_KEYWORDS, RECIPE: RECIPE_KEYWORDS})
+
+# Messages kept for the "recent activity" panel
+RECENT_LIMIT = 5
+
+COUNTERS = ('total_messages', 'user_questions', 'ai_responses', 'recipes_cooked', 'voice_commands')
+
+
+def day_key(timestamp):
+    """UTC calendar day of a timestamp as 'YYYY-MM-DD' (None if unparseable)"""
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(timestamp, datetime):
+        return None
+    if timestamp.tzinfo:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date().isoformat()
+
+
+def previous_day(day):
+    """The calendar day before a 'YYYY-MM-DD' key"""
+    return (datetime.fromisoformat(day) - timedelta(days=1)).date().isoformat()
+
+
+def classify_message(message):
+    """
+    Counter increments and cuisines for one conversation message
+
+    Returns:
+        tuple: ({counter: increment}, [cuisine, ...])
+    """
+    labels = CLASSIFIER.labels(message.get('content') or '')
+    role = message.get('role', message.get('type'))
+    voice = message.get('voice_enabled') or (message.get('metadata') or {}).get('voice_enabled', False)
+
+    counts = {
+        'total_messages': 1,
+        'user_questions': int(role == 'user'),
+        'ai_responses': int(role == 'assistant'),
+        'recipes_cooked': int(role == 'user' and RECIPE in labels),
+        'voice_commands': int(bool(voice)),
+    }
+    cuisines = [cuisine for cuisine in CUISINE_KEYWORDS if cuisine in labels]
+    return counts, cuisines
+
+
+def recent_entry(message):
+    """The slice of a message kept for the recent activity panel"""
+    metadata = message.get('metadata') or {}
+    return {
+        'role': message.get('role'),
+        'content': (message.get('content') or '')[:100],
+        'timestamp': message.get('timestamp'),
+        'voice_enabled': bool(message.get('voice_enabled') or metadata.get('voice_enabled', False)),
+    }
+
+
+def _add(field, amount):
+    """Aggregation expression for field + amount (missing counts as 0)"""
+    return {'$add': [{'$ifNull': [f'${field}', 0]}, amount]}
+
+
+def build_updates(messages):
+    """
+    Turn written messages into one update per (user, day)
+
+    Each update is an aggregation pipeline for update_one(upsert=True) on
+    {'user_id': ...}. Counters and the cuisine histogram are added to, the
+    recent list is appended to and trimmed, and the streak advances when the
+    day follows the last active day. Apply the updates in the returned order.
+
+    Args:
+        messages: Conversation documents, oldest first
+
+    Returns:
+        list: [(user_id, pipeline), ...]
+    """
+    groups = {}
+    for message in messages:
+        user_id = message.get('user_id')
+        day = day_key(message.get('timestamp'))
+        if not user_id or not day:
+            continue
+        group = groups.setdefault((day, user_id), {'counts': dict.fromkeys(COUNTERS, 0), 'cuisines': {}, 'recent': []})
+        counts, cuisines = classify_message(message)
+        for counter, amount in counts.items():
+            group['counts'][counter] += amount
+        for cuisine in cuisines:
+            group['cuisines'][cuisine] = group['cuisines'].get(cuisine, 0) + 1
+        group['recent'].append(recent_entry(message))
+
+    updates = []
+    for (day, user_id), group in sorted(groups.items(), key=lambda item: item[0][0]):
+        fields = {counter: _add(counter, amount) for counter, amount in group['counts'].items()}
+        fields.update({f'cuisines.{cuisine}': _add(f'cuisines.{cuisine}', amount)
+                       for cuisine, amount in group['cuisines'].items()})
+        fields.update({
+            # Every expression sees the values from before this update
+            'streak': {'$switch': {
+                'branches': [
+                    {'case': {'$gte': ['$last_active_day', day]}, 'then': '$streak'},
+                    {'case': {'$eq': ['$last_active_day', previous_day(day)]}, 'then': {'$add': ['$streak', 1]}},
+                ],
+                'default': 1
+            }},
+            'last_active_day': {'$max': ['$last_active_day', day]},
+            'recent': {'$slice': [{'$concatArrays': [{'$ifNull': ['$recent', []]}, {'$literal': group['recent']}]}, -RECENT_LIMIT]},
+            'updated_at': datetime.now(timezone.utc),
+        })
+        updates.append((user_id, [{'$set': fields}]))
+    return updates
+
+
+def rebuild_stats(user_id, messages):
+    """
+    Compute a user's stats document from their full history
+
+    Used to backfill users whose history predates the user_stats collection.
+
+    Args:
+        user_id: Owner of the messages
+        messages: Conversation documents, oldest first (any iterable, e.g. a cursor)
+
+    Returns:
+        dict: Document in the same shape build_updates maintains
+    """
+    stats = dict.fromkeys(COUNTERS, 0)
+    stats.update({'user_id': user_id, 'cuisines': {}, 'streak': 0, 'last_active_day': None, 'recent': []})
+    for message in messages:
+        counts, cuisines = classify_message(message)
+        for counter, amount in counts.items():
+            stats[counter] += amount
+        for cuisine in cuisines:
+            stats['cuisines'][cuisine] = stats['cuisines'].get(cuisine, 0) + 1
+        stats['recent'] = (stats['recent'] + [recent_entry(message)])[-RECENT_LIMIT:]
+
+        day = day_key(message.get('timestamp'))
+        if not day or (stats['last_active_day'] and stats['last_active_day'] >= day):
+            continue
+        stats['streak'] = stats['streak'] + 1 if stats['last_active_day'] == previous_day(day) else 1
+        stats['last_active_day'] = day
+    stats['updated_at'] = datetime.now(timezone.utc)
+    return stats
+
+
+# Per-label regexes for the aggregation path (same matches as CLASSIFIER)
+LABEL_PATTERNS = CLASSIFIER.label_patterns()
+
+
+def _matches(label):
+    """Aggregation expression: does the message content contain a keyword of label"""
+    return {'$regexMatch': {'input': {'$ifNull': ['$content', '']}, 'regex': LABEL_PATTERNS[label], 'options': 'i'}}
+
+
+def _count_if(condition):
+    """$group accumulator counting documents where condition holds"""
+    return {'$sum': {'$cond': [condition, 1, 0]}}
+
+
+def aggregation_pipeline(user_id, bucketed=False):
+    """
+    Aggregation that computes a user's stats inside MongoDB
+
+    $match on user_id and $sort on timestamp use the (user_id, timestamp)
+    index; the projection keeps only the fields the stats need. Only a few
+    small documents come back: role counts, one row of totals, the distinct
+    active days (newest first) and the last RECENT_LIMIT messages.
+
+    Args:
+        user_id: Owner of the conversations
+        bucketed: Run on conversation_buckets (messages are unwound first)
+
+    Returns:
+        list: Pipeline for conversations.aggregate (or conversation_buckets.aggregate)
+    """
+    is_user = {'$eq': ['$role', 'user']}
+    totals = {
+        '_id': None,
+        'recipes_cooked': _count_if({'$and': [is_user, _matches(RECIPE)]}),
+        'voice_commands': _count_if('$voice_enabled'),
+    }
+    totals.update({f'cuisine_{index}': _count_if(_matches(cuisine))
+                   for index, cuisine in enumerate(CUISINE_KEYWORDS)})
+    source = [{'$match': {'user_id': user_id}}]
+    if bucketed:
+        source += [{'$unwind': '$messages'}, {'$replaceRoot': {'newRoot': '$messages'}}]
+    return source + [
+        {'$sort': {'timestamp': -1}},
+        {'$project': {
+            '_id': 0,
+            'role': 1,
+            'content': 1,
+            'timestamp': 1,
+            'voice_enabled': {'$toBool': {'$ifNull': ['$voice_enabled', {'$ifNull': ['$metadata.voice_enabled', False]}]}},
+            'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': {
+                '$convert': {'input': '$timestamp', 'to': 'date', 'onError': None, 'onNull': None}}}},
+        }},
+        {'$facet': {
+            'roles': [{'$group': {'_id': '$role', 'count': {'$sum': 1}}}],
+            'totals': [{'$group': totals}],
+            'days': [{'$match': {'day': {'$ne': None}}}, {'$group': {'_id': '$day'}}, {'$sort': {'_id': -1}}],
+            'recent': [{'$limit': RECENT_LIMIT}, {'$project': {'day': 0}}],
+        }},
+    ]
+
+
+def from_aggregation(user_id, result):
+    """
+    Turn the aggregation_pipeline result into a stats document
+
+    Args:
+        user_id: Owner of the conversations
+        result: The single document the pipeline returns
+
+    Returns:
+        dict: Document in the same shape rebuild_stats returns
+    """
+    roles = {row['_id']: row['count'] for row in result.get('roles', [])}
+    totals = (result.get('totals') or [{}])[0]
+    days = [row['_id'] for row in result.get('days', [])]
+
+    # Streak: consecutive days ending at the most recent active day
+    streak = 1 if days else 0
+    for newer, older in zip(days, days[1:]):
+        if older != previous_day(newer):
+            break
+        streak += 1
+
+    stats = {
+        'user_id': user_id,
+        'total_messages': sum(roles.values()),
+        'user_questions': roles.get('user', 0),
+        'ai_responses': roles.get('assistant', 0),
+        'recipes_cooked': totals.get('recipes_cooked', 0),
+        'voice_commands': totals.get('voice_commands', 0),
+        'cuisines': {cuisine: totals[f'cuisine_{index}'] for index, cuisine in enumerate(CUISINE_KEYWORDS)
+                     if totals.get(f'cuisine_{index}')},
+        'streak': streak,
+        'last_active_day': days[0] if days else None,
+        'recent': [recent_entry(message) for message in reversed(result.get('recent', []))],
+        'updated_at': datetime.now(timezone.utc),
+    }
+    return stats
+
+
+def current_streak(stats, today=None):
+    """Streak as of today: it only counts if the user was active today or yesterday"""
+    today = today or datetime.now(timezone.utc).date().isoformat()
+    last_active = stats.get('last_active_day')
+    if last_active in (today, previous_day(today)):
+        return stats.get('streak', 0)
+    return 0
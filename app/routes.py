@@ -4,10 +4,13 @@ Handles all HTTP and WebSocket events for the Kitchen Assistant AI
 """
 
 import base64
+import hmac
+import secrets
+import threading
 import uuid
 from datetime import datetime
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
-from flask_socketio import emit
+from flask_socketio import emit, join_room, leave_room
 from flask_login import login_required, current_user
 
 # Import services
@@ -22,14 +25,129 @@ from app.services.recipe_service import (
     recipe_substitution
 )
 from app.services.tts_service import init_tts_service, get_tts_service
+from app.services.tts_scheduler import Priority
+from app.services.audio_codec import negotiate_format, encoded_cache_stats
 
 # Import models
 from app.models.timer_model import timer_manager
+from app.models.database import db
+from app.models.user_model import get_user_cache_stats
 
 # Global state (will be moved to proper session management later)
 conversation_history = {}
 youtube_results = {}
 
+# Audio transport negotiated per Socket.IO connection (sid -> capabilities)
+client_audio_capabilities = {}
+
+# Timer owner room joined by each Socket.IO connection (sid -> room)
+client_owner_rooms = {}
+
+# Secret issued with each new session (session_id -> token); a guest only
+# rejoins a restored session's timer room by presenting it
+session_tokens = {}
+
+# Bandwidth accounting for spoken replies (binary vs base64 transport)
+audio_transport_stats = {
+    'binary_replies': 0,
+    'base64_replies': 0,
+    'source_bytes': 0,
+    'audio_bytes': 0,
+    'wire_bytes': 0,
+    'bytes_saved': 0
+}
+_audio_stats_lock = threading.Lock()
+
+
+def owner_room_for(user_id=None, session_id=None):
+    """
+    Get the Socket.IO room that owns a client's timers
+    
+    Logged-in users share one room across all their devices; guests get
+    a room per conversation session.
+    
+    Args:
+        user_id: Authenticated user ID, if any
+        session_id: Conversation session ID
+        
+    Returns:
+        str: Room name
+    """
+    if user_id:
+        return f"user:{user_id}"
+    return f"session:{session_id}"
+
+
+def get_owner_room(sid):
+    """Get the timer owner room of a connection (None if it never connected)"""
+    return client_owner_rooms.get(sid)
+
+
+def join_owner_room(sid, room):
+    """Move a connection into its timer owner room"""
+    previous = client_owner_rooms.get(sid)
+    if previous == room:
+        return
+    if previous:
+        leave_room(previous)
+    join_room(room)
+    client_owner_rooms[sid] = room
+
+
+def owns_session(session_id, token):
+    """Check a client presented the token issued when the session was created"""
+    expected = session_tokens.get(session_id)
+    return bool(expected and token) and hmac.compare_digest(expected, str(token))
+
+
+def get_audio_capabilities(sid):
+    """Get the audio capabilities a client announced (empty for old clients)"""
+    return client_audio_capabilities.get(sid, {})
+
+
+def build_audio_payload(result, binary=False):
+    """
+    Build the Socket.IO payload for a synthesized audio result
+    
+    Binary payloads carry raw bytes as a Socket.IO attachment; the
+    base64 payload is kept for clients that never negotiated binary.
+    
+    Args:
+        result: Result dictionary from TTSService
+        binary: Send raw bytes instead of base64 text
+        
+    Returns:
+        dict: Event payload
+    """
+    if binary:
+        return {'audio': result['audio_bytes'], 'mime': result['mime_type']}
+    return {'audio_b64': result['audio_base64'], 'mime': result['mime_type']}
+
+
+def record_audio_transport(audio_size, binary=False, source_size=None):
+    """
+    Record bandwidth for one spoken reply (or chunk)
+    
+    Args:
+        audio_size: Size of the encoded audio in bytes
+        binary: Whether the audio was sent as a binary attachment
+        source_size: Size of the backend WAV before encoding (defaults to audio_size)
+        
+    Returns:
+        int: Bytes saved compared to base64 transport
+    """
+    base64_size = 4 * ((audio_size + 2) // 3)
+    wire_size = audio_size if binary else base64_size
+    saved = base64_size - wire_size
+    
+    with _audio_stats_lock:
+        audio_transport_stats['binary_replies' if binary else 'base64_replies'] += 1
+        audio_transport_stats['source_bytes'] += source_size or audio_size
+        audio_transport_stats['audio_bytes'] += audio_size
+        audio_transport_stats['wire_bytes'] += wire_size
+        audio_transport_stats['bytes_saved'] += saved
+    return saved
+
 # Blueprint for HTTP routes
 main_bp = Blueprint('main', __name__)
 
@@ -69,9 +187,12 @@ def recipe_detail(recipe_id):
 def video_detail(video_id):
     """Render the YouTube video detail page with ingredients and summary"""
     # Get video details from YouTube service
+    from flask import current_app
     from app.services.youtube_service import get_video_details
     
-    result = get_video_details(video_id)
+    # In lazy mode related videos are fetched by the page via /api/video/<id>/related
+    lazy_related = current_app.config.get('YOUTUBE_LAZY_RELATED', False)
+    result = get_video_details(video_id, include_related=not lazy_related)
     
     if result.get('success') and result.get('video'):
         video = result['video']
@@ -88,6 +209,34 @@ def profile():
     return render_template('profile.html')
 
 
+@main_bp.route('/api/tts/stats', methods=['GET'])
+@login_required
+def tts_stats():
+    """Report TTS statistics (cache, phrase bank, scheduler, backends, codec, transport)"""
+    with _audio_stats_lock:
+        transport = dict(audio_transport_stats)
+    return jsonify({
+        "success": True,
+        "cache": get_tts_service().get_cache_stats(),
+        "phrase_bank": get_tts_service().get_phrase_bank_stats(),
+        "scheduler": get_tts_service().get_scheduler_stats(),
+        "backends": get_tts_service().get_backend_stats(),
+        "codec": encoded_cache_stats(),
+        "transport": transport
+    }), 200
+
+
+@main_bp.route('/api/db/stats', methods=['GET'])
+@login_required
+def db_stats():
+    """Report database-side cache and write buffer statistics"""
+    return jsonify({
+        "success": True,
+        "user_cache": get_user_cache_stats(),
+        "write_buffer": db.get_write_stats()
+    }), 200
+
+
 def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_call):
     """
     Initialize all routes with required dependencies
@@ -110,7 +259,8 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
     def handle_connect():
         """Handle client connection - create new session"""
         session_id = str(uuid.uuid4())[:8]  # Short unique ID
-        emit('session_id', {'session_id': session_id})
+        session_tokens[session_id] = secrets.token_urlsafe(16)
+        emit('session_id', {'session_id': session_id, 'session_token': session_tokens[session_id]})
         
         # Initialize session if it doesn't exist
         if session_id not in conversation_history:
@@ -118,9 +268,15 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
         if session_id not in youtube_results:
             youtube_results[session_id] = []
         
+        # Timer events go to the owner's room only (all of a user's devices)
+        user_id = current_user.id if current_user.is_authenticated else None
+        owner = owner_room_for(user_id, session_id)
+        join_owner_room(request.sid, owner)
+        # Alerts of timers that ran out while the server was restarting
+        timer_manager.deliver_pending(owner)
+        
         # Create MongoDB session if user is logged in
         try:
-            from flask_login import current_user
             from app.models.database import db
             
             if current_user.is_authenticated:
@@ -154,6 +310,14 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
         if session_id not in youtube_results:
             youtube_results[session_id] = []
         
+        # Guests keep their timers when they come back to a session they created
+        if not current_user.is_authenticated:
+            if owns_session(session_id, data.get('session_token')):
+                join_owner_room(request.sid, owner_room_for(session_id=session_id))
+                timer_manager.deliver_pending(owner_room_for(session_id=session_id))
+            else:
+                print(f'⚠️ Not rejoining timers of session {session_id}: session token missing or wrong')
+        
         # Send confirmation
         emit('session_restored', {
             'session_id': session_id,
@@ -166,16 +330,40 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
         """Handle client disconnection"""
         # Note: We keep session data in memory for session persistence
         # In production, implement proper cleanup after timeout
+        client_audio_capabilities.pop(request.sid, None)
+        client_owner_rooms.pop(request.sid, None)
         print(f'❌ Client disconnected (session data retained)')
     
     
+    @socketio.on('audio_capabilities')
+    def handle_audio_capabilities(data):
+        """
+        Record how this connection wants to receive audio
+        
+        Clients that never send this event keep getting base64 WAV audio.
+        
+        Args:
+            data: Dictionary with capability flags (binary) and the audio
+                formats the client can play, most preferred first (formats)
+        """
+        data = data or {}
+        capabilities = {
+            'binary': bool(data.get('binary')),
+            'format': negotiate_format(data.get('formats'))
+        }
+        client_audio_capabilities[request.sid] = capabilities
+        print(f"🎧 Audio capabilities for {request.sid}: {capabilities}")
+        emit('audio_capabilities_ack', capabilities)
+    
+    
     @socketio.on('generate_tts')
     def handle_generate_tts(data):
         """
         Generate TTS audio from text using centralized TTS service
         
         Args:
-            data: Dictionary containing text to convert
+            data: Dictionary containing text to convert and an optional
+                priority ('alert', 'reply' or 'prefetch'; defaults to 'reply')
         """
         text = data.get('text', '')
         
@@ -186,20 +374,22 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
         print(f"🔊 TTS Request: '{text[:50]}...'")
         
         try:
+            capabilities = get_audio_capabilities(request.sid)
+            binary = capabilities.get('binary', False)
+            
             # Use centralized TTS service
             tts_service = get_tts_service()
             result = tts_service.generate_speech(
                 text=text,
-                return_format='base64'
+                return_format='bytes' if binary else 'base64',
+                audio_format=capabilities.get('format'),
+                priority=Priority.NAMES.get(data.get('priority'), Priority.REPLY)
             )
             
             if result['success']:
-                audio_b64 = result['audio_base64']
                 print(f"✅ TTS generated, sending to client")
-                emit('ai_audio_base64', {
-                    'audio_b64': audio_b64,
-                    'mime': result['mime_type']
-                })
+                emit('ai_audio' if binary else 'ai_audio_base64', build_audio_payload(result, binary))
+                record_audio_transport(result['audio_size'], binary, result.get('source_size'))
             else:
                 print(f"❌ TTS generation failed: {result.get('error')}")
                 emit('error', {'message': f"TTS Error: {result.get('error')}"})
@@ -215,8 +405,10 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
     def handle_get_timers():
         """Send current active timers to the client"""
         try:
+            owner = get_owner_room(request.sid)
+            timer_manager.deliver_pending(owner)
             active_timers_list = []
-            for timer_id, timer_info in list(timer_manager.active_timers.items()):
+            for timer_id, timer_info in list(timer_manager.get_active_timers_dict(owner).items()):
                 remaining_time = timer_info['end_time'] - datetime.now()
                 if remaining_time.total_seconds() > 0:
                     remaining_minutes = int(remaining_time.total_seconds() / 60)
@@ -225,11 +417,12 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
                         'id': timer_id,
                         'name': timer_info['name'],
                         'duration_minutes': timer_info['duration_minutes'],
-                        'remaining': f"{remaining_minutes:02d}:{remaining_seconds:02d}"
+                        'remaining': f"{remaining_minutes:02d}:{remaining_seconds:02d}",
+                        'remaining_ms': int(remaining_time.total_seconds() * 1000)
                     })
                 else:
                     # Timer finished, remove it
-                    timer_manager.delete_timer(timer_id)
+                    timer_manager.delete_timer(timer_id, owner)
             
             print(f"📱 Sending timers list: {active_timers_list}")
             emit('timers_list', {'timers': active_timers_list})
@@ -249,7 +442,7 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
                 return
             
             print(f"🗑️ Deleting timer via socket: {timer_id}")
-            result = timer_manager.delete_timer(timer_id)
+            result = timer_manager.delete_timer(timer_id, get_owner_room(request.sid))
             
             if 'error' in result:
                 print(f"❌ Delete failed: {result['error']}")
@@ -343,22 +536,20 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
             from app.models.database import db
             
             if current_user.is_authenticated:
-                # Save user message
-                db.save_conversation(
+                # Queued for the write-behind flusher so the reply never waits on MongoDB
+                db.queue_conversation(
                     user_id=current_user.id,
                     session_id=session_id,
                     message={"role": "user", "content": command}
                 )
-                
-                # Save assistant response
-                db.save_conversation(
+                db.queue_conversation(
                     user_id=current_user.id,
                     session_id=session_id,
                     message={"role": "assistant", "content": final_text_for_speech}
                 )
                 
                 # Update session activity
-                db.update_session_activity(session_id)
+                db.touch_session(session_id)
         except Exception as e:
             print(f"⚠️ Failed to save conversation to MongoDB: {e}")
         
@@ -366,8 +557,9 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
         if len(conversation_history[session_id]) > 12:
             conversation_history[session_id] = conversation_history[session_id][-12:]
         
-        # Generate and send TTS audio
-        generate_tts_audio(final_text_for_speech, app.a4f_client, socketio)
+        # Generate and send TTS audio (sentence chunks when the client can stream them)
+        stream_audio = bool(data.get('stream_audio')) and app.config.get('TTS_CHUNKED_STREAMING', False)
+        generate_tts_audio(final_text_for_speech, app.a4f_client, socketio, stream=stream_audio)
     
     
     def handle_tool_call(tool_call, session_id, youtube_results, socketio):
@@ -484,7 +676,7 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
         """Handle timer creation"""
         duration = parameters.get("duration_minutes", 5)
         timer_name = parameters.get("timer_name", "")
-        result = timer_manager.create_timer(duration, timer_name)
+        result = timer_manager.create_timer(duration, timer_name, owner=get_owner_room(request.sid))
         timer_info = result.get("timer")
         
         # Convert datetime objects to strings for JSON serialization
@@ -495,7 +687,8 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
                 "duration_minutes": timer_info["duration_minutes"],
                 "end_time": timer_info["end_time"].strftime("%H:%M:%S") if timer_info.get("end_time") else "",
                 "created_at": timer_info["created_at"].strftime("%H:%M:%S") if timer_info.get("created_at") else "",
-                "remaining_time": f"{duration} minutes"
+                "remaining_time": f"{duration} minutes",
+                "remaining_ms": int(duration * 60000)
             }
         else:
             timer_info_serializable = None
@@ -519,7 +712,7 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
     def handle_delete_timer(parameters, socketio):
         """Handle timer deletion"""
         timer_id = parameters.get("timer_identifier")
-        result = timer_manager.delete_timer(timer_id)
+        result = timer_manager.delete_timer(timer_id, get_owner_room(request.sid))
         emit('timer_deleted', result)
         
         # Send updated timers list after deletion
@@ -528,8 +721,8 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
     
     
     def handle_list_timers(socketio):
-        """Handle listing all timers"""
-        result = timer_manager.list_timers()
+        """Handle listing the client's timers"""
+        result = timer_manager.list_timers(get_owner_room(request.sid))
         
         # Convert datetime objects to strings
         if result.get("timers"):
@@ -540,6 +733,7 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
                     "id": timer["id"],
                     "name": timer["name"],
                     "remaining": timer["remaining"],
+                    "remaining_ms": timer["remaining_ms"],
                     "duration_minutes": timer_info.get("duration_minutes", 0),
                     "end_time": timer_info.get("end_time").strftime("%H:%M:%S") if timer_info.get("end_time") else "",
                     "created_at": timer_info.get("created_at").strftime("%H:%M:%S") if timer_info.get("created_at") else ""
@@ -557,8 +751,9 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
     
     
     def emit_updated_timers_list(socketio):
-        """Helper function to emit updated timers list"""
-        updated_timers = timer_manager.list_timers()
+        """Helper function to emit the updated timers list to all of the owner's devices"""
+        owner = get_owner_room(request.sid)
+        updated_timers = timer_manager.list_timers(owner)
         if updated_timers.get("timers"):
             serializable_timers = []
             for timer in updated_timers["timers"]:
@@ -567,6 +762,7 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
                     "id": timer["id"],
                     "name": timer["name"],
                     "remaining": timer["remaining"],
+                    "remaining_ms": timer["remaining_ms"],
                     "duration_minutes": timer_info_data.get("duration_minutes", 0),
                     "end_time": timer_info_data.get("end_time", "").strftime("%H:%M:%S") if timer_info_data.get("end_time") else "",
                     "created_at": timer_info_data.get("created_at", "").strftime("%H:%M:%S") if timer_info_data.get("created_at") else ""
@@ -574,7 +770,10 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
             updated_timers["timers"] = serializable_timers
         
         print(f"📡 Emitting timers_list event: {updated_timers}")
-        emit('timers_list', updated_timers)
+        if owner:
+            socketio.emit('timers_list', updated_timers, to=owner)
+        else:
+            emit('timers_list', updated_timers)
     
     
     def handle_convert_units(parameters, socketio):
@@ -736,7 +935,7 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
             return "Sorry, I had trouble getting the recipe details."
     
     
-    def generate_tts_audio(text, a4f_client, socketio):
+    def generate_tts_audio(text, a4f_client, socketio, stream=False):
         """
         Generate TTS audio using centralized TTS service
         
@@ -744,28 +943,58 @@ def init_routes(app, socketio, a4f_client, get_ai_response_text, extract_tool_ca
             text: Text to convert to speech
             a4f_client: A4F TTS client instance (for compatibility)
             socketio: SocketIO instance for emitting audio
+            stream: Send sentence chunks via ai_audio_chunk as they are ready
         """
         print(f"🔊 TTS Request: '{text[:50]}...' (length: {len(text) if text else 0})")
         
         if text and isinstance(text, str) and len(text.strip()) > 0:
             try:
+                tts_service = get_tts_service()
+                capabilities = get_audio_capabilities(request.sid)
+                binary = capabilities.get('binary', False)
+                return_format = 'bytes' if binary else 'base64'
+                audio_format = capabilities.get('format')
+                
+                if stream:
+                    print(f"🎙️ Generating chunked TTS audio using centralized service...")
+                    
+                    def send_chunk(chunk):
+                        position = {
+                            'index': chunk.get('chunk_index', 0),
+                            'total': chunk.get('chunk_count', 1),
+                            'final': chunk.get('chunk_index', 0) == chunk.get('chunk_count', 1) - 1
+                        }
+                        if chunk['success']:
+                            emit('ai_audio_chunk', {**build_audio_payload(chunk, binary), **position})
+                            record_audio_transport(chunk['audio_size'], binary, chunk.get('source_size'))
+                        else:
+                            print(f"❌ TTS chunk {position['index']} failed: {chunk.get('error')}")
+                            emit('ai_audio_chunk', {**position, 'error': 'Failed to generate speech'})
+                    
+                    chunks = tts_service.generate_speech_chunks(
+                        text=text,
+                        return_format=return_format,
+                        audio_format=audio_format,
+                        on_chunk=send_chunk
+                    )
+                    print(f"📤 TTS audio streamed to client in {len(chunks)} chunk(s) ({'binary' if binary else 'base64'})")
+                    return
+                
                 print(f"🎙️ Generating TTS audio using centralized service...")
                 
                 # Use centralized TTS service
-                tts_service = get_tts_service()
                 result = tts_service.generate_speech(
                     text=text,
-                    return_format='base64'
+                    return_format=return_format,
+                    audio_format=audio_format
                 )
                 
                 if result['success']:
-                    audio_b64 = result['audio_base64']
-                    print(f"✅ TTS generated, size: {len(audio_b64)} bytes (base64)")
-                    emit('ai_audio_base64', {
-                        'audio_b64': audio_b64,
-                        'mime': result['mime_type']
-                    })
-                    print(f"📤 TTS audio sent to client")
+                    emit('ai_audio' if binary else 'ai_audio_base64', build_audio_payload(result, binary))
+                    saved = record_audio_transport(result['audio_size'], binary, result.get('source_size'))
+                    print(f"📤 TTS audio sent to client: {result['audio_size']} bytes {result.get('audio_format', 'wav')} "
+                          f"(from {result.get('source_size', result['audio_size'])} bytes WAV, "
+                          f"{'binary' if binary else 'base64'}, {saved} bytes saved vs base64)")
                 else:
                     print(f"❌ TTS generation failed: {result.get('error')}")
                     emit('error', {'message': 'Failed to generate speech'})
@@ -838,6 +1067,21 @@ def save_favorite_video():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@main_bp.route('/api/video/<video_id>/related', methods=['GET'])
+@login_required
+def get_related_videos_api(video_id):
+    """Get related videos for a video page (loaded after the page renders)"""
+    from app.services.youtube_service import get_related_videos
+    
+    try:
+        videos = get_related_videos(video_id)
+        return jsonify({"success": True, "videos": videos}), 200
+        
+    except Exception as e:
+        print(f"Error getting related videos: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @main_bp.route('/api/video/notes', methods=['POST'])
 @login_required
 def save_video_notes():
@@ -997,6 +1241,7 @@ def add_favorite_recipe():
     """Add a recipe to user's favorites"""
     from app.models.database import db
     from flask_login import current_user
+    from pymongo.errors import DuplicateKeyError
     
     try:
         data = request.json
@@ -1012,26 +1257,27 @@ def add_favorite_recipe():
         # Get MongoDB collection
         favorites_collection = db.db['favorites']
         
-        # Check if already favorited
-        existing = favorites_collection.find_one({
-            'user_id': current_user.id,
-            'recipe_id': str(recipe_id)
-        })
+        # Add to favorites unless already there (one round trip, backed by the unique index)
+        try:
+            result = favorites_collection.update_one(
+                {'user_id': current_user.id, 'recipe_id': str(recipe_id)},
+                {'$setOnInsert': {
+                    'recipe_title': recipe_title,
+                    'recipe_image': recipe_image,
+                    'recipe_source': recipe_source,
+                    'recipe_watch_url': recipe_watch_url,
+                    'created_at': datetime.now()
+                }},
+                upsert=True
+            )
+            already_favorited = result.upserted_id is None
+        except DuplicateKeyError:
+            # Lost a race with a concurrent add of the same recipe
+            already_favorited = True
         
-        if existing:
+        if already_favorited:
             return jsonify({"success": False, "message": "Recipe already in favorites"}), 409
         
-        # Add to favorites
-        favorites_collection.insert_one({
-            'user_id': current_user.id,
-            'recipe_id': str(recipe_id),
-            'recipe_title': recipe_title,
-            'recipe_image': recipe_image,
-            'recipe_source': recipe_source,
-            'recipe_watch_url': recipe_watch_url,
-            'created_at': datetime.now()
-        })
-        
         return jsonify({"success": True, "message": "Recipe added to favorites"}), 200
         
     except Exception as e:
@@ -0,0 +1,232 @@
+"""
+TTS Audio Codec
+Post-processes synthesized WAV audio into compact formats for the wire
+Speech survives downsampling, mono downmix and companding with little audible loss
+"""
+
+import io
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import wave
+import warnings
+from typing import Optional, List, Dict, Any
+
+from app.utils.cache import TTLCache
+
+with warnings.catch_warnings():
+    # audioop is deprecated (PEP 594) but still ships with Python 3.11/3.12
+    warnings.simplefilter('ignore', DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+logger = logging.getLogger(__name__)
+
+# Speech band sample rate for compact formats
+SPEECH_SAMPLE_RATE = 16000
+
+# Opus bitrate used when ffmpeg is available
+OPUS_BITRATE = '24k'
+
+# WAVE_FORMAT_MULAW tag for the fmt chunk
+WAVE_FORMAT_MULAW = 7
+
+# Supported output formats: name -> MIME type
+FORMATS = {
+    'wav': 'audio/wav',          # Untouched backend output
+    'wav-pcm16': 'audio/wav',    # 16 kHz mono 16-bit PCM
+    'wav-ulaw': 'audio/wav',     # 16 kHz mono 8-bit mu-law
+    'opus': 'audio/ogg',         # Ogg/Opus via ffmpeg
+}
+
+
+# Opus audio per (content key, format, sample rate): audio served from the TTS
+# cache or phrase bank goes through ffmpeg once, not on every play. Entries
+# are content-addressed, so they never go stale. The WAV formats are cheap to
+# redo in-process and larger to keep, so they are not cached
+_encoded_cache = TTLCache(
+    ttl_seconds=float(os.getenv('TTS_ENCODED_CACHE_TTL', 24 * 3600)),
+    max_entries=int(os.getenv('TTS_ENCODED_CACHE_ENTRIES', 512))
+)
+
+
+def encoded_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss statistics for the encoded audio cache"""
+    return _encoded_cache.stats()
+
+
+def _ffmpeg_path() -> Optional[str]:
+    """Locate the ffmpeg binary used for Opus encoding"""
+    return shutil.which('ffmpeg')
+
+
+def available_formats() -> List[str]:
+    """
+    List the output formats this server can produce
+
+    Returns:
+        list: Format names, most compact first
+    """
+    formats = []
+    if _ffmpeg_path():
+        formats.append('opus')
+    if audioop is not None:
+        formats.extend(['wav-ulaw', 'wav-pcm16'])
+    formats.append('wav')
+    return formats
+
+
+def negotiate_format(client_formats) -> str:
+    """
+    Pick the first client-preferred format the server can produce
+
+    Args:
+        client_formats: Format names in the client's order of preference
+
+    Returns:
+        str: Chosen format ('wav' when nothing else matches)
+    """
+    supported = available_formats()
+    for fmt in client_formats or []:
+        if fmt in supported:
+            return fmt
+    return 'wav'
+
+
+def mime_type_for(fmt: str) -> str:
+    """Get the MIME type for an output format"""
+    return FORMATS.get(fmt, 'audio/wav')
+
+
+def _read_pcm16_mono(wav_bytes: bytes, sample_rate: int) -> bytes:
+    """Decode WAV to 16-bit mono PCM at sample_rate"""
+    with wave.open(io.BytesIO(wav_bytes), 'rb') as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        # 8-bit WAV is unsigned
+        frames = audioop.bias(frames, 1, -128)
+    if width != 2:
+        frames = audioop.lin2lin(frames, width, 2)
+    if channels == 2:
+        frames = audioop.tomono(frames, 2, 0.5, 0.5)
+    elif channels != 1:
+        raise ValueError(f'Unsupported channel count: {channels}')
+    if rate != sample_rate:
+        frames, _ = audioop.ratecv(frames, 2, 1, rate, sample_rate, None)
+    return frames
+
+
+def _write_pcm16_wav(frames: bytes, sample_rate: int) -> bytes:
+    """Wrap 16-bit mono PCM frames in a WAV container"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+def _write_ulaw_wav(frames: bytes, sample_rate: int) -> bytes:
+    """Encode 16-bit mono PCM as a mu-law WAV (the wave module only writes PCM)"""
+    data = audioop.lin2ulaw(frames, 2)
+    fmt_chunk = struct.pack(
+        '<HHIIHHH',
+        WAVE_FORMAT_MULAW,
+        1,              # channels
+        sample_rate,
+        sample_rate,    # byte rate (1 byte per sample)
+        1,              # block align
+        8,              # bits per sample
+        0               # cbSize (required for non-PCM formats)
+    )
+    fact_chunk = struct.pack('<I', len(data))
+    body = (
+        b'WAVE'
+        + b'fmt ' + struct.pack('<I', len(fmt_chunk)) + fmt_chunk
+        + b'fact' + struct.pack('<I', len(fact_chunk)) + fact_chunk
+        + b'data' + struct.pack('<I', len(data)) + data
+    )
+    if len(data) % 2:
+        body += b'\x00'  # RIFF chunks are word aligned
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def _encode_opus(frames: bytes, sample_rate: int) -> bytes:
+    """Encode 16-bit mono PCM as Ogg/Opus through ffmpeg"""
+    ffmpeg = _ffmpeg_path()
+    if not ffmpeg:
+        raise RuntimeError('ffmpeg not available for Opus encoding')
+    completed = subprocess.run(
+        [
+            ffmpeg, '-hide_banner', '-loglevel', 'error',
+            '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+            '-c:a', 'libopus', '-b:a', OPUS_BITRATE, '-application', 'voip',
+            '-f', 'ogg', 'pipe:1'
+        ],
+        input=frames,
+        capture_output=True,
+        timeout=30,
+        check=True
+    )
+    return completed.stdout
+
+
+def transcode(
+    wav_bytes: bytes,
+    fmt: str,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    cache_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Convert backend WAV output into the requested wire format
+
+    Falls back to the original WAV if the format is unknown or the
+    conversion fails, so a spoken reply is never lost to the codec.
+
+    Args:
+        wav_bytes: WAV audio returned by the TTS backend
+        fmt: Output format name (see FORMATS)
+        sample_rate: Target sample rate for compact formats
+        cache_key: Content address of wav_bytes (AudioCache.make_key); when
+            given, Opus output is cached and reused
+
+    Returns:
+        dict: {'audio': bytes, 'format': str, 'mime_type': str}
+    """
+    original = {'audio': wav_bytes, 'format': 'wav', 'mime_type': FORMATS['wav']}
+    if not fmt or fmt == 'wav' or fmt not in FORMATS:
+        return original
+    if audioop is None:
+        logger.warning("audioop unavailable, sending uncompressed WAV")
+        return original
+
+    encoded_key = (cache_key, fmt, sample_rate) if cache_key and fmt == 'opus' else None
+    if encoded_key:
+        audio = _encoded_cache.get(encoded_key)
+        if audio is not None:
+            return {'audio': audio, 'format': fmt, 'mime_type': FORMATS[fmt]}
+
+    try:
+        frames = _read_pcm16_mono(wav_bytes, sample_rate)
+        if fmt == 'wav-pcm16':
+            audio = _write_pcm16_wav(frames, sample_rate)
+        elif fmt == 'wav-ulaw':
+            audio = _write_ulaw_wav(frames, sample_rate)
+        else:
+            audio = _encode_opus(frames, sample_rate)
+    except Exception as e:
+        logger.warning(f"Audio transcode to {fmt} failed, sending WAV: {e}")
+        return original
+
+    if encoded_key:
+        _encoded_cache.set(encoded_key, audio)
+    return {'audio': audio, 'format': fmt, 'mime_type': FORMATS[fmt]}
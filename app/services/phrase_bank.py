@@ -0,0 +1,257 @@
+"""
+TTS Phrase Bank
+Pre-synthesizes fixed and templated utterances so they play with no TTS latency
+Timer alerts are rendered when the timer is created instead of when it fires
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Any, List, Iterable
+
+from app.services.tts_cache import AudioCache
+from app.services.tts_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+# Fixed replies from app/routes.py and spoken UI confirmations from script.js
+FIXED_PHRASES = [
+    "Sorry, I'm not sure how to help with that",
+    "Sorry, I can't find that video number. Please search for recipes first.",
+    "Sorry, I had trouble searching for recipes.",
+    "Sorry, I couldn't find any recipes matching your request.",
+    "Sorry, I had trouble finding recipes with those ingredients.",
+    "Sorry, I couldn't get the recipe details.",
+    "Sorry, I had trouble getting the recipe details.",
+    "I couldn't get the time right now.",
+    "I couldn't get the date right now.",
+    "I couldn't find information about that.",
+    "I had trouble with that conversion. Could you try rephrasing it?",
+    "No active timers",
+    "Playing video",
+    "Video playing",
+    "Video paused",
+    "Video stopped",
+    "Video closed",
+    "Video muted",
+    "Video unmuted",
+    "Opening fullscreen",
+    "Closing fullscreen",
+    "Opening conversation view",
+    "Opening recipe search",
+    "Opening video search",
+    "Opening unit converter",
+    "Opening substitutions",
+    "Opening settings",
+    "Closing settings",
+]
+
+# Templated replies with a small, known set of values
+PHRASE_TEMPLATES = [
+    ("I found {n} recipes for you. Check the recipe section below!", {'n': range(1, 7)}),
+    ("I found {n} recipes you can make with those ingredients. Check the recipe section!", {'n': range(1, 7)}),
+    ("Timer set for {n} minutes", {'n': [2, 3, 4, 5, 10, 15, 20, 25, 30, 45, 60]}),
+    ("Timer set for 1 minute", {}),
+]
+
+
+def expand_templates(templates) -> List[str]:
+    """
+    Expand (template, {field: values}) pairs into concrete phrases
+
+    Args:
+        templates: Sequence of (template, values) pairs; at most one field per template
+
+    Returns:
+        list: Rendered phrases
+    """
+    phrases = []
+    for template, fields in templates:
+        if not fields:
+            phrases.append(template)
+            continue
+        (field, values), = fields.items()
+        phrases.extend(template.format(**{field: value}) for value in values)
+    return phrases
+
+
+def default_phrases() -> List[str]:
+    """Get every phrase the bank warms at startup"""
+    return FIXED_PHRASES + expand_templates(PHRASE_TEMPLATES)
+
+
+class PhraseBank:
+    """
+    In-memory store of pre-rendered speech
+    Pinned phrases (startup warm-up) live for the life of the process;
+    transient phrases (timer alerts) are bounded and evicted oldest first.
+    """
+
+    def __init__(self, tts_service, max_transient: int = 64):
+        """
+        Initialize the phrase bank
+
+        Args:
+            tts_service: TTSService used to render phrases
+            max_transient: Upper bound on transient (per-timer) phrases
+        """
+        self.tts_service = tts_service
+        self.max_transient = max_transient
+        self._pinned = {}                 # key -> audio bytes
+        self._transient = OrderedDict()   # key -> audio bytes, oldest first
+        self._pending = {}                # key -> Future
+        self._lock = threading.Lock()
+        # A single renderer keeps warm-up from competing with live replies
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='phrase-bank')
+
+        # Statistics
+        self.hits = 0
+        self.rendered = 0
+        self.failed = 0
+
+    def key_for(self, text: str) -> str:
+        """Get the lookup key for a phrase (same content address as the audio cache)"""
+        clean_text = self.tts_service._clean_text_for_tts(text)
+        return AudioCache.make_key(
+            clean_text,
+            self.tts_service.default_speaker_id,
+            self.tts_service.backend_name
+        )
+
+    def __contains__(self, key: str) -> bool:
+        """Check for a banked phrase without counting a hit"""
+        with self._lock:
+            return key in self._pinned or key in self._transient
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up pre-rendered audio
+
+        Args:
+            key: Content address from AudioCache.make_key()
+
+        Returns:
+            Audio bytes, or None if the phrase is not in the bank
+        """
+        with self._lock:
+            audio = self._pinned.get(key)
+            if audio is None:
+                audio = self._transient.get(key)
+            if audio is not None:
+                self.hits += 1
+            return audio
+
+    def prepare(self, text: str, pinned: bool = False) -> Optional[Future]:
+        """
+        Render a phrase in the background
+
+        Args:
+            text: Phrase to pre-synthesize
+            pinned: Keep for the life of the process instead of the transient pool
+
+        Returns:
+            Future for the render, or None if the phrase is already banked
+        """
+        if not text:
+            return None
+        key = self.key_for(text)
+        with self._lock:
+            if key in self._pinned:
+                return None
+            if key in self._transient:
+                self._transient.move_to_end(key)
+                return None
+            if key in self._pending:
+                return self._pending[key]
+            future = self._executor.submit(self._render, key, text, pinned)
+            self._pending[key] = future
+            return future
+
+    def _render(self, key: str, text: str, pinned: bool) -> bool:
+        """Synthesize a phrase and store its audio (runs on the bank's worker)"""
+        try:
+            result = self.tts_service.generate_speech(
+                text,
+                return_format='bytes',
+                priority=Priority.PREFETCH
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        with self._lock:
+            self._pending.pop(key, None)
+            if not result.get('success'):
+                self.failed += 1
+                logger.warning(f"Phrase bank could not render '{text[:40]}': {result.get('error')}")
+                return False
+
+            self.rendered += 1
+            if pinned:
+                self._pinned[key] = result['audio_bytes']
+            else:
+                self._transient[key] = result['audio_bytes']
+                while len(self._transient) > self.max_transient:
+                    self._transient.popitem(last=False)
+        return True
+
+    def warm(self, phrases: Iterable[str]) -> List[Future]:
+        """
+        Pre-render a set of pinned phrases in the background
+
+        Args:
+            phrases: Phrases to render
+
+        Returns:
+            list: Futures for the renders that were scheduled
+        """
+        futures = [self.prepare(phrase, pinned=True) for phrase in phrases]
+        futures = [future for future in futures if future is not None]
+        logger.info(f"Phrase bank warming {len(futures)} phrases")
+        return futures
+
+    def discard(self, text: str):
+        """Drop a transient phrase (e.g. the alert of a deleted timer)"""
+        key = self.key_for(text)
+        with self._lock:
+            self._transient.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return phrase bank statistics"""
+        with self._lock:
+            return {
+                'enabled': True,
+                'pinned': len(self._pinned),
+                'transient': len(self._transient),
+                'pending': len(self._pending),
+                'hits': self.hits,
+                'rendered': self.rendered,
+                'failed': self.failed
+            }
+
+
+# Global phrase bank instance (initialized at app startup when enabled)
+phrase_bank = None
+
+
+def get_phrase_bank() -> Optional[PhraseBank]:
+    """Get the global phrase bank (None when disabled)"""
+    return phrase_bank
+
+
+def init_phrase_bank(tts_service, phrases: Optional[Iterable[str]] = None) -> PhraseBank:
+    """
+    Create the global phrase bank, attach it to the TTS service and start warming it
+
+    Args:
+        tts_service: TTSService used to render phrases
+        phrases: Phrases to warm (defaults to default_phrases())
+
+    Returns:
+        PhraseBank: The new phrase bank
+    """
+    global phrase_bank
+    phrase_bank = PhraseBank(tts_service)
+    tts_service.phrase_bank = phrase_bank
+    phrase_bank.warm(default_phrases() if phrases is None else phrases)
+    return phrase_bank
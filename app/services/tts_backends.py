@@ -0,0 +1,256 @@
+"""
+TTS Backend Pool
+Routes synthesis across several Coqui TTS containers
+Each backend remembers which endpoint works, background probes track
+health, and requests go to the healthy backend with the lowest expected
+latency, failing over to the next one on error.
+"""
+
+import logging
+import threading
+import time
+import requests
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Coqui TTS endpoints in discovery order: (method, path, request field)
+ENDPOINTS = [
+    ("GET", "/api/tts", "params"),
+    ("POST", "/api/tts", "data"),
+    ("GET", "/tts", "params"),
+]
+
+
+class CoquiBackend:
+    """A single Coqui TTS container"""
+
+    def __init__(self, url: str):
+        """
+        Initialize a backend
+
+        Args:
+            url: Base URL of the Coqui TTS container
+        """
+        self.url = url.rstrip('/')
+        self.endpoint = None      # Index into ENDPOINTS once discovered
+        self.healthy = True
+        self.latency = None       # EWMA seconds per character synthesized
+        self.inflight = 0
+        self.failures = 0         # Consecutive failures
+        self.requests = 0
+        self.session = requests.Session()  # Keep-alive connections to this node
+
+    def synthesize(self, text: str, speaker: str, timeout: float) -> bytes:
+        """
+        Synthesize speech, trying the remembered endpoint first
+
+        Raises:
+            requests.exceptions.ConnectionError / Timeout: Node unreachable
+            Exception: No endpoint returned audio
+        """
+        order = list(range(len(ENDPOINTS)))
+        if self.endpoint is not None:
+            order.remove(self.endpoint)
+            order.insert(0, self.endpoint)
+
+        last_error = None
+        for index in order:
+            method, path, field = ENDPOINTS[index]
+            url = f"{self.url}{path}"
+            try:
+                response = self.session.request(
+                    method, url, timeout=timeout,
+                    **{field: {"text": text, "speaker_id": speaker}}
+                )
+                if response.status_code == 404:
+                    logger.warning("Coqui endpoint %s returned 404, trying fallback", url)
+                    last_error = f"404 from {url}"
+                    continue
+                response.raise_for_status()
+                if response.content:
+                    if self.endpoint != index:
+                        logger.info(f"Coqui backend {self.url} uses {method} {path}")
+                        self.endpoint = index
+                    return response.content
+                last_error = f"Empty audio response from {url}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                # Propagate to the pool for failover
+                raise
+            except Exception as e:
+                last_error = str(e)
+                logger.warning("Coqui request %s %s failed: %s", method, url, e)
+                continue
+
+        raise Exception(last_error or f"Unable to fetch audio from Coqui TTS at {self.url}")
+
+    def probe(self, timeout: float) -> bool:
+        """Check the node answers HTTP (cheap, no synthesis)"""
+        try:
+            response = self.session.get(f"{self.url}/", timeout=timeout)
+            return response.status_code < 500
+        except Exception:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this backend's routing state"""
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'endpoint': ' '.join(ENDPOINTS[self.endpoint][:2]) if self.endpoint is not None else None,
+            'latency_ms_per_char': round(self.latency * 1000, 3) if self.latency is not None else None,
+            'inflight': self.inflight,
+            'requests': self.requests,
+            'failures': self.failures
+        }
+
+
+class BackendPool:
+    """
+    Latency-weighted pool of Coqui TTS backends with failover
+    """
+
+    EWMA_ALPHA = 0.3         # Weight of the newest latency sample
+    FAILURE_THRESHOLD = 2    # Consecutive errors before a reachable node is taken out
+    PROBE_TIMEOUT = 2.0      # Seconds
+    LATENCY_PRIOR = 0.01     # Seconds per character assumed before any backend is measured
+
+    def __init__(self, urls: List[str], probe_interval: float = 10.0):
+        """
+        Initialize the pool (health probes start with start_health_checks)
+
+        Args:
+            urls: Base URLs of the Coqui TTS containers
+            probe_interval: Seconds between background health probes
+        """
+        self.backends = [CoquiBackend(url) for url in urls if url]
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._probe_thread = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self.backends)
+
+    def set_urls(self, urls: List[str]):
+        """
+        Replace the pool's backends (health checks and probe interval are kept)
+
+        Args:
+            urls: Base URLs of the Coqui TTS containers
+        """
+        backends = [CoquiBackend(url) for url in urls if url]
+        with self._lock:
+            self.backends = backends
+
+    def _score(self, backend: CoquiBackend):
+        """Expected latency of sending one more request to a backend, then its request count (lock held)"""
+        known = [b.latency for b in self.backends if b.latency is not None]
+        # Unmeasured nodes are assumed as fast as the best one so they get traffic;
+        # the prior keeps inflight load (and the request count on ties) spreading a cold burst
+        latency = backend.latency if backend.latency is not None else min(known, default=self.LATENCY_PRIOR)
+        return latency * (backend.inflight + 1), backend.requests
+
+    def _ordered(self) -> List[CoquiBackend]:
+        """Healthy backends by expected latency, unhealthy ones only as a last resort"""
+        with self._lock:
+            healthy = sorted((b for b in self.backends if b.healthy), key=self._score)
+            unhealthy = sorted((b for b in self.backends if not b.healthy), key=self._score)
+        return healthy + unhealthy
+
+    def fetch(self, text: str, speaker: str, timeout: float) -> bytes:
+        """
+        Synthesize speech on the best backend, failing over on error
+
+        Args:
+            text: Cleaned text to synthesize
+            speaker: Coqui TTS speaker ID
+            timeout: Per-request timeout in seconds
+
+        Returns:
+            Audio bytes
+
+        Raises:
+            The last backend's error if every backend failed
+        """
+        last_error = None
+        for backend in self._ordered():
+            with self._lock:
+                backend.inflight += 1
+                backend.requests += 1
+            start = time.monotonic()
+            try:
+                audio = backend.synthesize(text, speaker, timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                logger.warning(f"Coqui backend {backend.url} unreachable, failing over: {e}")
+                self._record_failure(backend, unreachable=True)
+                last_error = e
+                continue
+            except Exception as e:
+                logger.warning(f"Coqui backend {backend.url} failed, failing over: {e}")
+                self._record_failure(backend)
+                last_error = e
+                continue
+            finally:
+                with self._lock:
+                    backend.inflight -= 1
+
+            self._record_success(backend, (time.monotonic() - start) / max(len(text), 1))
+            return audio
+
+        if last_error is not None:
+            raise last_error
+        raise Exception("No Coqui TTS backends configured")
+
+    def _record_success(self, backend: CoquiBackend, latency: float):
+        with self._lock:
+            backend.failures = 0
+            backend.healthy = True
+            if backend.latency is None:
+                backend.latency = latency
+            else:
+                backend.latency = self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * backend.latency
+
+    def _record_failure(self, backend: CoquiBackend, unreachable: bool = False):
+        with self._lock:
+            backend.failures += 1
+            if unreachable or backend.failures >= self.FAILURE_THRESHOLD:
+                if backend.healthy:
+                    logger.warning(f"Coqui backend {backend.url} marked unhealthy")
+                backend.healthy = False
+
+    def probe_all(self):
+        """Probe every backend once and update its health"""
+        for backend in list(self.backends):
+            ok = backend.probe(self.PROBE_TIMEOUT)
+            with self._lock:
+                if ok and not backend.healthy:
+                    logger.info(f"Coqui backend {backend.url} is healthy again")
+                    backend.healthy = True
+                    backend.failures = 0
+                elif not ok and backend.healthy:
+                    logger.warning(f"Coqui backend {backend.url} failed health probe")
+                    backend.healthy = False
+
+    def start_health_checks(self):
+        """Start the background health probe thread"""
+        if self._probe_thread or self.probe_interval <= 0:
+            return
+        self._probe_thread = threading.Thread(target=self._probe_loop, name='tts-health', daemon=True)
+        self._probe_thread.start()
+
+    def stop_health_checks(self):
+        """Stop the background health probe thread"""
+        self._stop.set()
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.probe_interval):
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.error(f"TTS health probe error: {e}")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return routing state for every backend"""
+        with self._lock:
+            return [backend.stats() for backend in self.backends]
@@ -0,0 +1,183 @@
+"""
+TTS Audio Cache
+Disk-backed, size-bounded LRU cache for synthesized speech
+Repeated utterances are served from disk instead of re-synthesized
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCache:
+    """
+    Content-addressed audio cache
+    Each entry is a file named by the hash of (backend, speaker, cleaned text).
+    Least recently used entries are evicted once the total size exceeds max_bytes.
+    """
+
+    FILE_SUFFIX = '.audio'
+
+    def __init__(self, cache_dir: str, max_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize the cache and index any entries already on disk
+
+        Args:
+            cache_dir: Directory holding cached audio files
+            max_bytes: Upper bound on the total size of cached audio
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> size in bytes, least recent first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, speaker_id: str, backend: str) -> str:
+        """Build the content address for a cleaned utterance"""
+        digest = hashlib.sha256()
+        for part in (backend, speaker_id, text):
+            digest.update((part or '').encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.FILE_SUFFIX)
+
+    def _load_index(self):
+        """Rebuild the LRU order from files on disk (oldest mtime first)"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.FILE_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name[:-len(self.FILE_SUFFIX)], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        with self._lock:
+            self._evict()
+
+        if files:
+            logger.info(f"TTS cache loaded {len(self._entries)} entries ({self._total_bytes} bytes)")
+
+    def __contains__(self, key: str) -> bool:
+        """Check for an entry without touching recency or statistics"""
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up cached audio
+
+        Args:
+            key: Content address from make_key()
+
+        Returns:
+            Audio bytes, or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            try:
+                with open(self._path(key), 'rb') as f:
+                    data = f.read()
+                # Persist recency so LRU order survives restarts
+                os.utime(self._path(key))
+            except OSError:
+                # File removed behind our back - treat as a miss
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.bytes_saved += len(data)
+            return data
+
+    def put(self, key: str, data: bytes):
+        """
+        Store audio under a content address, evicting old entries if needed
+
+        Args:
+            key: Content address from make_key()
+            data: Audio bytes to store
+        """
+        if not data or len(data) > self.max_bytes:
+            return
+
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"TTS cache write failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes (lock held)"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'bytes_saved': self.bytes_saved
+            }
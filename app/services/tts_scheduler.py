@@ -0,0 +1,227 @@
+"""
+TTS Scheduler
+Central priority queue for all speech synthesis
+Alerts run before replies, replies before prefetch; duplicate in-flight
+texts share one job, each backend has a concurrency cap, and the queue
+sheds the least important work once it passes its limit.
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class Priority:
+    """Priority classes (lower value runs first)"""
+    ALERT = 0      # Timer alerts and other time-critical speech
+    REPLY = 1      # Spoken replies to user commands
+    PREFETCH = 2   # Speculative rendering (phrase bank, pre-rendered alerts)
+
+    NAMES = {'alert': ALERT, 'reply': REPLY, 'prefetch': PREFETCH}
+
+
+class _Job:
+    """A queued synthesis job"""
+
+    __slots__ = ('key', 'fn', 'args', 'priority', 'backend', 'future')
+
+    def __init__(self, key, fn, args, priority, backend):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.backend = backend
+        self.future = Future()
+
+
+class TTSScheduler:
+    """
+    Priority work queue in front of the TTS backends
+
+    Workers always take the most important queued job whose backend has
+    a free slot, so a chatty burst of replies cannot delay an alert.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 32,
+        backend_concurrency: int = 2
+    ):
+        """
+        Initialize the scheduler (worker threads start on first submit)
+
+        Args:
+            max_workers: Worker threads running synthesis jobs
+            max_queue: Queued jobs allowed before load shedding starts
+            backend_concurrency: Concurrent jobs allowed per backend
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.backend_concurrency = backend_concurrency
+        self.backend_limits = {}   # backend -> concurrency override
+
+        self._queues = {priority: deque() for priority in Priority.NAMES.values()}
+        self._inflight = {}        # key -> _Job (queued or running)
+        self._active = {}          # backend -> running job count
+        self._condition = threading.Condition()
+        self._workers = []
+
+        # Statistics
+        self.submitted = 0
+        self.completed = 0
+        self.deduplicated = 0
+        self.shed = 0
+
+    def set_backend_limit(self, backend: str, limit: int):
+        """Override the concurrency cap for one backend"""
+        with self._condition:
+            self.backend_limits[backend] = limit
+            self._condition.notify_all()
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable[..., Dict[str, Any]],
+        *args,
+        priority: int = Priority.REPLY,
+        backend: str = 'default'
+    ) -> Future:
+        """
+        Queue a synthesis job
+
+        Args:
+            key: Identity of the work; an in-flight job with the same key is reused
+            fn: Callable returning a TTS result dictionary
+            *args: Arguments for fn
+            priority: Priority class from Priority
+            backend: Backend the job will call (for the concurrency cap)
+
+        Returns:
+            Future resolving to the result dictionary (an error result if shed)
+        """
+        with self._condition:
+            self._start_workers()
+            self.submitted += 1
+
+            existing = self._inflight.get(key)
+            if existing is not None:
+                self.deduplicated += 1
+                self._promote(existing, priority)
+                return existing.future
+
+            job = _Job(key, fn, args, priority, backend)
+            if self._queued_count() >= self.max_queue and not self._shed_for(priority):
+                self.shed += 1
+                logger.warning(f"TTS queue full, shedding new job (priority {priority})")
+                job.future.set_result(self._shed_result())
+                return job.future
+
+            self._queues[priority].append(job)
+            self._inflight[key] = job
+            self._condition.notify()
+            return job.future
+
+    def _queued_count(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _promote(self, job: _Job, priority: int):
+        """Move a queued job to a more important class (lock held)"""
+        if priority >= job.priority:
+            return
+        try:
+            self._queues[job.priority].remove(job)
+        except ValueError:
+            return  # Already running
+        job.priority = priority
+        self._queues[priority].append(job)
+
+    def _shed_for(self, priority: int) -> bool:
+        """
+        Drop the newest job of the least important class below priority (lock held)
+
+        Returns:
+            bool: True if room was made for the incoming job
+        """
+        for victim_priority in sorted(self._queues, reverse=True):
+            if victim_priority <= priority:
+                return False
+            queue = self._queues[victim_priority]
+            if queue:
+                victim = queue.pop()
+                del self._inflight[victim.key]
+                self.shed += 1
+                logger.warning(f"TTS queue full, shedding queued job (priority {victim_priority})")
+                victim.future.set_result(self._shed_result())
+                return True
+        return False
+
+    @staticmethod
+    def _shed_result() -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': 'TTS is busy, please try again',
+            'shed': True
+        }
+
+    def _start_workers(self):
+        """Start worker threads on first use (lock held)"""
+        if self._workers:
+            return
+        for index in range(self.max_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f'tts-scheduler-{index}',
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pop the most important job whose backend has a free slot (lock held)"""
+        for priority in sorted(self._queues):
+            for job in self._queues[priority]:
+                limit = self.backend_limits.get(job.backend, self.backend_concurrency)
+                if self._active.get(job.backend, 0) < limit:
+                    self._queues[priority].remove(job)
+                    return job
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job()
+                self._active[job.backend] = self._active.get(job.backend, 0) + 1
+
+            try:
+                result = job.fn(*job.args)
+            except Exception as e:
+                logger.error(f"TTS job failed: {e}")
+                result = {'success': False, 'error': str(e)}
+
+            with self._condition:
+                self._active[job.backend] -= 1
+                self._inflight.pop(job.key, None)
+                self.completed += 1
+                self._condition.notify_all()
+            job.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth per class, running jobs per backend and counters"""
+        with self._condition:
+            return {
+                'queued': {name: len(self._queues[priority]) for name, priority in Priority.NAMES.items()},
+                'active': dict(self._active),
+                'max_queue': self.max_queue,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'deduplicated': self.deduplicated,
+                'shed': self.shed
+            }
@@ -6,11 +6,33 @@ Replaces browser speechSynthesis with server-side TTS
 
 import base64
 import logging
+import re
 import requests
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Any, List, Callable
+
+from app.services import audio_codec
+from app.services.tts_backends import BackendPool
+from app.services.tts_cache import AudioCache
+from app.services.tts_scheduler import TTSScheduler, Priority
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries in cleaned text (punctuation followed by whitespace)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;])\s+')
+
+# Text cleaning patterns, compiled once at import (applied in this order)
+EMOJI_PATTERN = re.compile(r'[🎤🤖✅❌🛠️🔗💡🎯🔊🎙️⚡🎬🍳👨‍🍳🎉]')
+TOOL_CALL_PATTERN = re.compile(r'\{"tool_name":[^}]+\}')
+BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+ITALIC_PATTERN = re.compile(r'\*(.*?)\*')
+CODE_PATTERN = re.compile(r'`(.*?)`')
+HEADING_PATTERN = re.compile(r'#{1,6}\s?')
+NEWLINE_PATTERN = re.compile(r'\n+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+URL_PATTERN = re.compile(r'http[s]?://\S+')
+SPECIAL_CHAR_PATTERN = re.compile(r'[^\w\s.,!?;:()-]')
+
 
 class TTSService:
     """
@@ -18,27 +40,55 @@ class TTSService:
     Handles all TTS generation using Coqui TTS Docker container
     """
     
-    def __init__(self, coqui_url: str = "http://localhost:5002"):
+    def __init__(
+        self,
+        coqui_url: str = "http://localhost:5002",
+        cache: Optional[AudioCache] = None,
+        coqui_urls: Optional[List[str]] = None
+    ):
         """
         Initialize TTS Service
         
         Args:
             coqui_url: URL of Coqui TTS Docker container
+            cache: Optional audio cache for repeated utterances
+            coqui_urls: URLs of several interchangeable Coqui containers (overrides coqui_url)
         """
-        self.coqui_url = coqui_url.rstrip('/')
+        self.backends = BackendPool(coqui_urls or [coqui_url])
+        self.coqui_url = ', '.join(coqui_urls) if coqui_urls else coqui_url.rstrip('/')
         self.default_speaker_id = "p300"  # Coqui TTS speaker ID
         self.timeout = 30  # Request timeout in seconds
+        self.backend_name = 'coqui-tts'  # Part of the cache key (shared by every pooled container)
+        self.cache = cache
+        self.max_workers = 4  # Concurrent synthesis requests per service
+        self.min_chunk_chars = 20  # Shorter sentences are merged into the next chunk
+        self._executor = None
+        self.phrase_bank = None  # Pre-rendered phrases, set by init_phrase_bank
+        self.scheduler = None  # Central priority queue, set by init_tts_service
         
     def set_url(self, coqui_url: str):
-        """Set or update the Coqui TTS URL"""
-        self.coqui_url = coqui_url.rstrip('/')
+        """Set or update the Coqui TTS URL (replaces the pooled containers)"""
+        self.backends.set_urls([coqui_url])
+        self.coqui_url = self.backends.backends[0].url
+        self.scale_backend_limit()
+    
+    def scale_backend_limit(self):
+        """Let the scheduler run its per-backend concurrency on every pooled container"""
+        # All containers share one scheduler backend; scale its cap with the pool
+        if self.scheduler:
+            self.scheduler.set_backend_limit(
+                self.backend_name,
+                self.scheduler.backend_concurrency * max(len(self.backends), 1)
+            )
         
     def generate_speech(
         self, 
         text: str, 
         voice: Optional[str] = None,
         model: Optional[str] = None,
-        return_format: str = 'base64'
+        return_format: str = 'base64',
+        audio_format: Optional[str] = None,
+        priority: int = Priority.REPLY
     ) -> Dict[str, Any]:
         """
         Generate speech audio from text using Coqui TTS
@@ -48,6 +98,8 @@ class TTSService:
             voice: Speaker ID (optional, for Coqui TTS)
             model: Model name (optional, for compatibility)
             return_format: Format to return ('base64', 'bytes', 'both')
+            audio_format: Wire encoding from audio_codec.FORMATS (default: backend WAV)
+            priority: Scheduler priority class (alerts run before replies and prefetch)
             
         Returns:
             Dictionary containing audio data and metadata
@@ -61,20 +113,163 @@ class TTSService:
         # Use default speaker if not specified
         speaker_id = voice or self.default_speaker_id
         
-        try:
-            # Clean text for better TTS
-            clean_text = self._clean_text_for_tts(text)
+        # Clean text for better TTS
+        clean_text = self._clean_text_for_tts(text)
+        
+        if not clean_text:
+            return {
+                'success': False,
+                'error': 'No valid text after cleaning'
+            }
+        
+        if self.scheduler:
+            return dict(self._submit(clean_text, speaker_id, return_format, audio_format, priority).result())
+        return self._synthesize(clean_text, speaker_id, return_format, audio_format)
+    
+    def generate_speech_chunks(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        return_format: str = 'base64',
+        audio_format: Optional[str] = None,
+        on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate speech sentence by sentence for streaming playback
+        
+        Sentences are synthesized concurrently on the worker pool and handed
+        to on_chunk in order, each as soon as it and every earlier sentence
+        are ready, so playback can start after the first sentence. At most
+        max_workers sentences of a reply are queued at once (the next one is
+        submitted as each is delivered), so a long reply never fills the
+        scheduler queue and sheds its own trailing sentences.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Speaker ID (optional, for Coqui TTS)
+            return_format: Format to return ('base64', 'bytes', 'both')
+            audio_format: Wire encoding from audio_codec.FORMATS (default: backend WAV)
+            on_chunk: Callback invoked with each chunk result, in order
             
-            if not clean_text:
-                return {
-                    'success': False,
-                    'error': 'No valid text after cleaning'
-                }
+        Returns:
+            List of chunk result dictionaries, in sentence order
+        """
+        if not text or not isinstance(text, str):
+            return [{
+                'success': False,
+                'error': 'Invalid text provided'
+            }]
+        
+        speaker_id = voice or self.default_speaker_id
+        clean_text = self._clean_text_for_tts(text)
+        sentences = self._split_sentences(clean_text)
+        
+        if not sentences:
+            return [{
+                'success': False,
+                'error': 'No valid text after cleaning'
+            }]
+        
+        window = max(1, self.max_workers)
+        futures = {}
+        
+        def submit(index):
+            if index < len(sentences):
+                futures[index] = self._submit(
+                    sentences[index], speaker_id, return_format, audio_format, Priority.REPLY
+                )
+        
+        for index in range(window):
+            submit(index)
+        
+        results = []
+        for index in range(len(sentences)):
+            result = dict(futures.pop(index).result())
+            submit(index + window)
+            result['chunk_index'] = index
+            result['chunk_count'] = len(sentences)
+            results.append(result)
+            if on_chunk:
+                on_chunk(result)
+        return results
+    
+    def _submit(
+        self,
+        clean_text: str,
+        speaker_id: str,
+        return_format: str,
+        audio_format: Optional[str],
+        priority: int
+    ) -> Future:
+        """
+        Queue synthesis on the scheduler (or the worker pool when there is none)
+        
+        Banked and cached audio skips the queue entirely, so it is never
+        stuck behind slow synthesis jobs.
+        
+        Returns:
+            Future resolving to the result dictionary (shared by duplicate requests)
+        """
+        if not self.scheduler:
+            return self._get_executor().submit(
+                self._synthesize, clean_text, speaker_id, return_format, audio_format
+            )
+        
+        cache_key = AudioCache.make_key(clean_text, speaker_id, self.backend_name)
+        if (self.phrase_bank and cache_key in self.phrase_bank) or (self.cache and cache_key in self.cache):
+            future = Future()
+            future.set_result(self._synthesize(clean_text, speaker_id, return_format, audio_format))
+            return future
+        
+        return self.scheduler.submit(
+            (cache_key, return_format, audio_format),
+            self._synthesize, clean_text, speaker_id, return_format, audio_format,
+            priority=priority,
+            backend=self.backend_name
+        )
+    
+    def _synthesize(
+        self,
+        clean_text: str,
+        speaker_id: str,
+        return_format: str,
+        audio_format: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Synthesize already-cleaned text, consulting the audio cache first
+        
+        The cache always holds the backend's original WAV; compact wire
+        formats are produced from it once per format and kept in memory
+        (see audio_codec.transcode).
+        
+        Args:
+            clean_text: Text returned by _clean_text_for_tts
+            speaker_id: Coqui TTS speaker ID
+            return_format: Format to return ('base64', 'bytes', 'both')
+            audio_format: Wire encoding from audio_codec.FORMATS (default: backend WAV)
             
-            logger.info(f"Generating TTS for: {clean_text[:50]}...")
+        Returns:
+            Dictionary containing audio data and metadata
+        """
+        try:
+            # Serve pre-rendered phrases and repeated utterances without synthesis
+            cache_key = None
+            audio_bytes = None
+            if self.cache or self.phrase_bank:
+                cache_key = AudioCache.make_key(clean_text, speaker_id, self.backend_name)
+            if self.phrase_bank:
+                audio_bytes = self.phrase_bank.get(cache_key)
+            if audio_bytes is None and self.cache:
+                audio_bytes = self.cache.get(cache_key)
+            cached = audio_bytes is not None
             
-            # Make request to Coqui TTS with fallback endpoints
-            audio_bytes = self._fetch_audio(clean_text, speaker_id)
+            if cached:
+                logger.info(f"TTS cache hit for: {clean_text[:50]}...")
+            else:
+                logger.info(f"Generating TTS for: {clean_text[:50]}...")
+                
+                # Make request to Coqui TTS with fallback endpoints
+                audio_bytes = self._fetch_audio(clean_text, speaker_id)
             
             if not audio_bytes:
                 return {
@@ -82,13 +277,24 @@ class TTSService:
                     'error': 'No audio data generated'
                 }
             
+            if self.cache and not cached:
+                self.cache.put(cache_key, audio_bytes)
+            
+            source_size = len(audio_bytes)
+            encoded = audio_codec.transcode(audio_bytes, audio_format, cache_key=cache_key)
+            audio_bytes = encoded['audio']
+            
             # Prepare response based on format
             result = {
                 'success': True,
                 'text': clean_text,
                 'voice': speaker_id,
-                'model': 'coqui-tts',
-                'mime_type': 'audio/wav'
+                'model': self.backend_name,
+                'mime_type': encoded['mime_type'],
+                'audio_format': encoded['format'],
+                'audio_size': len(audio_bytes),
+                'source_size': source_size,
+                'cached': cached
             }
             
             if return_format in ['base64', 'both']:
@@ -120,37 +326,10 @@ class TTSService:
             }
 
     def _fetch_audio(self, text: str, speaker_id: Optional[str]) -> bytes:
-        """Attempt Coqui TTS endpoints with graceful fallbacks."""
+        """Synthesize on the best healthy Coqui backend, failing over on error."""
         # Use speaker_id if provided, otherwise use default
         speaker = speaker_id if speaker_id else self.default_speaker_id
-        
-        attempts = [
-            ("GET", f"{self.coqui_url}/api/tts", {"params": {"text": text, "speaker_id": speaker}}),
-            ("POST", f"{self.coqui_url}/api/tts", {"data": {"text": text, "speaker_id": speaker}}),
-            ("GET", f"{self.coqui_url}/tts", {"params": {"text": text, "speaker_id": speaker}}),
-        ]
-
-        last_error = None
-        for method, url, kwargs in attempts:
-            try:
-                response = requests.request(method, url, timeout=self.timeout, **kwargs)
-                if response.status_code == 404:
-                    logger.warning("Coqui endpoint %s returned 404, trying fallback", url)
-                    last_error = f"404 from {url}"
-                    continue
-                response.raise_for_status()
-                if response.content:
-                    return response.content
-                last_error = f"Empty audio response from {url}"
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-                # Propagate to caller for dedicated handling
-                raise
-            except Exception as e:
-                last_error = str(e)
-                logger.warning("Coqui request %s %s failed: %s", method, url, e)
-                continue
-
-        raise Exception(last_error or "Unable to fetch audio from Coqui TTS")
+        return self.backends.fetch(text, speaker, self.timeout)
     
     def _clean_text_for_tts(self, text: str) -> str:
         """
@@ -162,36 +341,84 @@ class TTSService:
         Returns:
             Cleaned text suitable for TTS
         """
-        import re
-        
         # Remove emojis
-        clean = re.sub(r'[🎤🤖✅❌🛠️🔗💡🎯🔊🎙️⚡🎬🍳👨‍🍳🎉]', '', text)
+        clean = EMOJI_PATTERN.sub('', text)
         
         # Remove JSON tool calls
-        clean = re.sub(r'\{"tool_name":[^}]+\}', '', clean)
+        clean = TOOL_CALL_PATTERN.sub('', clean)
         
         # Remove markdown formatting
-        clean = re.sub(r'\*\*(.*?)\*\*', r'\1', clean)  # Bold
-        clean = re.sub(r'\*(.*?)\*', r'\1', clean)      # Italic
-        clean = re.sub(r'`(.*?)`', r'\1', clean)        # Code
-        clean = re.sub(r'#{1,6}\s?', '', clean)         # Headings
-        
-        # Replace newlines with periods
-        clean = re.sub(r'\n+', '. ', clean)
+        clean = BOLD_PATTERN.sub(r'\1', clean)
+        clean = ITALIC_PATTERN.sub(r'\1', clean)
+        clean = CODE_PATTERN.sub(r'\1', clean)
+        clean = HEADING_PATTERN.sub('', clean)
         
-        # Replace multiple spaces with single space
-        clean = re.sub(r'\s+', ' ', clean)
+        # Replace newlines with periods, then collapse whitespace
+        clean = NEWLINE_PATTERN.sub('. ', clean)
+        clean = WHITESPACE_PATTERN.sub(' ', clean)
         
-        # Remove URLs
-        clean = re.sub(r'http[s]?://\S+', '', clean)
-        
-        # Remove special characters but keep punctuation
-        clean = re.sub(r'[^\w\s.,!?;:()-]', '', clean)
+        # Remove URLs and special characters but keep punctuation
+        clean = URL_PATTERN.sub('', clean)
+        clean = SPECIAL_CHAR_PATTERN.sub('', clean)
         
         # Trim whitespace
-        clean = clean.strip()
+        return clean.strip()
+    
+    def _split_sentences(self, clean_text: str) -> List[str]:
+        """
+        Split cleaned text into sentence chunks for streaming
+        
+        Very short fragments (e.g. "Ok.") are merged with the following
+        sentence so each chunk is worth a synthesis round trip.
+        """
+        chunks = []
+        pending = ''
+        for sentence in SENTENCE_BOUNDARY.split(clean_text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            pending = f"{pending} {sentence}" if pending else sentence
+            if len(pending) >= self.min_chunk_chars:
+                chunks.append(pending)
+                pending = ''
         
-        return clean
+        if pending:
+            if chunks:
+                chunks[-1] = f"{chunks[-1]} {pending}"
+            else:
+                chunks.append(pending)
+        return chunks
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the bounded worker pool, creating it on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='tts'
+            )
+        return self._executor
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return audio cache statistics (hit rate, bytes saved)"""
+        if not self.cache:
+            return {'enabled': False}
+        return self.cache.stats()
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Return scheduler statistics (queue depth, dedupe and shed counts)"""
+        if not self.scheduler:
+            return {'enabled': False}
+        return {'enabled': True, **self.scheduler.stats()}
+    
+    def get_backend_stats(self) -> List[Dict[str, Any]]:
+        """Return health, endpoint and latency of each Coqui backend"""
+        return self.backends.stats()
+    
+    def get_phrase_bank_stats(self) -> Dict[str, Any]:
+        """Return phrase bank statistics (banked phrases, hits)"""
+        if not self.phrase_bank:
+            return {'enabled': False}
+        return self.phrase_bank.stats()
     
     def batch_generate_speech(self, texts: list, voice: Optional[str] = None) -> list:
         """
@@ -204,11 +431,9 @@ class TTSService:
         Returns:
             List of result dictionaries
         """
-        results = []
-        for text in texts:
-            result = self.generate_speech(text, voice=voice)
-            results.append(result)
-        return results
+        executor = self._get_executor()
+        futures = [executor.submit(self.generate_speech, text, voice=voice) for text in texts]
+        return [future.result() for future in futures]
 
 
 # Global TTS service instance (will be initialized in app initialization)
@@ -224,13 +449,44 @@ def get_tts_service() -> TTSService:
     return tts_service
 
 
-def init_tts_service(coqui_url: str = "http://localhost:5000"):
+def init_tts_service(
+    coqui_url: str = "http://localhost:5000",
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = 100 * 1024 * 1024,
+    max_workers: int = 4,
+    queue_limit: int = 32,
+    backend_concurrency: int = 2,
+    coqui_urls: Optional[List[str]] = None,
+    health_interval: float = 10.0
+):
     """
     Initialize the TTS service with Coqui TTS URL
     
     Args:
         coqui_url: URL of Coqui TTS Docker container
+        cache_dir: Directory for the audio cache (None disables caching)
+        cache_max_bytes: Size bound for the audio cache
+        max_workers: Scheduler worker threads (also sizes the batch worker pool)
+        queue_limit: Queued synthesis jobs allowed before load shedding
+        backend_concurrency: Concurrent synthesis requests per Coqui container
+        coqui_urls: URLs of several interchangeable Coqui containers (overrides coqui_url)
+        health_interval: Seconds between background health probes (0 disables)
     """
     global tts_service
-    tts_service = TTSService(coqui_url)
-    logger.info(f"TTS Service initialized with Coqui TTS at {coqui_url}")
+    cache = None
+    if cache_dir:
+        try:
+            cache = AudioCache(cache_dir, cache_max_bytes)
+        except OSError as e:
+            logger.warning(f"TTS audio cache disabled: {e}")
+    tts_service = TTSService(coqui_url, cache=cache, coqui_urls=coqui_urls)
+    tts_service.max_workers = max_workers
+    tts_service.scheduler = TTSScheduler(
+        max_workers=max_workers,
+        max_queue=queue_limit,
+        backend_concurrency=backend_concurrency
+    )
+    tts_service.scale_backend_limit()
+    tts_service.backends.probe_interval = health_interval
+    tts_service.backends.start_health_checks()
+    logger.info(f"TTS Service initialized with Coqui TTS at {tts_service.coqui_url}")
@@ -0,0 +1,137 @@
+"""
+YouTube search client for Kitchen Assistant
+Runs youtube-search-python searches over a shared, pooled HTTP client
+Safe to call from many threads at once: nothing process-global is patched,
+and concurrent searches reuse keep-alive connections instead of each
+opening its own.
+"""
+import os
+import threading
+import httpx
+from youtubesearchpython import VideosSearch
+from youtubesearchpython.core.constants import userAgent
+
+
+class PooledVideosSearch(VideosSearch):
+    """
+    VideosSearch that sends its request through a YouTubeSearchClient
+    The library's default path calls the module-level httpx.post() with a
+    `proxies` argument newer httpx releases reject; this one uses the pooled
+    client (which picks up HTTP(S)_PROXY from the environment itself).
+    """
+
+    def __init__(self, query: str, limit: int = 20, language: str = 'en', region: str = 'US',
+                 timeout: float = None, client: 'YouTubeSearchClient' = None):
+        """
+        Run a video search
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+            language: Result language
+            region: Result region
+            timeout: Request timeout in seconds (defaults to the client's)
+            client: Client to send the request through (defaults to the shared one)
+        """
+        self._client = client or get_youtube_client()
+        super().__init__(query, limit, language, region, timeout or self._client.timeout)
+
+    def syncPostRequest(self) -> httpx.Response:
+        return self._client.post(self.url, self.data, self.timeout)
+
+
+class YouTubeSearchClient:
+    """
+    Thread-safe owner of the pooled HTTP connection to YouTube
+    """
+
+    def __init__(self, max_connections: int = 20, timeout: float = 5.0, transport=None):
+        """
+        Initialize the client
+
+        Args:
+            max_connections: Upper bound on concurrent connections to YouTube
+            timeout: Default request timeout in seconds
+            transport: Optional httpx transport (used by tests and benchmarks)
+        """
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._http = httpx.Client(
+            headers={"User-Agent": userAgent},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=timeout,
+            transport=transport
+        )
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.requests = 0
+        self.errors = 0
+
+    def post(self, url: str, payload: dict, timeout: float = None) -> httpx.Response:
+        """
+        POST a JSON payload over the pooled connection
+
+        Args:
+            url: Request URL
+            payload: JSON body
+            timeout: Request timeout in seconds
+
+        Returns:
+            httpx.Response
+        """
+        with self._lock:
+            self.requests += 1
+        try:
+            return self._http.post(url, json=payload, timeout=timeout or self.timeout)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+    def search(self, query: str, limit: int = 3) -> dict:
+        """
+        Search YouTube for videos
+
+        Args:
+            query: Search query
+            limit: Maximum number of results
+
+        Returns:
+            dict: {'result': [...]} in youtube-search-python's format
+        """
+        return PooledVideosSearch(query, limit=limit, client=self).result()
+
+    def close(self):
+        """Close pooled connections"""
+        self._http.close()
+
+    def stats(self):
+        """Return client statistics"""
+        with self._lock:
+            return {
+                'max_connections': self.max_connections,
+                'requests': self.requests,
+                'errors': self.errors
+            }
+
+
+# Global client instance, created on first use
+_youtube_client = None
+_youtube_client_lock = threading.Lock()
+
+
+def get_youtube_client() -> YouTubeSearchClient:
+    """Get the shared YouTube search client"""
+    global _youtube_client
+    if _youtube_client is None:
+        with _youtube_client_lock:
+            if _youtube_client is None:
+                _youtube_client = YouTubeSearchClient(
+                    max_connections=int(os.getenv('YOUTUBE_MAX_CONNECTIONS', 20)),
+                    timeout=float(os.getenv('YOUTUBE_SEARCH_TIMEOUT', 5))
+                )
+    return _youtube_client
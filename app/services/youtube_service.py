@@ -1,72 +1,113 @@
 """
 YouTube search service for Kitchen Assistant
 """
-from youtubesearchpython import VideosSearch
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote_plus
 
+from app.services.youtube_client import PooledVideosSearch, get_youtube_client
+from app.utils.cache import TTLCache
+
+# Search results (keyed by normalized query) and per-video details
+# are cached to spare scraping quota on repeat queries and page views
+_search_cache = TTLCache(
+    ttl_seconds=float(os.getenv('YOUTUBE_SEARCH_CACHE_TTL', 3600)),
+    max_entries=256
+)
+_video_cache = TTLCache(
+    ttl_seconds=float(os.getenv('YOUTUBE_VIDEO_CACHE_TTL', 86400)),
+    max_entries=512
+)
+_related_cache = TTLCache(
+    ttl_seconds=float(os.getenv('YOUTUBE_VIDEO_CACHE_TTL', 86400)),
+    max_entries=512
+)
+# Titles seen in search results (video_id -> title), so the related-videos
+# search for a video page can start without waiting for Video.getInfo
+_title_hints = TTLCache(
+    ttl_seconds=float(os.getenv('YOUTUBE_VIDEO_CACHE_TTL', 86400)),
+    max_entries=1024
+)
+
+# Runs the related-videos search alongside the video info lookup
+_detail_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='youtube-details')
+
+
+def _normalize_query(query: str) -> str:
+    """Normalize a search query for use as a cache key"""
+    return ' '.join((query or '').lower().split())
+
+
+def clear_youtube_cache():
+    """Drop all cached YouTube searches and video details"""
+    _search_cache.clear()
+    _video_cache.clear()
+    _related_cache.clear()
+    _title_hints.clear()
+
+
+def get_youtube_cache_stats():
+    """Return hit/miss statistics for the YouTube caches"""
+    return {
+        "search": _search_cache.stats(),
+        "video": _video_cache.stats(),
+        "related": _related_cache.stats(),
+        "client": get_youtube_client().stats()
+    }
+
+
+def _remember_titles(videos):
+    """Record video titles from search results as hints for related-video lookups"""
+    for video in videos:
+        if video.get('video_id') and video.get('title'):
+            _title_hints.set(video['video_id'], video['title'])
+
 
 def search_youtube(query: str):
     """
     Searches YouTube for videos with multiple fallback methods.
     Enhanced with robust error handling and alternative approaches.
+    Real results are cached by normalized query; fallback links are not.
     """
+    cache_key = _normalize_query(query)
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        print(f"⚡ YouTube search cache hit for: {query}")
+        return copy.deepcopy(cached)
+    
     try:
         # Don't automatically add "recipe" - let user's query be specific
         print(f"🔍 Searching YouTube for: {query}")
         
-        # Method 1: Try the library without proxies parameter workaround
+        # Method 1: Library search over the shared, pooled HTTP client
         try:
-            import youtubesearchpython
+            search = PooledVideosSearch(query, limit=3)
+            search_result = search.result()
             
-            # Monkey patch to remove proxies parameter if needed
-            original_post = None
-            try:
-                import httpx
-                original_post = httpx.post
-                
-                def patched_post(url, **kwargs):
-                    # Remove proxies parameter that's causing issues
-                    kwargs.pop('proxies', None)
-                    return original_post(url, **kwargs)
-                
-                httpx.post = patched_post
-                
-                search = VideosSearch(query, limit=3)
-                search_result = search.result()
-                
-                # Restore original post function
-                if original_post:
-                    httpx.post = original_post
-                
-                if search_result and 'result' in search_result and search_result['result']:
-                    formatted_results = []
-                    for i, video in enumerate(search_result['result'][:3]):
-                        try:
-                            formatted_results.append({
-                                "result_number": i + 1,
-                                "title": video.get('title', 'Unknown Title'),
-                                "video_id": video.get('id', ''),
-                                "thumbnail": video.get('thumbnails', [{}])[0].get('url', '') if video.get('thumbnails') else ''
-                            })
-                        except Exception as video_error:
-                            print(f"Error processing video {i}: {video_error}")
-                            continue
-                    
-                    if formatted_results:
-                        print(f"✅ Found {len(formatted_results)} videos using patched library")
-                        return {"videos": formatted_results}
-                        
-            except Exception as patch_error:
-                print(f"Patched library method failed: {patch_error}")
-                # Restore original if patching failed
-                if original_post:
+            if search_result and 'result' in search_result and search_result['result']:
+                formatted_results = []
+                for i, video in enumerate(search_result['result'][:3]):
                     try:
-                        httpx.post = original_post
-                    except:
-                        pass
+                        formatted_results.append({
+                            "result_number": i + 1,
+                            "title": video.get('title', 'Unknown Title'),
+                            "video_id": video.get('id', ''),
+                            "thumbnail": video.get('thumbnails', [{}])[0].get('url', '') if video.get('thumbnails') else ''
+                        })
+                    except Exception as video_error:
+                        print(f"Error processing video {i}: {video_error}")
+                        continue
+                
+                if formatted_results:
+                    print(f"✅ Found {len(formatted_results)} videos")
+                    result = {"videos": formatted_results}
+                    _remember_titles(formatted_results)
+                    _search_cache.set(cache_key, copy.deepcopy(result))
+                    return result
         
         except Exception as lib_error:
-            print(f"Library method failed completely: {lib_error}")
+            print(f"Library search failed: {lib_error}")
         
         # Method 2: Fallback with mock results that provide direct YouTube search
         print("⚠️ Using fallback method with direct YouTube search links")
@@ -109,11 +150,36 @@ def play_youtube_video(result_number: int):
     }
 
 
-def get_video_details(video_id: str):
+def get_video_details(video_id: str, include_related: bool = True, title_hint: str = None):
     """
     Fetch comprehensive details for a YouTube video.
     Returns video information including title, description, channel, and extracted ingredients.
+    Successful lookups (including parsed ingredients and steps) are cached per video ID;
+    the fallback returned on errors is not.
+    
+    When the title is already known (title_hint, or from earlier search results) the
+    related-videos search runs concurrently with Video.getInfo instead of after it.
+    A cold request (no hint) still runs the two one after the other: the search
+    needs the title that getInfo returns, and no other query finds the same videos.
+    With include_related=False the related search is skipped entirely and the result
+    is marked "related_lazy" so the page can load it later via get_related_videos();
+    the video page does this by default (YOUTUBE_LAZY_RELATED), which keeps the
+    cold-request search off the page's critical path.
     """
+    cached = _video_cache.get(video_id)
+    if cached is not None:
+        print(f"⚡ Video details cache hit for: {video_id}")
+        video_data = copy.deepcopy(cached)
+        _attach_related(video_data['video'], include_related)
+        return video_data
+    
+    # Start the related search now if we already know what to search for
+    # (otherwise it waits for the title from getInfo, see _attach_related)
+    related_future = None
+    title_hint = title_hint or _title_hints.get(video_id)
+    if include_related and title_hint and _related_cache.get(video_id) is None:
+        related_future = _detail_executor.submit(_get_related_videos, title_hint)
+    
     try:
         from youtubesearchpython import Video
         import re
@@ -147,9 +213,6 @@ def get_video_details(video_id: str):
         # Create summary (first 300 characters of description)
         summary = description[:300] + "..." if len(description) > 300 else description
         
-        # Get related videos
-        related_videos = _get_related_videos(title)
-        
         video_data = {
             "success": True,
             "video": {
@@ -165,13 +228,18 @@ def get_video_details(video_id: str):
                 "publish_date": publish_date,
                 "ingredients": ingredients,
                 "steps": steps,
-                "related_videos": related_videos,
+                "related_videos": [],
                 "embed_url": f"https://www.youtube.com/embed/{video_id}",
                 "watch_url": f"https://www.youtube.com/watch?v={video_id}"
             }
         }
         
         print(f"✅ Successfully fetched details for: {title}")
+        _video_cache.set(video_id, copy.deepcopy(video_data))
+        
+        if related_future is not None:
+            _store_related(video_id, related_future.result())
+        _attach_related(video_data['video'], include_related)
         return video_data
         
     except Exception as e:
@@ -276,6 +344,51 @@ def _extract_steps_from_description(description: str):
     return steps[:12]  # Limit to 12 steps
 
 
+def get_related_videos(video_id: str):
+    """
+    Get related videos for a video page (the lazy half of get_video_details).
+    
+    Args:
+        video_id: YouTube video ID
+    
+    Returns:
+        list: Up to 4 related videos (empty if none could be found)
+    """
+    related = _related_cache.get(video_id)
+    if related is not None:
+        return copy.deepcopy(related)
+    
+    title = _title_hints.get(video_id)
+    if not title:
+        cached = _video_cache.get(video_id)
+        if cached is not None:
+            title = cached['video']['title']
+        else:
+            details = get_video_details(video_id, include_related=False)
+            if not details['video'].get('related_lazy'):
+                return []  # Video info unavailable (fallback page), nothing to search for
+            title = details['video']['title']
+    
+    return copy.deepcopy(_store_related(video_id, _get_related_videos(title)))
+
+
+def _store_related(video_id: str, related_videos):
+    """Cache a non-empty related-videos list for a video"""
+    if related_videos:
+        _related_cache.set(video_id, copy.deepcopy(related_videos))
+    return related_videos
+
+
+def _attach_related(video: dict, include_related: bool):
+    """Fill in related videos, or mark them for lazy loading"""
+    if include_related:
+        video['related_videos'] = get_related_videos(video['video_id'])
+    else:
+        related = _related_cache.get(video['video_id'])
+        video['related_videos'] = copy.deepcopy(related) if related else []
+        video['related_lazy'] = not related
+
+
 def _get_related_videos(query: str):
     """Get related videos based on the current video title"""
     try:
@@ -797,6 +797,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const refreshHistoryBtn = document.getElementById('refresh-history-btn');
     
     let conversationHistory = [];
+    let historyNextCursor = null;  // keyset cursor for the next (older) page
+    const HISTORY_PAGE_SIZE = 50;
     
     // Open history modal
     function openHistoryModal() {
@@ -813,17 +815,34 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
+    // Fetch one page of history; pages chain through next_cursor
+    async function fetchHistoryPage(cursor) {
+        const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        const response = await fetch(`/api/user/conversations?${params}`);
+        return response.json();
+    }
+    
     // Load conversation history from API
     async function loadConversationHistory() {
         try {
-            const limit = historyFilter.value === 'all' ? 10000 : parseInt(historyFilter.value);
+            const wanted = historyFilter.value === 'all' ? HISTORY_PAGE_SIZE : parseInt(historyFilter.value);
             historyContainer.innerHTML = '<div class="history-loading"><i class="fas fa-spinner fa-spin"></i> Loading conversation history...</div>';
             
-            const response = await fetch(`/api/user/conversations?limit=${limit}`);
-            const data = await response.json();
+            conversationHistory = [];
+            historyNextCursor = null;
+            do {
+                const data = await fetchHistoryPage(historyNextCursor);
+                if (!data.success) {
+                    break;
+                }
+                conversationHistory.push(...data.conversations);
+                historyNextCursor = data.next_cursor;
+            } while (historyNextCursor && conversationHistory.length < wanted);
             
-            if (data.success && data.conversations.length > 0) {
-                conversationHistory = data.conversations;
+            if (conversationHistory.length > 0) {
                 displayConversationHistory();
             } else {
                 historyContainer.innerHTML = `
@@ -846,8 +865,25 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
+    // "All conversations": append the next older page on demand
+    async function loadOlderHistory() {
+        if (!historyNextCursor) {
+            return;
+        }
+        try {
+            const data = await fetchHistoryPage(historyNextCursor);
+            if (data.success) {
+                conversationHistory.push(...data.conversations);
+                historyNextCursor = data.next_cursor;
+                displayConversationHistory(false);
+            }
+        } catch (error) {
+            console.error('Error loading older history:', error);
+        }
+    }
+    
     // Display conversation history
-    function displayConversationHistory() {
+    function displayConversationHistory(scrollToEnd = true) {
         const roleFilter = historyRoleFilter.value;
         
         // Filter conversations by role if needed
@@ -905,12 +941,22 @@ document.addEventListener('DOMContentLoaded', () => {
             `;
         }).join('');
         
-        historyContainer.innerHTML = historyHTML;
+        const loadMoreHTML = historyFilter.value === 'all' && historyNextCursor
+            ? '<button class="history-load-more" id="history-load-more"><i class="fas fa-history"></i> Load older messages</button>'
+            : '';
+        historyContainer.innerHTML = historyHTML + loadMoreHTML;
+        
+        const loadMoreBtn = document.getElementById('history-load-more');
+        if (loadMoreBtn) {
+            loadMoreBtn.addEventListener('click', loadOlderHistory);
+        }
         
         // Scroll to bottom
-        setTimeout(() => {
-            historyContainer.scrollTop = historyContainer.scrollHeight;
-        }, 100);
+        if (scrollToEnd) {
+            setTimeout(() => {
+                historyContainer.scrollTop = historyContainer.scrollHeight;
+            }, 100);
+        }
     }
     
     // Escape HTML to prevent XSS
@@ -929,9 +975,11 @@ document.addEventListener('DOMContentLoaded', () => {
         try {
             // Clear client-side storage first
             sessionStorage.removeItem('kitchen_session_id');
+            sessionStorage.removeItem('kitchen_session_token');
             sessionStorage.removeItem('kitchen_chat_history');
             chatHistory = [];
             sessionId = null;
+            sessionToken = null;
             
             // Clear UI
             chatContainer.innerHTML = '';
@@ -1025,7 +1073,7 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     
     if (historyFilter) {
-        historyFilter.addEventListener('change', displayConversationHistory);
+        historyFilter.addEventListener('change', loadConversationHistory);
     }
     
     if (historyRoleFilter) {
@@ -1041,7 +1089,7 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     
     if (refreshHistoryBtn) {
-        refreshHistoryBtn.addEventListener('click', loadConversationHistory);
+        refreshHistoryBtn.addEventListener('click', () => loadConversationHistory());
     }
 
     // --- State & Setup ---
@@ -1049,6 +1097,7 @@ document.addEventListener('DOMContentLoaded', () => {
     let currentVideoTitle = '';
     let isListening = false;
     let sessionId = sessionStorage.getItem('kitchen_session_id') || null; // Persist session
+    let sessionToken = sessionStorage.getItem('kitchen_session_token') || null; // Proves we created it
     let chatHistory = JSON.parse(sessionStorage.getItem('kitchen_chat_history') || '[]'); // Persist chat
     let activeTimers = [];
     let audioContext = null;
@@ -1080,6 +1129,9 @@ document.addEventListener('DOMContentLoaded', () => {
         if (sessionId) {
             sessionStorage.setItem('kitchen_session_id', sessionId);
         }
+        if (sessionToken) {
+            sessionStorage.setItem('kitchen_session_token', sessionToken);
+        }
         sessionStorage.setItem('kitchen_chat_history', JSON.stringify(chatHistory));
         console.log('💾 Session saved to storage');
     }
@@ -2318,12 +2370,17 @@ document.addEventListener('DOMContentLoaded', () => {
         socket.emit('user_command', { 
             command: commandText, 
             history: chatHistory,
-            session_id: sessionId
+            session_id: sessionId,
+            stream_audio: true  // Receive speech sentence by sentence via ai_audio_chunk
         });
     }
 
     // --- WebSocket Event Handlers ---
-    socket.on('connect', () => { console.log('Connected to server'); });
+    socket.on('connect', () => {
+        console.log('Connected to server');
+        // Ask for raw binary audio in a compact format (server falls back to base64 WAV otherwise)
+        socket.emit('audio_capabilities', { binary: true, formats: getPlayableAudioFormats() });
+    });
     socket.on('disconnect', () => { console.log('Disconnected from server'); });
     socket.on('error', (data) => { 
         console.error('Server error:', data.message); 
@@ -2342,12 +2399,13 @@ document.addEventListener('DOMContentLoaded', () => {
         // Only use new session if we don't have one already
         if (!sessionId) {
             sessionId = data.session_id;
+            sessionToken = data.session_token;
             saveSessionToStorage();
             console.log('✅ New session ID saved:', sessionId);
         } else {
             console.log('♻️ Using existing session ID:', sessionId);
             // Inform server of our existing session
-            socket.emit('restore_session', { session_id: sessionId });
+            socket.emit('restore_session', { session_id: sessionId, session_token: sessionToken });
         }
     });
     
@@ -2377,6 +2435,12 @@ document.addEventListener('DOMContentLoaded', () => {
         updateTimerDisplay(data);
     });
 
+    // Deadlines for all of this user's timers (sent on changes and as periodic resync)
+    socket.on('timer_sync', (data) => {
+        console.log('Timer sync:', data);
+        syncActiveTimers(data);
+    });
+
     socket.on('timer_finished', (data) => {
         console.log('Timer finished:', data);
         handleTimerFinished(data);
@@ -2586,12 +2650,108 @@ document.addEventListener('DOMContentLoaded', () => {
         backendAudioReceived = false;
     });
 
+    // Sentence-chunked audio: queue chunks and play them back in order
+    let audioChunkQueue = [];
+    let audioChunkPlaying = false;
+    let audioChunkSession = null;  // Shared by the chunks of the reply being played
+
+    function decodeBase64Audio(audioB64) {
+        const binaryString = atob(audioB64);
+        const audioData = new Uint8Array(binaryString.length);
+        for (let i = 0; i < binaryString.length; i++) {
+            audioData[i] = binaryString.charCodeAt(i);
+        }
+        return audioData.buffer;
+    }
+
+    function toArrayBuffer(audio) {
+        // Socket.IO delivers binary attachments as ArrayBuffer in browsers
+        return audio instanceof ArrayBuffer ? audio : new Uint8Array(audio).buffer;
+    }
+
+    function getPlayableAudioFormats() {
+        // Most compact first; the server picks the first one it can produce
+        const probe = document.createElement('audio');
+        const formats = [];
+        if (probe.canPlayType && probe.canPlayType('audio/ogg; codecs="opus"')) {
+            formats.push('opus');
+        }
+        formats.push('wav-pcm16', 'wav');
+        return formats;
+    }
+
+    // Binary audio (negotiated via audio_capabilities) - no base64 decode needed
+    socket.on('ai_audio', async (data) => {
+        console.log('📥 Received binary ai_audio event:', data.audio?.byteLength || 'N/A', 'bytes');
+        backendAudioReceived = true;
+        
+        if (speechSynthesis.speaking) {
+            speechSynthesis.cancel();
+        }
+        if (!audioContext) {
+            initAudioContext();
+        }
+        if (audioContext && audioContext.state === 'suspended') {
+            try {
+                await audioContext.resume();
+            } catch (e) {
+                console.error('❌ Failed to resume AudioContext:', e);
+            }
+        }
+        
+        try {
+            await playAudio(toArrayBuffer(data.audio));
+            assistantMessageBubble = null;
+        } catch (error) {
+            console.error('❌ Error playing binary audio:', error);
+        }
+    });
+
     socket.on('ai_audio_chunk', async (data) => {
-        console.log('Received ai_audio_chunk:', data);
-        const audioData = new Uint8Array(data.audio).buffer;
-        await playAudio(audioData);
-        assistantMessageBubble = null;
-        setTimeout(startListening, 300); // Auto-listen for next turn
+        console.log(`📥 Received ai_audio_chunk ${data.index + 1}/${data.total}`);
+        backendAudioReceived = true;
+        audioChunkQueue.push(data);
+        
+        // A drain loop is already running - it will pick this chunk up
+        if (audioChunkPlaying) return;
+        audioChunkPlaying = true;
+        
+        if (!audioContext) {
+            initAudioContext();
+        }
+        if (audioContext && audioContext.state === 'suspended') {
+            try {
+                await audioContext.resume();
+            } catch (e) {
+                console.error('❌ Failed to resume AudioContext:', e);
+            }
+        }
+        
+        while (audioChunkQueue.length > 0) {
+            const chunk = audioChunkQueue.shift();
+            // The first chunk of a reply pauses recognition and video for the whole reply
+            if (!audioChunkSession) {
+                audioChunkSession = beginSpeechSession();
+            }
+            try {
+                if (chunk.error) {
+                    console.warn(`⚠️ Skipping failed audio chunk ${chunk.index + 1}: ${chunk.error}`);
+                } else {
+                    const audioData = chunk.audio_b64
+                        ? decodeBase64Audio(chunk.audio_b64)
+                        : toArrayBuffer(chunk.audio);
+                    await playAudio(audioData, audioChunkSession);
+                }
+            } catch (error) {
+                console.error('❌ Error playing audio chunk:', error);
+            }
+            if (chunk.final) {
+                endSpeechSession(audioChunkSession);
+                audioChunkSession = null;
+                assistantMessageBubble = null;
+            }
+        }
+        audioChunkPlaying = false;
     });
 
     // Handle base64 audio if that's what the backend is sending
@@ -2850,7 +3010,90 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    async function playAudio(audioData) {
+    // Pause hands-free recognition and the video once for everything the assistant says in a reply
+    function beginSpeechSession() {
+        const session = { recognitionWasPaused: false, videoWasPausedForAI: false };
+        
+        // CRITICAL: Pause continuous recognition during AI speech to prevent echo
+        if (handsFreeMode && continuousRecognition) {
+            try {
+                continuousRecognition.stop();
+                session.recognitionWasPaused = true;
+                console.log('⏸️ Paused hands-free recognition during AI speech');
+            } catch (e) {
+                console.log('⚠️ Recognition already stopped:', e.message);
+            }
+        }
+        
+        // Smart pause: Pause video when AI is speaking to avoid confusion
+        if (isVideoPlaying()) {
+            console.log('⏸️ Pausing video while AI assistant speaks');
+            player.pauseVideo();
+            session.videoWasPausedForAI = true;
+            showSmartNotification('🤖 AI speaking - Video paused', 'info');
+        }
+        return session;
+    }
+
+    // Resume whatever beginSpeechSession paused, once the last audio of the reply has played
+    function endSpeechSession(session, { failed = false } = {}) {
+        if (failed) {
+            // Resume recognition and video right away on error
+            if (session.recognitionWasPaused && handsFreeMode) {
+                try {
+                    continuousRecognition.start();
+                    console.log('▶️ Resumed recognition after audio error');
+                } catch (e) {
+                    console.log('⚠️ Could not resume recognition:', e.message);
+                }
+            }
+            if (session.videoWasPausedForAI && player) {
+                player.playVideo();
+            }
+            return;
+        }
+        
+        // CRITICAL: Resume hands-free recognition after AI speech
+        if (session.recognitionWasPaused && handsFreeMode) {
+            setTimeout(() => {
+                try {
+                    continuousRecognition.start();
+                    micStatus.textContent = 'Hands-free: Say "Hey Kitchen" to activate';
+                    console.log('▶️ Resumed hands-free recognition after AI speech');
+                } catch (e) {
+                    console.log('⚠️ Recognition already running:', e.message);
+                }
+            }, 500); // 500ms delay to let audio settle
+        } else {
+            micStatus.textContent = 'Click to speak';
+        }
+        
+        // Smart resume: Resume video after AI finishes speaking
+        if (session.videoWasPausedForAI && player) {
+            console.log('▶️ Resuming video after AI speech');
+            setTimeout(() => {
+                if (player && !isListening) {
+                    player.playVideo();
+                    showSmartNotification('▶️ Video resumed', 'success');
+                }
+            }, 300);
+        }
+        
+        // Auto-start listening after backend audio ends (ONLY in non-hands-free mode)
+        if (!handsFreeMode) {
+            setTimeout(() => {
+                if (!isListening && !isAssistantSpeaking) {
+                    console.log('▶️ Auto-starting listening after backend audio');
+                    startListening();
+                }
+            }, 500);
+        }
+    }
+
+    // Plays one audio clip. Without a session the clip is a whole reply and
+    // pauses/resumes recognition and video itself; chunked replies pass the
+    // session shared by all their chunks and end it after the final one
+    async function playAudio(audioData, session = null) {
         console.log('🎵 playAudio called');
         console.log('📊 audioData:', audioData ? 'exists' : 'null', audioData?.byteLength || 'N/A', 'bytes');
         console.log('📊 isAssistantSpeaking:', isAssistantSpeaking);
@@ -2876,25 +3119,9 @@ document.addEventListener('DOMContentLoaded', () => {
         micStatus.textContent = 'Assistant speaking...';
         console.log('✅ Set isAssistantSpeaking = true');
         
-        // CRITICAL: Pause continuous recognition during AI speech to prevent echo
-        let recognitionWasPaused = false;
-        if (handsFreeMode && continuousRecognition) {
-            try {
-                continuousRecognition.stop();
-                recognitionWasPaused = true;
-                console.log('⏸️ Paused hands-free recognition during AI speech');
-            } catch (e) {
-                console.log('⚠️ Recognition already stopped:', e.message);
-            }
-        }
-        
-        // Smart pause: Pause video when AI is speaking to avoid confusion
-        let videoWasPausedForAI = false;
-        if (isVideoPlaying()) {
-            console.log('⏸️ Pausing video while AI assistant speaks');
-            player.pauseVideo();
-            videoWasPausedForAI = true;
-            showSmartNotification('🤖 AI speaking - Video paused', 'info');
+        const ownsSession = session === null;
+        if (ownsSession) {
+            session = beginSpeechSession();
         }
         
         try {
@@ -2915,43 +3142,9 @@ document.addEventListener('DOMContentLoaded', () => {
                     console.log('✅ Backend audio playback ended');
                     isAssistantSpeaking = false;
                     statusIndicator.style.backgroundColor = '#34c759';
-                    
-                    // CRITICAL: Resume hands-free recognition after AI speech
-                    if (recognitionWasPaused && handsFreeMode) {
-                        setTimeout(() => {
-                            try {
-                                continuousRecognition.start();
-                                micStatus.textContent = 'Hands-free: Say "Hey Kitchen" to activate';
-                                console.log('▶️ Resumed hands-free recognition after AI speech');
-                            } catch (e) {
-                                console.log('⚠️ Recognition already running:', e.message);
-                            }
-                        }, 500); // 500ms delay to let audio settle
-                    } else {
-                        micStatus.textContent = 'Click to speak';
-                    }
-                    
-                    // Smart resume: Resume video after AI finishes speaking
-                    if (videoWasPausedForAI && player) {
-                        console.log('▶️ Resuming video after AI speech');
-                        setTimeout(() => {
-                            if (player && !isListening) {
-                                player.playVideo();
-                                showSmartNotification('▶️ Video resumed', 'success');
-                            }
-                        }, 300);
-                    }
-                    
-                    // Auto-start listening after backend audio ends (ONLY in non-hands-free mode)
-                    if (!handsFreeMode) {
-                        setTimeout(() => {
-                            if (!isListening && !isAssistantSpeaking) {
-                                console.log('▶️ Auto-starting listening after backend audio');
-                                startListening();
-                            }
-                        }, 500);
+                    if (ownsSession) {
+                        endSpeechSession(session);
                     }
-                    
                     resolve();
                 };
             });
@@ -2960,20 +3153,8 @@ document.addEventListener('DOMContentLoaded', () => {
             console.error("❌ Error stack:", error.stack);
             isAssistantSpeaking = false;
             statusIndicator.style.backgroundColor = '#34c759';
-            
-            // Resume recognition on error if needed
-            if (recognitionWasPaused && handsFreeMode) {
-                try {
-                    continuousRecognition.start();
-                    console.log('▶️ Resumed recognition after audio error');
-                } catch (e) {
-                    console.log('⚠️ Could not resume recognition:', e.message);
-                }
-            }
-            
-            // Resume video on error
-            if (videoWasPausedForAI && player) {
-                player.playVideo();
+            if (ownsSession) {
+                endSpeechSession(session, { failed: true });
             }
         }
     }
@@ -3134,8 +3315,8 @@ document.addEventListener('DOMContentLoaded', () => {
     };
 
     // Server-side TTS function (NO browser speechSynthesis)
-    function speakText(text) {
-        console.log('🔊 Server TTS Request:', text);
+    function speakText(text, priority = 'reply') {
+        console.log('🔊 Server TTS Request:', text, `(priority: ${priority})`);
         
         // Clean text before sending to server
         const cleanText = text
@@ -3160,7 +3341,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         
         // Send TTS request to server
-        socket.emit('generate_tts', { text: cleanText });
+        socket.emit('generate_tts', { text: cleanText, priority });
         
         console.log('📤 TTS request sent to server, waiting for audio...');
     }
@@ -3277,9 +3458,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 <div class="timer-finished-text">✅ FINISHED!</div>
             `;
             
-            // Add voice announcement
-            const voiceMessage = `Your ${timerData.name} timer is finished`;
-            speakText(voiceMessage);
+            // Add voice announcement (server-provided text is pre-rendered for instant playback)
+            const voiceMessage = timerData.speech || `Your ${timerData.name} timer is finished`;
+            speakText(voiceMessage, 'alert');
             
             // Play sound if enabled
             if (userSettings.soundEffects) {
@@ -3344,7 +3525,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 // Calculate end time for client-side countdown
                 const endTime = new Date();
                 const remainingMatch = timer.remaining.match(/(\d+):(\d+)/);
-                if (remainingMatch) {
+                if (timer.remaining_ms !== undefined) {
+                    endTime.setTime(endTime.getTime() + timer.remaining_ms);
+                } else if (remainingMatch) {
                     const minutes = parseInt(remainingMatch[1]);
                     const seconds = parseInt(remainingMatch[2]);
                     endTime.setTime(endTime.getTime() + (minutes * 60 + seconds) * 1000);
@@ -3388,6 +3571,25 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function syncActiveTimers(data) {
+        const timers = data.timers || [];
+        const sameTimers = timers.length === Object.keys(activeTimersData).length &&
+            timers.every(timer => activeTimersData[timer.id] && document.getElementById(`countdown-${timer.id}`));
+
+        if (!sameTimers) {
+            // Timers were added or removed - rebuild the list
+            displayActiveTimers(data);
+            return;
+        }
+
+        // Same timers - just correct the local deadlines
+        const now = Date.now();
+        timers.forEach(timer => {
+            activeTimersData[timer.id].endTime = new Date(now + timer.remaining_ms);
+        });
+        startTimerUpdates();
+    }
+
     function startTimerUpdates() {
         // Clear existing interval
         if (timerUpdateInterval) {
@@ -1553,6 +1553,7 @@
             // Remove old listeners to prevent duplicates
             voiceSocket.off('connect');
             voiceSocket.off('ai_audio_base64');
+            voiceSocket.off('ai_audio');
             voiceSocket.off('final_text');
             voiceSocket.off('recipe_results');
             voiceSocket.off('navigate_to_recipe');
@@ -1567,6 +1568,8 @@
         
         voiceSocket.on('connect', () => {
             console.log('🔗 Voice control socket connected');
+            // Ask for raw binary audio in a compact format (server falls back to base64 WAV otherwise)
+            voiceSocket.emit('audio_capabilities', { binary: true, formats: getPlayableAudioFormats() });
         });
         
         voiceSocket.on('ai_audio_base64', async (data) => {
@@ -1574,6 +1577,11 @@
             await playServerAudio(data.audio_b64);
         });
         
+        voiceSocket.on('ai_audio', async (data) => {
+            console.log('📥 Received binary TTS audio');
+            await playServerAudio(data.audio);
+        });
+        
         voiceSocket.on('final_text', (data) => {
             console.log('📝 AI Response Text:', data.text);
             // Save to conversation context
@@ -1764,8 +1772,19 @@
         return card;
     }
     
-    async function playServerAudio(audioB64) {
-        if (!audioB64 || !audioContext) {
+    function getPlayableAudioFormats() {
+        // Most compact first; the server picks the first one it can produce
+        const probe = document.createElement('audio');
+        const formats = [];
+        if (probe.canPlayType && probe.canPlayType('audio/ogg; codecs="opus"')) {
+            formats.push('opus');
+        }
+        formats.push('wav-pcm16', 'wav');
+        return formats;
+    }
+
+    async function playServerAudio(audio) {
+        if (!audio || !audioContext) {
             console.error('❌ No audio data or context');
             return;
         }
@@ -1775,11 +1794,16 @@
             updateMicButtonState('speaking');
             showVoiceNotification('🔊 Speaking...', 'success');
             
-            // Decode base64 to audio buffer
-            const binaryString = atob(audioB64);
-            const audioData = new Uint8Array(binaryString.length);
-            for (let i = 0; i < binaryString.length; i++) {
-                audioData[i] = binaryString.charCodeAt(i);
+            // Binary attachments arrive as ArrayBuffer; older servers send base64
+            let audioData;
+            if (typeof audio === 'string') {
+                const binaryString = atob(audio);
+                audioData = new Uint8Array(binaryString.length);
+                for (let i = 0; i < binaryString.length; i++) {
+                    audioData[i] = binaryString.charCodeAt(i);
+                }
+            } else {
+                audioData = new Uint8Array(audio);
             }
             
             // Resume audio context if suspended
@@ -1868,7 +1892,8 @@
         
         // Send TTS request to server
         if (voiceSocket && voiceSocket.connected) {
-            voiceSocket.emit('generate_tts', { text });
+            // High priority speech jumps the server's TTS queue as an alert
+            voiceSocket.emit('generate_tts', { text, priority: priority === 'high' ? 'alert' : 'reply' });
             console.log('📤 TTS request sent to server');
             showVoiceNotification('🎙️ Generating speech...', 'info');
         } else {
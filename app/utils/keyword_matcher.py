@@ -0,0 +1,110 @@
+"""
+Multi-pattern keyword matcher for Kitchen Assistant
+Finds every labelled keyword in a text in one pass, instead of one substring
+scan per keyword
+"""
+import re
+
+
+class KeywordMatcher:
+    """
+    Classify text by labelled keyword lists
+    All keywords are merged into one trie, compiled into a single regex and
+    tried at every word start in one scan (Aho-Corasick style). A keyword
+    only matches at the start of a word, so "cook" finds "cooking" and
+    "taco" finds "tacos", but "pita" no longer matches inside "hospital".
+    """
+
+    def __init__(self, keywords_by_label: dict):
+        """
+        Compile the matcher
+
+        Args:
+            keywords_by_label: {label: [keyword, ...]}; a keyword may appear under several labels
+        """
+        self.keywords_by_label = keywords_by_label
+
+        direct = {}
+        for label, keywords in keywords_by_label.items():
+            for keyword in keywords:
+                direct.setdefault(keyword.lower(), set()).add(label)
+
+        # The scan reports the longest keyword at each word start, so fold in
+        # the labels of every keyword that also starts a word inside it
+        # ("pad thai" is Thai via "thai", "curry" is both Indian and Thai)
+        self._labels = {}
+        for keyword in direct:
+            labels = set()
+            for other, other_labels in direct.items():
+                if any(keyword.startswith(other, start) for start in self._word_starts(keyword)):
+                    labels |= other_labels
+            self._labels[keyword] = frozenset(labels)
+
+        trie = {}
+        for keyword in direct:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self._pattern = re.compile(r'(?<!\w)(?=(' + self._trie_regex(trie) + '))') if trie else None
+
+    @staticmethod
+    def _word_starts(text):
+        """Indexes in text where a word begins"""
+        return [match.start() for match in re.finditer(r'\b\w', text)]
+
+    @classmethod
+    def _trie_regex(cls, node):
+        """Regex for a trie node; greedy, so the longest keyword at a position wins"""
+        terminal = '' in node
+        branches = [re.escape(char) + cls._trie_regex(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            body = '(?:' + body + ')?'
+        return body
+
+    def label_patterns(self):
+        """
+        One regex per label with the same word-start semantics, for matching
+        outside Python (e.g. MongoDB $regexMatch with the 'i' option)
+
+        Returns:
+            dict: {label: pattern}
+        """
+        return {
+            label: r'(?<!\w)(?:' + '|'.join(re.escape(keyword.lower()) for keyword in
+                                            sorted(keywords, key=len, reverse=True)) + ')'
+            for label, keywords in self.keywords_by_label.items() if keywords
+        }
+
+    def keywords(self, text: str):
+        """
+        Keywords found in a text
+
+        Args:
+            text: Text to scan (case-insensitive)
+
+        Returns:
+            list: Longest keyword at each word start where one begins, in order
+        """
+        if not text or self._pattern is None:
+            return []
+        return [match.group(1) for match in self._pattern.finditer(text.lower())]
+
+    def labels(self, text: str):
+        """
+        Labels with at least one keyword in a text
+
+        Args:
+            text: Text to scan (case-insensitive)
+
+        Returns:
+            set: Matching labels
+        """
+        found = set()
+        for keyword in self.keywords(text):
+            found |= self._labels[keyword]
+        return found
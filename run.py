@@ -2,12 +2,18 @@
 Kitchen Assistant AI - Main Application Entry Point
 MVC Architecture with Flask and SocketIO
 """
+import atexit
 import os
 from app import create_app, socketio
 from app.config import get_config
 from app.models.ai_model import create_ai_clients, get_ai_response_text, extract_tool_call
 from app.routes import init_routes
-from app.services.tts_service import init_tts_service
+from app.services.tts_service import init_tts_service, get_tts_service
+from app.services.phrase_bank import init_phrase_bank
+from app.models.timer_model import timer_manager
+from app.models.timer_store import TimerJournal
+from app.models.database import db
+from app.models.retention import RetentionCompactor
 
 # Get configuration based on environment
 config_name = os.getenv('FLASK_ENV', 'development')
@@ -20,8 +26,42 @@ app = create_app(config)
 groq_client, a4f_client = create_ai_clients()
 
 # Initialize TTS service with Coqui TTS
-init_tts_service(config.COQUI_TTS_URL)
-print(f"✅ TTS Service initialized with Coqui TTS at {config.COQUI_TTS_URL}")
+init_tts_service(
+    config.COQUI_TTS_URL,
+    cache_dir=config.TTS_CACHE_DIR if config.TTS_CACHE_ENABLED else None,
+    cache_max_bytes=config.TTS_CACHE_MAX_BYTES,
+    max_workers=config.TTS_MAX_WORKERS,
+    queue_limit=config.TTS_QUEUE_LIMIT,
+    backend_concurrency=config.TTS_BACKEND_CONCURRENCY,
+    coqui_urls=config.COQUI_TTS_URLS,
+    health_interval=config.TTS_HEALTH_INTERVAL
+)
+print(f"✅ TTS Service initialized with Coqui TTS at {', '.join(config.COQUI_TTS_URLS)}")
+
+# Pre-render fixed phrases in the background; timers render their alerts on creation
+if config.TTS_PHRASE_BANK_ENABLED:
+    timer_manager.set_phrase_bank(init_phrase_bank(get_tts_service()))
+    print("✅ TTS phrase bank warming in background")
+
+# Restore running kitchen timers from the journal (survives restarts and deploys)
+if config.TIMER_JOURNAL_ENABLED:
+    timer_journal = TimerJournal(config.TIMERS_DIR)
+    timer_manager.recover(timer_journal)
+    atexit.register(timer_journal.close)
+    print(f"✅ Timer journal at {timer_journal.path}")
+
+# Keep conversations and sessions bounded (one process compacts at a time)
+if config.RETENTION_ENABLED:
+    retention = RetentionCompactor(
+        db,
+        retention_days=config.CONVERSATION_RETENTION_DAYS,
+        session_idle_minutes=config.SESSION_IDLE_MINUTES,
+        interval=config.RETENTION_INTERVAL
+    )
+    retention.start()
+    atexit.register(retention.stop)
+    print(f"✅ Retention: archive after {config.CONVERSATION_RETENTION_DAYS} days, "
+          f"close sessions idle {config.SESSION_IDLE_MINUTES} min")
 
 # Create wrapper functions for routes (inject groq_client dependency)
 def ai_response_wrapper(command, chat_history):
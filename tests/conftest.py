@@ -13,6 +13,9 @@ from app import create_app, socketio
 from app.config import TestingConfig
 from app.models.database import db
 
+# Point the shared handler at the test database before anything connects
+db.configure(TestingConfig)
+
 
 @pytest.fixture(scope='session')
 def app():
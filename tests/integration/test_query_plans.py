@@ -0,0 +1,133 @@
+"""
+Integration tests for index usage
+Runs explain() on every hot query and fails on a collection scan or an
+in-memory sort. Needs a running MongoDB.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.config import Config
+from app.models.database import db
+
+
+def plan_stages(plan):
+    """Yield every stage name in a query plan tree"""
+    yield plan.get('stage')
+    for child in plan.get('inputStages', []) + [plan[key] for key in ('inputStage', 'queryPlan') if key in plan]:
+        yield from plan_stages(child)
+
+
+def winning_stages(cursor):
+    """Stages of the winning plan for a find cursor"""
+    return list(plan_stages(cursor.explain()['queryPlanner']['winningPlan']))
+
+
+def assert_uses_index(cursor):
+    """Fail when the winning plan scans the collection or sorts in memory"""
+    stages = winning_stages(cursor)
+    assert 'COLLSCAN' not in stages, f"Collection scan: {stages}"
+    assert 'SORT' not in stages, f"In-memory sort: {stages}"
+    # MongoDB 8 reports single-document lookups on a unique index as EXPRESS_IXSCAN
+    assert any(stage and stage.endswith('IXSCAN') for stage in stages), f"No index used: {stages}"
+
+
+@pytest.fixture(scope='module')
+def seeded_db():
+    """Indexes plus enough documents for the planner to have a real choice"""
+    if db.db_name == Config.MONGODB_DB_NAME:
+        pytest.skip("Refusing to seed the application database (see TestingConfig.MONGODB_DB_NAME)")
+    if not db.client:
+        pytest.skip("MongoDB not available")
+    db.ensure_indexes()
+    now = datetime.now(timezone.utc)
+    collections = [db.conversations, db.sessions, db.favorites, db.video_notes]
+    for collection in collections:
+        collection.delete_many({})
+
+    for u in range(20):
+        user_id = f"user{u}"
+        db.conversations.insert_many([
+            {'user_id': user_id, 'session_id': f"s{u}", 'role': 'user', 'content': str(i),
+             'timestamp': now + timedelta(seconds=i)}
+            for i in range(10)
+        ])
+        db.sessions.insert_one({'session_id': f"s{u}", 'user_id': user_id, 'created_at': now})
+        db.favorites.insert_many([
+            {'user_id': user_id, 'recipe_id': str(r), 'created_at': now + timedelta(seconds=r)}
+            for r in range(5)
+        ])
+        db.video_notes.insert_many([
+            {'user_id': user_id, 'video_id': f"v{v}", 'updated_at': now + timedelta(seconds=v)}
+            for v in range(5)
+        ])
+
+    yield db
+
+    for collection in collections:
+        collection.delete_many({})
+
+
+class TestQueryPlans:
+    """Every hot query must be served by an index"""
+
+    def test_user_conversations(self, seeded_db):
+        """get_user_conversations: user_id, newest first"""
+        assert_uses_index(seeded_db.conversations.find({'user_id': 'user3'}).sort('timestamp', -1).limit(50))
+    
+    def test_user_conversations_keyset_page(self, seeded_db):
+        """get_user_conversations with a cursor: (timestamp, _id) keyset, no in-memory sort"""
+        last = seeded_db.conversations.find({'user_id': 'user3'}).sort([('timestamp', -1), ('_id', -1)])[4]
+        cursor = seeded_db.iter_user_conversations('user3', limit=5, before=(last['timestamp'], last['_id']),
+                                                   fields=seeded_db.CONVERSATION_LIST_FIELDS)
+        assert_uses_index(cursor)
+
+    def test_session_conversations(self, seeded_db):
+        """get_session_conversations: session_id, oldest first"""
+        assert_uses_index(seeded_db.conversations.find({'session_id': 's3'}).sort('timestamp', 1))
+
+    def test_expired_conversations(self, seeded_db):
+        """Retention: oldest messages before the cutoff"""
+        cutoff = datetime.now(timezone.utc)
+        assert_uses_index(seeded_db.conversations.find({'timestamp': {'$lt': cutoff}}).sort('timestamp', 1).limit(500))
+    
+    def test_idle_sessions(self, seeded_db):
+        """Retention: active sessions idle past the cutoff"""
+        assert_uses_index(seeded_db.sessions.find({'is_active': True, 'last_activity': {'$lt': datetime.now(timezone.utc)}}))
+    
+    def test_user_sessions(self, seeded_db):
+        """get_user_sessions: user_id, newest first"""
+        assert_uses_index(seeded_db.sessions.find({'user_id': 'user3'}).sort('created_at', -1))
+
+    def test_session_lookup(self, seeded_db):
+        """Session activity updates: session_id"""
+        assert_uses_index(seeded_db.sessions.find({'session_id': 's3'}))
+
+    def test_favorite_lookup(self, seeded_db):
+        """Favorite check/add/remove: user_id + recipe_id"""
+        assert_uses_index(seeded_db.favorites.find({'user_id': 'user3', 'recipe_id': '2'}))
+
+    def test_favorites_list(self, seeded_db):
+        """Favorites page: user_id, newest first"""
+        assert_uses_index(seeded_db.favorites.find({'user_id': 'user3'}).sort('created_at', -1))
+
+    def test_video_note_lookup(self, seeded_db):
+        """Video note get/save/delete: user_id + video_id"""
+        assert_uses_index(seeded_db.video_notes.find({'user_id': 'user3', 'video_id': 'v2'}))
+
+    def test_video_notes_list(self, seeded_db):
+        """All notes: user_id, most recently edited first"""
+        assert_uses_index(seeded_db.video_notes.find({'user_id': 'user3'}).sort('updated_at', -1))
+
+    def test_favorites_are_unique(self, seeded_db):
+        """Test the favorites upsert key is enforced"""
+        result = seeded_db.favorites.update_one(
+            {'user_id': 'user3', 'recipe_id': '2'},
+            {'$setOnInsert': {'created_at': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+        assert result.upserted_id is None
+        assert seeded_db.favorites.count_documents({'user_id': 'user3', 'recipe_id': '2'}) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
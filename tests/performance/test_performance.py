@@ -3,6 +3,7 @@ Performance Testing Suite
 Evaluates speed, responsiveness, and stability under various conditions
 """
 import pytest
+import os
 import time
 from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock
@@ -165,6 +166,146 @@ class TestTimerAccuracy:
             timer_manager.delete_timer(timer_id)
 
 
+class TestTimerSchedulerScaling:
+    """Test suite for many concurrent timers on the deadline scheduler"""
+    
+    def test_10k_timers_flat_cpu_and_memory(self):
+        """Test 10k pending timers cost one thread, little memory and no idle CPU"""
+        import threading
+        import tracemalloc
+        from app.models.timer_model import TimerManager
+        
+        manager = TimerManager()
+        threads_before = threading.active_count()
+        tracemalloc.start()
+        
+        start_time = time.time()
+        for i in range(10000):
+            manager.create_timer(duration_minutes=30 + i % 60, timer_name=f"Timer {i}")
+        create_time = time.time() - start_time
+        
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        cpu_before = time.process_time()
+        time.sleep(1.0)
+        idle_cpu = time.process_time() - cpu_before
+        
+        print(f"\n10k timers: created in {create_time * 1000:.0f}ms, "
+              f"{memory / 10000:.0f} bytes/timer, {idle_cpu * 1000:.1f}ms CPU idle for 1s, "
+              f"{threading.active_count() - threads_before} extra thread(s)")
+        
+        assert threading.active_count() - threads_before <= 1, "Timers should share one scheduler thread"
+        assert memory / 10000 < 4096, "Each pending timer should cost a few KB at most"
+        assert idle_cpu < 0.1, "Pending timers should not burn CPU while waiting"
+        assert create_time < 5.0, f"Creating 10k timers took {create_time:.2f}s (should be < 5s)"
+        manager.active_timers.clear()
+    
+    def test_10k_timers_fire_together(self):
+        """Test 10k timers due at the same moment are all delivered promptly"""
+        import threading
+        from app.models.timer_model import TimerManager
+        
+        class CountingSocketIO:
+            def __init__(self):
+                self.finished = 0
+                self.done = threading.Event()
+            
+            def emit(self, event, data=None, **kwargs):
+                if event == 'timer_finished':
+                    self.finished += 1
+                    if self.finished == 10000:
+                        self.done.set()
+        
+        manager = TimerManager()
+        socketio = CountingSocketIO()
+        manager.set_socketio(socketio)
+        
+        start_time = time.time()
+        for i in range(10000):
+            manager.create_timer(duration_minutes=1 / 60, timer_name=f"Timer {i}", owner=f"user:{i % 1000}")
+        
+        assert socketio.done.wait(10), f"Only {socketio.finished}/10000 timers fired"
+        total_time = time.time() - start_time
+        
+        print(f"\n10k one-second timers all fired after {total_time:.2f}s")
+        assert manager.active_timers == {}
+
+
+class TestTimerTraffic:
+    """Test suite for timer socket traffic"""
+    
+    def _events_per_minute(self, resync_interval, timers=50, owners=10, window=3.0):
+        """Count timer events emitted while timers are running, scaled to a minute"""
+        import threading
+        from app.models.timer_model import TimerManager
+        
+        class CountingSocketIO:
+            def __init__(self):
+                self.count = 0
+                self.lock = threading.Lock()
+            
+            def emit(self, event, data=None, **kwargs):
+                with self.lock:
+                    self.count += 1
+        
+        manager = TimerManager(resync_interval=resync_interval)
+        socketio = CountingSocketIO()
+        manager.set_socketio(socketio)
+        for i in range(timers):
+            manager.create_timer(duration_minutes=10, timer_name=f"Timer {i}", owner=f"user:{i % owners}")
+        
+        socketio.count = 0
+        time.sleep(window)
+        steady = socketio.count / window * 60
+        
+        # Resync frames are too rare to land in a short window; add them analytically
+        if resync_interval:
+            steady += owners * 60 / resync_interval
+        manager.active_timers.clear()
+        return steady
+    
+    def test_deadline_protocol_cuts_traffic(self):
+        """Test coalesced resync frames replace per-second ticks"""
+        legacy = self._events_per_minute(resync_interval=0)
+        deadline = self._events_per_minute(resync_interval=60)
+        
+        print(f"\n50 timers / 10 users: {legacy:.0f} events/min with ticks, "
+              f"{deadline:.0f} events/min with deadlines ({legacy / deadline:.0f}x less)")
+        
+        assert legacy >= 50 * 60 * 0.9, "Legacy mode should tick every timer every second"
+        assert deadline * 50 <= legacy, "Deadline protocol should cut timer traffic by well over an order of magnitude"
+
+
+class TestTimerRecoveryPerformance:
+    """Test suite for restoring timers from the journal"""
+    
+    def test_replay_scales_linearly(self, tmp_path):
+        """Test startup replay stays fast as the journal grows"""
+        from datetime import datetime, timedelta
+        from app.models.timer_model import TimerManager
+        from app.models.timer_store import TimerJournal
+        
+        end_time = (datetime.now() + timedelta(hours=1)).timestamp()
+        for count in (1000, 10000, 100000):
+            directory = str(tmp_path / str(count))
+            journal = TimerJournal(directory)
+            for i in range(1, count + 1):
+                journal.append({"op": "create", "id": i, "name": f"Timer {i}", "duration_minutes": 60,
+                                "end_time": end_time, "created_at": end_time - 3600, "owner": f"user:{i % 1000}"})
+            journal.close()
+            
+            manager = TimerManager()
+            start = time.perf_counter()
+            restored = manager.recover(TimerJournal(directory))
+            elapsed = time.perf_counter() - start
+            manager.active_timers.clear()
+            
+            print(f"\nReplayed {count} timers in {elapsed * 1000:.0f}ms")
+            assert restored == count
+            assert elapsed < count / 10000  # Under 100ms per 1k timers
+
+
 class TestConversionPerformance:
     """Test suite for unit conversion performance"""
     
@@ -270,6 +411,115 @@ class TestDatabasePerformance:
         assert total_time < 5.0, f"Saving 10 conversations took {total_time:.2f}s (should be < 5s)"
 
 
+class TestUserStatsAggregation:
+    """Test suite for computing profile statistics inside MongoDB"""
+    
+    def test_aggregate_vs_python_path(self):
+        """Test the aggregation path matches the Python path and is faster on a long history"""
+        from datetime import timedelta, timezone
+        from app.models.database import db
+        
+        if not db.client:
+            pytest.skip("MongoDB not available")
+        user_id = "perf_stats_user"
+        db.conversations.delete_many({'user_id': user_id})
+        now = datetime.now(timezone.utc)
+        db.conversations.insert_many([
+            {'user_id': user_id, 'session_id': 'perf_stats', 'role': 'user' if i % 2 == 0 else 'assistant',
+             'content': f"How do I cook {'pasta' if i % 3 else 'chicken curry'}? " * 5,
+             'timestamp': now - timedelta(minutes=10 * i), 'metadata': {}}
+            for i in range(5000)
+        ])
+        
+        try:
+            start = time.perf_counter()
+            python_stats = db.compute_user_stats(user_id)
+            python_time = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            aggregated = db.aggregate_user_stats(user_id)
+            aggregate_time = time.perf_counter() - start
+        finally:
+            db.conversations.delete_many({'user_id': user_id})
+        
+        print(f"\nStats over 5000 messages: python {python_time * 1000:.0f}ms, "
+              f"aggregate {aggregate_time * 1000:.0f}ms")
+        for field in ('total_messages', 'user_questions', 'ai_responses', 'recipes_cooked',
+                      'cuisines', 'streak', 'last_active_day'):
+            assert aggregated[field] == python_stats[field], field
+        assert aggregate_time < python_time
+
+
+class TestConversationWriteBehind:
+    """Test suite for taking conversation persistence off the response path"""
+    
+    def test_queued_writes_do_not_block_commands(self, monkeypatch):
+        """Test queuing a command's writes is far cheaper than three round trips"""
+        from unittest.mock import MagicMock
+        from app.models.database import db
+        
+        round_trip = 0.005  # Simulated MongoDB latency per call
+        slow = MagicMock(side_effect=lambda *args, **kwargs: time.sleep(round_trip))
+        collection = MagicMock(insert_one=slow, insert_many=slow, update_one=slow, bulk_write=slow)
+        db.flush_writes()
+        monkeypatch.setattr(db, 'conversations', collection)
+        monkeypatch.setattr(db, 'sessions', collection)
+        monkeypatch.setattr(db, 'user_stats', collection)
+        commands = 50
+        
+        start = time.perf_counter()
+        for i in range(commands):
+            db.save_conversation("perf_user", "perf_session", {"role": "user", "content": f"q{i}"})
+            db.save_conversation("perf_user", "perf_session", {"role": "assistant", "content": f"a{i}"})
+            db.update_session_activity("perf_session")
+        blocking = (time.perf_counter() - start) / commands
+        
+        slow.reset_mock()
+        start = time.perf_counter()
+        for i in range(commands):
+            db.queue_conversation("perf_user", "perf_session", {"role": "user", "content": f"q{i}"})
+            db.queue_conversation("perf_user", "perf_session", {"role": "assistant", "content": f"a{i}"})
+            db.touch_session("perf_session")
+        queued = (time.perf_counter() - start) / commands
+        db.flush_writes()
+        
+        print(f"\nPer-command persistence: {blocking * 1000:.2f}ms blocking, {queued * 1000:.3f}ms queued; "
+              f"{commands * 3} writes flushed in {slow.call_count} round trips")
+        assert queued * 20 < blocking
+        assert slow.call_count <= 6  # messages, session activity and user stats, per flush
+
+
+class TestUserLoaderCache:
+    """Test suite for MongoDB reads behind Flask-Login's user_loader"""
+    
+    def test_mongo_reads_per_request(self, monkeypatch):
+        """Test cached loading turns one find_one per request into one per TTL"""
+        from bson.objectid import ObjectId
+        from app.models import user_model
+        from app.models.user_model import User, get_user_cache_stats
+        
+        doc = {'_id': ObjectId(), 'username': 'perf_cached', 'email': 'perf_cached@test.com'}
+        reads = []
+        monkeypatch.setattr(user_model.db, 'get_user_by_id', lambda user_id: reads.append(user_id) or doc)
+        user_model._user_cache.clear()
+        requests_served = 200
+        
+        for _ in range(requests_served):
+            User.get_by_id(str(doc['_id']))
+        uncached_reads = len(reads)
+        
+        reads.clear()
+        for _ in range(requests_served):
+            User.load(str(doc['_id']))
+        cached_reads = len(reads)
+        
+        print(f"\nMongoDB reads per request: {uncached_reads / requests_served:.2f} uncached, "
+              f"{cached_reads / requests_served:.3f} cached ({get_user_cache_stats()})")
+        user_model._user_cache.clear()
+        assert uncached_reads == requests_served
+        assert cached_reads == 1
+
+
 class TestAPIIntegrationPerformance:
     """Test suite for external API integration performance"""
     
@@ -304,6 +554,124 @@ class TestAPIIntegrationPerformance:
         assert search_time < 2.0, f"Wikipedia search took {search_time:.2f}s (should be < 2s)"
 
 
+class TestYouTubeSearchConcurrency:
+    """Test suite for parallel YouTube searches"""
+    
+    def test_parallel_searches_scale(self):
+        """Test N parallel searches overlap instead of serializing on shared state"""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.services.youtube_client import YouTubeSearchClient
+        from tests.unit.test_youtube_client import fake_youtube
+        
+        latency = 0.05
+        client = YouTubeSearchClient(transport=fake_youtube(latency=latency))
+        
+        for n in (1, 4, 16):
+            queries = [f"recipe {i}" for i in range(n)]
+            start_time = time.time()
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                results = list(pool.map(lambda q: client.search(q, limit=1), queries))
+            total_time = time.time() - start_time
+            
+            print(f"\n{n} parallel searches: {total_time * 1000:.0f}ms "
+                  f"({n / total_time:.0f} searches/s)")
+            
+            assert [r['result'][0]['title'] for r in results] == [f"{q} #0" for q in queries]
+            assert total_time < latency * 4, f"{n} parallel searches took {total_time:.2f}s (should overlap)"
+
+
+class TestAudioTransportPerformance:
+    """Test suite for spoken reply transport overhead"""
+    
+    def _encode(self, data):
+        from socketio import packet
+        pkt = packet.Packet(packet.EVENT, data=['ai_audio', data], namespace='/')
+        encoded = pkt.encode()
+        if isinstance(encoded, list):
+            return sum(len(part) for part in encoded)
+        return len(encoded)
+    
+    def test_binary_transport_smaller_than_base64(self):
+        """Test binary attachments avoid the 33% base64 overhead"""
+        import base64
+        audio = os.urandom(200 * 1024)
+        
+        start_time = time.time()
+        for _ in range(20):
+            base64_size = self._encode({'audio_b64': base64.b64encode(audio).decode('ascii'), 'mime': 'audio/wav'})
+        base64_time = time.time() - start_time
+        
+        start_time = time.time()
+        for _ in range(20):
+            binary_size = self._encode({'audio': audio, 'mime': 'audio/wav'})
+        binary_time = time.time() - start_time
+        
+        print(f"\nbase64: {base64_size} bytes, {base64_time * 50:.2f}ms/reply; "
+              f"binary: {binary_size} bytes, {binary_time * 50:.2f}ms/reply")
+        
+        assert binary_size < base64_size * 0.8, "Binary transport should save ~25% on the wire"
+        assert binary_size - len(audio) < 200, "Binary framing overhead should be negligible"
+
+
+class TestTTSTextCleaningPerformance:
+    """Test suite for TTS text cleaning overhead"""
+    
+    def test_clean_text_speedup(self):
+        """Test the precompiled cleaner beats the re.sub reference per call"""
+        import timeit
+        from app.services.tts_service import TTSService
+        from tests.unit.test_tts_service import legacy_clean_text_for_tts
+        
+        tts = TTSService()
+        reply = ("## Perfect Pasta\n\nHere's a **quick** recipe for *garlic* pasta:\n\n"
+                 "1. Boil water with `salt`.\n2. Cook the pasta for 8 minutes.\n"
+                 "3. Saute garlic in olive oil - don't burn it!\n\n"
+                 "Watch: https://youtube.com/watch?v=abc123\nEnjoy your meal!")
+        
+        legacy_time = min(timeit.repeat(lambda: legacy_clean_text_for_tts(reply), number=2000, repeat=3))
+        new_time = min(timeit.repeat(lambda: tts._clean_text_for_tts(reply), number=2000, repeat=3))
+        
+        print(f"\nclean_text_for_tts: {legacy_time / 2:.3f}ms -> {new_time / 2:.3f}ms per call "
+              f"({legacy_time / new_time:.1f}x)")
+        
+        assert tts._clean_text_for_tts(reply) == legacy_clean_text_for_tts(reply)
+        assert new_time < legacy_time, "Precompiled cleaner should be faster than re.sub calls"
+
+
+class TestKeywordClassificationPerformance:
+    """Test suite for cuisine and activity classification over long histories"""
+    
+    def test_10k_message_history(self):
+        """Test the one-pass matcher beats per-keyword substring scans on 10k messages"""
+        import random
+        import timeit
+        from app.models.user_stats import CLASSIFIER, CUISINE_KEYWORDS, RECIPE_KEYWORDS
+        
+        random.seed(42)
+        vocabulary = ("how do i make a quick pasta dinner with garlic and some chicken curry "
+                      "tonight please tell me the steps for baking bread sushi or tacos").split()
+        history = [' '.join(random.choice(vocabulary) for _ in range(random.randint(5, 40)))
+                   for _ in range(10000)]
+        
+        def nested_scans():
+            for text in history:
+                content = text.lower()
+                [cuisine for cuisine, keywords in CUISINE_KEYWORDS.items() if any(k in content for k in keywords)]
+                any(k in content for k in RECIPE_KEYWORDS)
+        
+        def one_pass():
+            for text in history:
+                CLASSIFIER.labels(text)
+        
+        nested_time = min(timeit.repeat(nested_scans, number=1, repeat=3))
+        matcher_time = min(timeit.repeat(one_pass, number=1, repeat=3))
+        
+        print(f"\nClassify 10k messages: {nested_time * 1000:.0f}ms -> {matcher_time * 1000:.0f}ms "
+              f"({nested_time / matcher_time:.1f}x)")
+        
+        assert matcher_time < nested_time, "One-pass matcher should beat nested substring scans"
+
+
 class TestConcurrentRequests:
     """Test suite for concurrent request handling"""
 
@@ -0,0 +1,67 @@
+"""
+Unit tests for the TTL cache utility
+"""
+import pytest
+from unittest.mock import patch
+from app.utils.cache import TTLCache
+
+
+class TestTTLCache:
+    """Test suite for TTLCache"""
+    
+    def test_set_and_get(self):
+        """Test stored values are returned"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set('key', {'value': 1})
+        
+        assert cache.get('key') == {'value': 1}
+        assert cache.get('missing') is None
+        assert cache.get('missing', 'default') == 'default'
+    
+    def test_entries_expire(self):
+        """Test entries are dropped after their TTL"""
+        cache = TTLCache(ttl_seconds=10)
+        with patch('app.utils.cache.time.monotonic', return_value=100.0):
+            cache.set('key', 'value')
+        with patch('app.utils.cache.time.monotonic', return_value=109.0):
+            assert cache.get('key') == 'value'
+        with patch('app.utils.cache.time.monotonic', return_value=110.0):
+            assert cache.get('key') is None
+        assert len(cache) == 0
+    
+    def test_per_entry_ttl(self):
+        """Test a per-entry TTL overrides the default"""
+        cache = TTLCache(ttl_seconds=10)
+        with patch('app.utils.cache.time.monotonic', return_value=100.0):
+            cache.set('short', 'value', ttl_seconds=1)
+        with patch('app.utils.cache.time.monotonic', return_value=102.0):
+            assert cache.get('short') is None
+    
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted at capacity"""
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+    
+    def test_invalidate_and_stats(self):
+        """Test invalidation and hit/miss accounting"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.invalidate('a')
+        cache.get('a')
+        
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
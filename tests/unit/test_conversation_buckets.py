@@ -0,0 +1,117 @@
+"""
+Unit tests for bucketed conversation storage
+"""
+from datetime import datetime, timedelta, timezone
+from app.models import conversation_buckets
+
+DAY = 86400
+START = datetime(2026, 10, 19, 9, tzinfo=timezone.utc)
+
+
+def message(index, session_id="s1", minutes=None):
+    """Conversation document index minutes after START"""
+    return {'_id': f"m{index:03d}", 'user_id': "user1", 'session_id': session_id, 'role': "user",
+            'content': f"message {index}", 'timestamp': START + timedelta(minutes=index if minutes is None else minutes),
+            'metadata': {}}
+
+
+def bucket(messages):
+    """Bucket document holding messages of one session"""
+    return {'user_id': messages[0]['user_id'], 'session_id': messages[0]['session_id'],
+            'first_at': messages[0]['timestamp'], 'last_at': messages[-1]['timestamp'],
+            'messages': [{field: m[field] for field in conversation_buckets.MESSAGE_FIELDS} for m in messages]}
+
+
+class TestBucketUpdates:
+    """Test suite for build_bucket_updates"""
+
+    def test_window_start_is_aligned(self):
+        """Test timestamps fall into fixed windows"""
+        assert conversation_buckets.window_start(START, DAY) == datetime(2026, 10, 19, tzinfo=timezone.utc)
+        assert conversation_buckets.window_start(START.replace(tzinfo=None), 3600) == START
+
+    def test_one_upsert_per_session_window(self):
+        """Test a turn's messages become a single $push"""
+        updates = conversation_buckets.build_bucket_updates([message(0), message(1)], 100, DAY)
+
+        assert len(updates) == 1
+        operation, chunk = updates[0]
+        assert operation._filter == {'session_id': "s1", 'window_start': datetime(2026, 10, 19, tzinfo=timezone.utc),
+                                     'count': {'$lte': 98}}
+        assert operation._doc['$push']['messages']['$slice'] == -100
+        assert [entry['_id'] for entry in operation._doc['$push']['messages']['$each']] == ["m000", "m001"]
+        assert 'user_id' not in operation._doc['$push']['messages']['$each'][0]
+        assert operation._doc['$inc'] == {'count': 2}
+        assert len(chunk) == 2
+
+    def test_groups_by_session_and_window(self):
+        """Test sessions and windows get separate buckets"""
+        messages = [message(0), message(1, session_id="s2"), message(2, minutes=24 * 60)]
+
+        updates = conversation_buckets.build_bucket_updates(messages, 100, DAY)
+
+        assert len(updates) == 3
+
+    def test_large_batch_is_split_to_fit(self):
+        """Test no chunk is larger than a bucket"""
+        updates = conversation_buckets.build_bucket_updates([message(i) for i in range(25)], 10, DAY)
+
+        assert [len(chunk) for _, chunk in updates] == [10, 10, 5]
+        assert updates[0][0]._filter['count'] == {'$lte': 0}
+
+    def test_missing_ids_are_assigned(self):
+        """Test messages get an _id before they are pushed"""
+        new = message(0)
+        del new['_id']
+
+        conversation_buckets.build_bucket_updates([new], 100, DAY)
+
+        assert new['_id']
+
+
+class TestBucketPages:
+    """Test suite for page_from_buckets"""
+
+    def test_messages_are_unwound_with_owner(self):
+        """Test unwound messages carry the bucket's user and session"""
+        unwound = list(conversation_buckets.unwind(bucket([message(0)])))
+
+        assert unwound[0]['user_id'] == "user1"
+        assert unwound[0]['session_id'] == "s1"
+
+    def test_page_merges_overlapping_buckets(self):
+        """Test a page interleaves messages of concurrent sessions, newest first"""
+        s1 = bucket([message(i) for i in range(0, 10, 2)])
+        s2 = bucket([message(i, session_id="s2") for i in range(1, 10, 2)])
+
+        page = conversation_buckets.page_from_buckets([s2, s1], limit=4)
+
+        assert [m['_id'] for m in page] == ["m009", "m008", "m007", "m006"]
+
+    def test_page_continues_after_cursor(self):
+        """Test the next page starts strictly after the cursor"""
+        buckets = [bucket([message(i) for i in range(5, 10)]), bucket([message(i) for i in range(5)])]
+        last = message(6)
+
+        page = conversation_buckets.page_from_buckets(buckets, limit=3, before=(last['timestamp'], last['_id']))
+
+        assert [m['_id'] for m in page] == ["m005", "m004", "m003"]
+
+    def test_older_buckets_are_not_read(self):
+        """Test reading stops once the page can't get newer messages"""
+        newest = bucket([message(i) for i in range(10, 20)])
+
+        def buckets():
+            yield newest
+            yield bucket([message(i) for i in range(10)])
+            raise AssertionError("read past the page")
+
+        page = conversation_buckets.page_from_buckets(buckets(), limit=5)
+
+        assert len(page) == 5
+
+    def test_projection(self):
+        """Test fields limits what each message returns"""
+        page = conversation_buckets.page_from_buckets([bucket([message(0)])], limit=1, fields={'content': 1})
+
+        assert set(page[0]) == {'_id', 'content'}
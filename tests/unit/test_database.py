@@ -3,7 +3,10 @@ Unit tests for Database operations
 Tests MongoDB operations, CRUD functions, and data integrity
 """
 import pytest
-from app.models.database import db
+import time
+from unittest.mock import MagicMock, patch
+from pymongo.errors import BulkWriteError
+from app.models.database import Database, db
 from datetime import datetime, timezone
 
 
@@ -22,6 +25,56 @@ class TestDatabaseConnection:
         assert db.sessions is not None
 
 
+class TestLazyConnection:
+    """Test suite for lazy, config-driven connections"""
+    
+    def test_construction_does_not_connect(self):
+        """Test creating the handler opens no client and builds no indexes"""
+        with patch('app.models.database.MongoClient') as mock_client:
+            database = Database()
+            
+            assert not database.is_connected()
+            mock_client.assert_not_called()
+    
+    def test_first_use_connects_once_with_pool_settings(self):
+        """Test the first collection access creates one pooled client"""
+        config = {'MONGODB_URI': 'mongodb://example:27017/', 'MONGODB_DB_NAME': 'kitchen_test',
+                  'MONGODB_MAX_POOL_SIZE': 7, 'MONGODB_SERVER_SELECTION_TIMEOUT_MS': 1234}
+        with patch('app.models.database.MongoClient') as mock_client:
+            database = Database(config)
+            
+            database.users
+            database.conversations
+            
+            mock_client.assert_called_once()
+            args, kwargs = mock_client.call_args
+            assert args == ('mongodb://example:27017/',)
+            assert kwargs['maxPoolSize'] == 7
+            assert kwargs['serverSelectionTimeoutMS'] == 1234
+            mock_client.return_value.__getitem__.assert_called_once_with('kitchen_test')
+            mock_client.return_value.__getitem__.return_value.create_index.assert_not_called()
+    
+    def test_configure_reconnects_with_new_settings(self):
+        """Test reconfiguring closes the old client"""
+        with patch('app.models.database.MongoClient') as mock_client:
+            database = Database()
+            database.client
+            
+            database.configure({'MONGODB_URI': 'mongodb://other:27017/'})
+            
+            mock_client.return_value.close.assert_called_once()
+            assert not database.is_connected()
+    
+    def test_ensure_indexes_is_explicit(self):
+        """Test ensure_indexes builds every index in INDEXES"""
+        with patch('app.models.database.MongoClient'):
+            database = Database()
+            
+            created = database.ensure_indexes()
+            
+            assert created == sum(len(specs) for specs in Database.INDEXES.values())
+
+
 class TestUserOperations:
     """Test suite for user CRUD operations"""
     
@@ -156,6 +209,268 @@ class TestSessionOperations:
         assert len(sessions) >= 2
 
 
+@pytest.fixture
+def buffered_db(monkeypatch):
+    """Global database with mocked collections, for write-behind tests"""
+    db.flush_writes()
+    monkeypatch.setattr(db, 'conversations', MagicMock())
+    monkeypatch.setattr(db, 'sessions', MagicMock())
+    monkeypatch.setattr(db, 'user_stats', MagicMock())
+    monkeypatch.setattr(db, 'write_batch_size', 100)
+    yield db
+    db._pending_messages.clear()
+    db._pending_activity.clear()
+
+
+class TestWriteBehindBuffer:
+    """Test suite for batched conversation persistence"""
+    
+    def test_messages_are_batched_in_order(self, buffered_db):
+        """Test queued messages go out in a single ordered insert_many"""
+        buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": "hi"})
+        buffered_db.queue_conversation("user1", "s1", {"role": "assistant", "content": "hello"})
+        
+        written = buffered_db.flush_writes()
+        
+        assert written == 2
+        buffered_db.conversations.insert_many.assert_called_once()
+        batch = buffered_db.conversations.insert_many.call_args[0][0]
+        assert [m['content'] for m in batch] == ["hi", "hello"]
+        assert batch[0]['timestamp'] <= batch[1]['timestamp']
+        buffered_db.conversations.insert_one.assert_not_called()
+    
+    def test_session_activity_is_coalesced(self, buffered_db):
+        """Test repeated activity for a session becomes one update"""
+        for _ in range(5):
+            buffered_db.touch_session("s1")
+        buffered_db.touch_session("s2")
+        
+        buffered_db.flush_writes()
+        
+        operations = buffered_db.sessions.bulk_write.call_args[0][0]
+        assert sorted(op._filter['session_id'] for op in operations) == ["s1", "s2"]
+        buffered_db.sessions.update_one.assert_not_called()
+    
+    def test_full_batch_flushes_promptly(self, buffered_db, monkeypatch):
+        """Test reaching the batch size wakes the flusher"""
+        monkeypatch.setattr(buffered_db, 'write_batch_size', 4)
+        for i in range(4):
+            buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": str(i)})
+        
+        deadline = time.monotonic() + 0.5
+        while not buffered_db.conversations.insert_many.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        assert buffered_db.conversations.insert_many.called
+    
+    def test_failed_batch_is_retried(self, buffered_db):
+        """Test messages survive a failed flush"""
+        buffered_db.conversations.insert_many.side_effect = [Exception("down"), None]
+        buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": "hi"})
+        
+        assert buffered_db.flush_writes() == 0
+        assert buffered_db.get_write_stats()['pending_messages'] == 1
+        assert buffered_db.flush_writes() == 1
+        assert buffered_db.get_write_stats()['pending_messages'] == 0
+    
+    def test_batch_applied_before_error_is_not_stuck(self, buffered_db):
+        """Test a retry of an insert the server already applied counts duplicates as written"""
+        def applied_then_timeout(messages, ordered):
+            for index, message in enumerate(messages):
+                message['_id'] = f"m{index}"
+            raise Exception("timed out")
+        
+        def duplicates(messages, ordered):
+            raise BulkWriteError({'nInserted': 0, 'writeErrors': [
+                {'index': index, 'code': 11000} for index in range(len(messages))]})
+        
+        attempts = [applied_then_timeout, duplicates]
+        buffered_db.conversations.insert_many.side_effect = lambda *args, **kwargs: attempts.pop(0)(*args, **kwargs)
+        buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": "hi"})
+        buffered_db.queue_conversation("user1", "s1", {"role": "assistant", "content": "hello"})
+        
+        assert buffered_db.flush_writes() == 0
+        assert buffered_db.flush_writes() == 2
+        assert buffered_db.get_write_stats()['pending_messages'] == 0
+        assert buffered_db.conversations.insert_many.call_args[1] == {'ordered': False}
+    
+    def test_only_failed_messages_are_retried(self, buffered_db):
+        """Test one failed message doesn't hold back the rest of the batch"""
+        buffered_db.conversations.insert_many.side_effect = BulkWriteError({'nInserted': 2, 'writeErrors': [
+            {'index': 1, 'code': 2}]})
+        for content in ("a", "b", "c"):
+            buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": content})
+        
+        assert buffered_db.flush_writes() == 2
+        assert [m['content'] for m in buffered_db._pending_messages] == ["b"]
+    
+    def test_flush_updates_user_stats(self, buffered_db):
+        """Test written messages are folded into one stats update per user and day"""
+        buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": "pasta"})
+        buffered_db.queue_conversation("user1", "s1", {"role": "assistant", "content": "sure"})
+        
+        buffered_db.flush_writes()
+        
+        operations = buffered_db.user_stats.bulk_write.call_args[0][0]
+        assert len(operations) == 1
+        assert operations[0]._filter == {'user_id': "user1"}
+    
+    def test_stats_rebuild_is_serialized_with_flushes(self, buffered_db):
+        """Test a rebuild flushes first and replaces the document while no flush can run"""
+        buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": "pasta"})
+        buffered_db.conversations.find.return_value.sort.return_value = []
+        buffered_db.user_stats.replace_one.side_effect = lambda *args, **kwargs: locked.append(
+            buffered_db._flush_lock.locked())
+        locked = []
+        
+        buffered_db.rebuild_user_stats("user1")
+        
+        buffered_db.conversations.insert_many.assert_called_once()
+        assert locked == [True]
+        assert not buffered_db._flush_lock.locked()
+    
+    def test_reads_see_queued_messages(self, buffered_db):
+        """Test history reads flush the buffer first"""
+        buffered_db.queue_conversation("user1", "s1", {"role": "user", "content": "hi"})
+        
+        buffered_db.get_session_conversations("s1")
+        
+        buffered_db.conversations.insert_many.assert_called_once()
+
+
+class TestConversationPages:
+    """Test suite for keyset-paginated conversation history"""
+    
+    def test_first_page_query(self, buffered_db):
+        """Test page 1 is a user_id range, newest first, with a projection"""
+        buffered_db.get_user_conversations("user1", limit=20, fields=Database.CONVERSATION_LIST_FIELDS)
+        
+        query, fields = buffered_db.conversations.find.call_args[0]
+        assert query == {'user_id': "user1"}
+        assert 'metadata' not in fields
+        cursor = buffered_db.conversations.find.return_value
+        cursor.sort.assert_called_once_with([('timestamp', -1), ('_id', -1)])
+        cursor.sort.return_value.limit.assert_called_once_with(20)
+    
+    def test_next_page_starts_after_cursor(self, buffered_db):
+        """Test a cursor becomes a (timestamp, _id) keyset condition"""
+        last = {'_id': "64b7f0c2a1b2c3d4e5f60718", 'timestamp': datetime(2026, 10, 1, 12, 30)}
+        with patch('app.models.database.ObjectId', side_effect=lambda value: value):
+            before = Database.decode_page_cursor(Database.encode_page_cursor(last))
+        
+        buffered_db.get_user_conversations("user1", before=before)
+        
+        query = buffered_db.conversations.find.call_args[0][0]
+        assert query['$or'] == [
+            {'timestamp': {'$lt': last['timestamp']}},
+            {'timestamp': last['timestamp'], '_id': {'$lt': last['_id']}}
+        ]
+    
+    def test_page_size_is_capped(self, buffered_db):
+        """Test huge limits can't pull the whole history in one page"""
+        buffered_db.get_user_conversations("user1", limit=10000)
+        
+        limit = buffered_db.conversations.find.return_value.sort.return_value.limit
+        limit.assert_called_once_with(Database.MAX_PAGE_SIZE)
+    
+    def test_malformed_cursor(self):
+        """Test a garbage cursor raises ValueError"""
+        with pytest.raises(ValueError):
+            Database.decode_page_cursor("not-a-cursor")
+
+    
+    def test_clearing_history_removes_archives(self, buffered_db, monkeypatch):
+        """Test clearing history also deletes retention archives and stats"""
+        monkeypatch.setattr(buffered_db, 'db', MagicMock())
+        monkeypatch.setattr(buffered_db, 'conversation_buckets', MagicMock())
+        buffered_db.conversations.delete_many.return_value.deleted_count = 2
+        buffered_db.conversation_buckets.find.return_value = []
+        
+        assert buffered_db.delete_user_conversations("user1") == 2
+        
+        buffered_db.db['conversation_archives'].delete_many.assert_called_once_with({'user_id': "user1"})
+        buffered_db.user_stats.delete_one.assert_called_once_with({'user_id': "user1"})
+
+
+@pytest.fixture
+def bucketed_db(buffered_db, monkeypatch):
+    """Global database in bucketed storage mode, with mocked collections"""
+    monkeypatch.setattr(buffered_db, 'conversation_storage', 'buckets')
+    monkeypatch.setattr(buffered_db, 'conversation_buckets', MagicMock())
+    return buffered_db
+
+
+class TestBucketedStorage:
+    """Test suite for CONVERSATION_STORAGE=buckets"""
+
+    def test_flush_is_one_upsert_per_session(self, bucketed_db):
+        """Test a batch of messages becomes bucket upserts instead of inserts"""
+        for i in range(6):
+            bucketed_db.queue_conversation("user1", "s1", {"role": "user", "content": str(i)})
+        bucketed_db.queue_conversation("user1", "s2", {"role": "user", "content": "other"})
+
+        assert bucketed_db.flush_writes() == 7
+
+        operations = bucketed_db.conversation_buckets.bulk_write.call_args[0][0]
+        assert sorted(op._filter['session_id'] for op in operations) == ["s1", "s2"]
+        bucketed_db.conversations.insert_many.assert_not_called()
+        bucketed_db.user_stats.bulk_write.assert_called_once()
+
+    def test_failed_bucket_write_is_retried(self, bucketed_db):
+        """Test messages survive a failed bucket write"""
+        bucketed_db.conversation_buckets.bulk_write.side_effect = [Exception("down"), None]
+        bucketed_db.queue_conversation("user1", "s1", {"role": "user", "content": "hi"})
+
+        assert bucketed_db.flush_writes() == 0
+        assert bucketed_db.get_write_stats()['pending_messages'] == 1
+        assert bucketed_db.flush_writes() == 1
+
+    def test_retry_does_not_append_twice(self, bucketed_db):
+        """Test a retry skips messages an applied-then-failed write already stored"""
+        bucketed_db.conversation_buckets.bulk_write.side_effect = [Exception("timed out"), None]
+        bucketed_db.queue_conversation("user1", "s1", {"role": "user", "content": "hi"})
+        bucketed_db.queue_conversation("user1", "s1", {"role": "assistant", "content": "hello"})
+        assert bucketed_db.flush_writes() == 0
+        
+        # The server had applied the first write: both messages are in a bucket
+        stored = [{'_id': message['_id']} for message in bucketed_db._pending_messages]
+        bucketed_db.conversation_buckets.find.return_value = [{'messages': stored}]
+        
+        assert bucketed_db.flush_writes() == 2
+        assert bucketed_db.conversation_buckets.bulk_write.call_count == 1
+        assert bucketed_db.get_write_stats()['pending_messages'] == 0
+        query = bucketed_db.conversation_buckets.find.call_args[0][0]
+        assert query['messages._id'] == {'$in': [message['_id'] for message in stored]}
+    
+    def test_session_reads_unwind_buckets(self, bucketed_db):
+        """Test session history comes from buckets, oldest first"""
+        older = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+        newer = datetime(2026, 10, 1, 13, tzinfo=timezone.utc)
+        bucketed_db.conversation_buckets.find.return_value.sort.return_value = [
+            {'user_id': "user1", 'session_id': "s1", 'messages': [
+                {'_id': "b", 'role': "assistant", 'content': "hello", 'timestamp': newer},
+                {'_id': "a", 'role': "user", 'content': "hi", 'timestamp': older},
+            ]}
+        ]
+
+        history = bucketed_db.get_session_conversations("s1")
+
+        assert [m['_id'] for m in history] == ["a", "b"]
+        assert history[0]['session_id'] == "s1"
+        bucketed_db.conversations.find.assert_not_called()
+
+    def test_next_page_skips_newer_buckets(self, bucketed_db):
+        """Test a cursor only reads buckets that start at or before it"""
+        before = (datetime(2026, 10, 1, 12, 30), "64b7f0c2a1b2c3d4e5f60718")
+        bucketed_db.conversation_buckets.find.return_value.sort.return_value = []
+
+        bucketed_db.get_user_conversations("user1", before=before)
+
+        query = bucketed_db.conversation_buckets.find.call_args[0][0]
+        assert query == {'user_id': "user1", 'first_at': {'$lte': before[0]}}
+        bucketed_db.conversation_buckets.find.return_value.sort.assert_called_once_with('last_at', -1)
+
+
 class TestDataIntegrity:
     """Test suite for data integrity"""
     
@@ -0,0 +1,62 @@
+"""
+Unit tests for the multi-pattern keyword matcher
+"""
+import pytest
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+@pytest.fixture
+def matcher():
+    """Small cuisine matcher with overlapping keywords"""
+    return KeywordMatcher({
+        'Indian': ['curry', 'naan'],
+        'Thai': ['thai', 'pad thai', 'curry'],
+        'Mediterranean': ['pita'],
+        'Cooking': ['cook'],
+    })
+
+
+class TestKeywordMatcher:
+    """Test suite for KeywordMatcher"""
+    
+    def test_finds_all_labels_in_one_text(self, matcher):
+        """Test every label with a keyword is reported"""
+        assert matcher.labels("Naan with pita bread") == {'Indian', 'Mediterranean'}
+    
+    def test_shared_keyword_maps_to_every_label(self, matcher):
+        """Test a keyword listed under two labels reports both"""
+        assert matcher.labels("green curry") == {'Indian', 'Thai'}
+    
+    def test_keyword_inside_longer_keyword(self, matcher):
+        """Test 'thai' is still found inside the longer 'pad thai'"""
+        assert matcher.keywords("Pad Thai tonight") == ['pad thai', 'thai']
+        assert matcher.labels("Pad Thai tonight") == {'Thai'}
+    
+    def test_matches_at_word_start_only(self, matcher):
+        """Test keywords don't match in the middle of a word"""
+        assert matcher.labels("hospital food") == set()
+        assert matcher.labels("I love cooking") == {'Cooking'}
+    
+    def test_case_insensitive(self, matcher):
+        """Test matching ignores case"""
+        assert matcher.labels("CURRY") == {'Indian', 'Thai'}
+    
+    def test_empty_text(self, matcher):
+        """Test empty and missing text match nothing"""
+        assert matcher.labels("") == set()
+        assert matcher.labels(None) == set()
+    
+    def test_no_keywords(self):
+        """Test a matcher without keywords matches nothing"""
+        assert KeywordMatcher({}).labels("curry") == set()
+    
+    def test_special_characters_are_literal(self):
+        """Test regex metacharacters in keywords are escaped"""
+        matcher = KeywordMatcher({'Sauce': ['mac & cheese', 'c++']})
+        
+        assert matcher.labels("mac & cheese please") == {'Sauce'}
+        assert matcher.labels("macaroni") == set()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
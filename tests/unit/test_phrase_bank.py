@@ -0,0 +1,141 @@
+"""
+Unit tests for the TTS phrase bank
+"""
+import os
+import pytest
+from unittest.mock import Mock
+from app.services.tts_service import TTSService
+from app.services.phrase_bank import (
+    PhraseBank, FIXED_PHRASES, expand_templates, default_phrases, init_phrase_bank
+)
+from app.models.timer_model import TimerManager
+
+
+@pytest.fixture
+def tts():
+    """TTS service whose backend returns audio derived from the text"""
+    service = TTSService()
+    service._fetch_audio = Mock(side_effect=lambda text, speaker: b'RIFF' + text.encode('utf-8'))
+    return service
+
+
+@pytest.fixture
+def bank(tts):
+    """Phrase bank attached to the TTS service"""
+    phrase_bank = PhraseBank(tts, max_transient=2)
+    tts.phrase_bank = phrase_bank
+    return phrase_bank
+
+
+class TestPhraseBank:
+    """Test suite for pre-rendered phrases"""
+
+    def test_warm_serves_without_synthesis(self, tts, bank):
+        """Test warmed phrases are served with no backend round trip"""
+        for future in bank.warm(["Video paused", "Opening settings"]):
+            future.result()
+        tts._fetch_audio.reset_mock()
+
+        result = tts.generate_speech("Video paused")
+
+        assert result['success'] is True
+        assert result['cached'] is True
+        assert tts._fetch_audio.call_count == 0
+        assert bank.stats()['pinned'] == 2
+
+    def test_lookup_uses_cleaned_text(self, tts, bank):
+        """Test emoji and markdown variants hit the same banked phrase"""
+        bank.prepare("Video paused", pinned=True).result()
+        tts._fetch_audio.reset_mock()
+
+        tts.generate_speech("**Video paused** ✅")
+
+        assert tts._fetch_audio.call_count == 0
+
+    def test_prepare_is_deduplicated(self, tts, bank):
+        """Test a banked phrase is not rendered twice"""
+        bank.prepare("Video muted", pinned=True).result()
+
+        assert bank.prepare("Video muted", pinned=True) is None
+        assert tts._fetch_audio.call_count == 1
+
+    def test_transient_phrases_are_bounded(self, bank):
+        """Test transient phrases are evicted oldest first"""
+        for text in ["Alert one", "Alert two", "Alert three"]:
+            bank.prepare(text).result()
+
+        assert bank.get(bank.key_for("Alert one")) is None
+        assert bank.get(bank.key_for("Alert three")) is not None
+
+    def test_failed_render_is_counted(self, tts, bank):
+        """Test backend failures leave the phrase unbanked"""
+        tts._fetch_audio.side_effect = Exception("backend down")
+
+        assert bank.prepare("Video closed", pinned=True).result() is False
+        assert bank.stats()['failed'] == 1
+        assert bank.get(bank.key_for("Video closed")) is None
+
+    def test_init_phrase_bank_attaches_to_service(self, tts):
+        """Test init wires the bank into the TTS service"""
+        phrase_bank = init_phrase_bank(tts, phrases=["Video stopped"])
+        phrase_bank._executor.shutdown(wait=True)
+
+        assert tts.phrase_bank is phrase_bank
+        assert tts.get_phrase_bank_stats()['pinned'] == 1
+
+
+class TestPhraseTemplates:
+    """Test suite for the default phrase set"""
+
+    def test_expand_templates(self):
+        """Test templates expand over their values"""
+        phrases = expand_templates([("Found {n} items", {'n': [1, 2]}), ("Done", {})])
+
+        assert phrases == ["Found 1 items", "Found 2 items", "Done"]
+
+    def test_default_phrases_are_unique(self):
+        """Test the warm-up set has no duplicates"""
+        phrases = default_phrases()
+
+        assert len(phrases) == len(set(phrases))
+
+    def test_fixed_phrases_match_source(self):
+        """Test every fixed phrase still appears verbatim in the server or client code"""
+        root = os.path.join(os.path.dirname(__file__), '..', '..', 'app')
+        sources = ''
+        for path in ['routes.py', os.path.join('static', 'js', 'script.js')]:
+            with open(os.path.join(root, path), encoding='utf-8') as f:
+                sources += f.read()
+
+        missing = [phrase for phrase in FIXED_PHRASES if phrase not in sources]
+        assert missing == []
+
+
+class TestTimerAlerts:
+    """Test suite for pre-rendered timer alerts"""
+
+    def test_alert_rendered_on_creation(self, tts, bank):
+        """Test creating a timer renders its alert ahead of time"""
+        manager = TimerManager()
+        manager.set_phrase_bank(bank)
+
+        manager.create_timer(5, "pasta")
+        bank._executor.shutdown(wait=True)
+        tts._fetch_audio.reset_mock()
+
+        result = tts.generate_speech(manager.alert_text("pasta"))
+
+        assert result['cached'] is True
+        assert tts._fetch_audio.call_count == 0
+        manager.active_timers.clear()
+
+    def test_alert_discarded_on_delete(self, bank):
+        """Test deleting a timer drops its pre-rendered alert"""
+        manager = TimerManager()
+        manager.set_phrase_bank(bank)
+
+        manager.create_timer(5, "rice")
+        bank._executor.shutdown(wait=True)
+        manager.delete_timer("rice")
+
+        assert bank.get(bank.key_for(manager.alert_text("rice"))) is None
@@ -0,0 +1,101 @@
+"""
+Unit tests for conversation and session retention
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from pymongo.errors import DuplicateKeyError
+from app.models.retention import RetentionCompactor
+
+NOW = datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+
+
+def old_message(index, session_id="s1", role="user"):
+    """Conversation document from well before the retention window"""
+    return {'_id': f"m{index}", 'user_id': "user1", 'session_id': session_id, 'role': role,
+            'content': f"message {index}", 'timestamp': NOW - timedelta(days=200, minutes=-index)}
+
+
+@pytest.fixture
+def database():
+    """Database handler with mocked collections"""
+    database = MagicMock()
+    database.bucketed = False
+    database.sessions.update_many.return_value.modified_count = 0
+    return database
+
+
+def serve_batches(database, *batches):
+    """Make conversations.find(...).sort(...).limit(...) return each batch in turn"""
+    cursor = database.conversations.find.return_value.sort.return_value.limit
+    cursor.side_effect = [list(batch) for batch in batches] + [[]]
+
+
+class TestRetentionCompactor:
+    """Test suite for RetentionCompactor"""
+    
+    def test_expired_messages_are_archived_then_deleted(self, database):
+        """Test a batch becomes one archive upsert per session and one delete"""
+        batch = [old_message(0), old_message(1, role="assistant"), old_message(2, session_id="s2")]
+        serve_batches(database, batch)
+        compactor = RetentionCompactor(database, retention_days=90, session_idle_minutes=30, batch_size=10)
+        
+        archived = compactor.compact_conversations(NOW)
+        
+        assert archived == 3
+        query = database.conversations.find.call_args[0][0]
+        assert query == {'timestamp': {'$lt': NOW - timedelta(days=90)}}
+        updates = database.db['conversation_archives'].bulk_write.call_args[0][0]
+        assert sorted(op._filter['session_id'] for op in updates) == ["s1", "s2"]
+        database.conversations.delete_many.assert_called_once_with({'_id': {'$in': ["m0", "m1", "m2"]}})
+    
+    def test_full_batches_continue(self, database):
+        """Test compaction keeps going while batches come back full"""
+        serve_batches(database, [old_message(0), old_message(1)], [old_message(2)])
+        compactor = RetentionCompactor(database, retention_days=90, session_idle_minutes=30, batch_size=2)
+        
+        assert compactor.compact_conversations(NOW) == 3
+        assert database.conversations.delete_many.call_count == 2
+    
+    def test_summary_counts_and_excerpts(self):
+        """Test the archive update counts roles and keeps the first user messages"""
+        messages = [old_message(i, role="user" if i % 2 == 0 else "assistant") for i in range(20)]
+        
+        update = RetentionCompactor.summarize(messages)[0]._doc
+        
+        assert update['$inc'] == {'message_count': 20, 'user_messages': 10, 'assistant_messages': 10}
+        assert update['$min'] == {'first_message_at': messages[0]['timestamp']}
+        assert update['$max'] == {'last_message_at': messages[-1]['timestamp']}
+        assert update['$push']['excerpts']['$each'] == [f"message {i}" for i in (0, 2, 4, 6, 8)]
+    
+    def test_idle_sessions_are_closed(self, database):
+        """Test sessions idle past the cutoff are marked inactive"""
+        database.sessions.update_many.return_value.modified_count = 4
+        compactor = RetentionCompactor(database, retention_days=90, session_idle_minutes=30)
+        
+        assert compactor.close_idle_sessions(NOW) == 4
+        query, update = database.sessions.update_many.call_args[0]
+        assert query == {'is_active': True, 'last_activity': {'$lt': NOW - timedelta(minutes=30)}}
+        assert update['$set']['is_active'] is False
+    
+    def test_zero_disables(self, database):
+        """Test 0 days / minutes turn each part off"""
+        compactor = RetentionCompactor(database, retention_days=0, session_idle_minutes=0)
+        
+        compactor.run_once(NOW)
+        
+        database.conversations.find.assert_not_called()
+        database.sessions.update_many.assert_not_called()
+    
+    def test_pass_skipped_without_lease(self, database):
+        """Test only the lease holder compacts"""
+        database.db['maintenance_locks'].find_one_and_update.side_effect = DuplicateKeyError("held")
+        compactor = RetentionCompactor(database, retention_days=90, session_idle_minutes=30)
+        
+        assert compactor.run_once(NOW) is False
+        database.sessions.update_many.assert_not_called()
+        assert compactor.get_stats()['skipped'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
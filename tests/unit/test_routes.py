@@ -66,6 +66,23 @@ class TestAPIEndpoints:
         # Currently routes are mostly WebSocket-based
         pass
     
+    def test_db_stats_requires_auth(self, client):
+        """Test database statistics are only shown to signed-in users"""
+        response = client.get('/api/db/stats', follow_redirects=False)
+        
+        assert response.status_code in [302, 401]
+    
+    def test_db_stats_reports_user_cache(self, client, clean_db, sample_user_data):
+        """Test the user cache counters are exposed"""
+        client.post('/register', json=sample_user_data, content_type='application/json')
+        
+        response = client.get('/api/db/stats')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert {'hits', 'misses', 'mongo_reads_per_load'} <= set(data['user_cache'])
+        assert 'pending_messages' in data['write_buffer']
+    
     def test_api_error_handling(self, client):
         """Test API error responses"""
         # Test 404
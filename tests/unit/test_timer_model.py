@@ -2,10 +2,27 @@
 Unit tests for timer model
 """
 import pytest
+import threading
 import time
 from app.models.timer_model import TimerManager
 
 
+class RecordingSocketIO:
+    """Collects emitted events"""
+    
+    def __init__(self):
+        self.events = []
+        self.finished = threading.Event()
+    
+    def emit(self, event, data=None, **kwargs):
+        self.events.append((event, data))
+        if event == 'timer_finished':
+            self.finished.set()
+    
+    def names(self, event):
+        return [data['name'] for name, data in self.events if name == event]
+
+
 @pytest.fixture
 def timer_manager():
     """Fresh timer manager for each test"""
@@ -97,5 +114,171 @@ class TestTimerManager:
         assert result2["timer"]["id"] > result1["timer"]["id"]
 
 
+class TestTimerScheduler:
+    """Test suite for the single-thread deadline scheduler"""
+    
+    def test_timer_fires(self, timer_manager):
+        """Test a due timer emits its finish events and is removed"""
+        socketio = RecordingSocketIO()
+        timer_manager.set_socketio(socketio)
+        
+        result = timer_manager.create_timer(0.01, "eggs")  # 0.6 seconds
+        
+        assert socketio.finished.wait(3)
+        assert socketio.names('timer_finished') == ['eggs']
+        assert ('final_text', {'text': timer_manager.alert_text("eggs")}) in socketio.events
+        assert result["timer"]["id"] not in timer_manager.active_timers
+    
+    def test_ticks_count_down_to_zero(self, timer_manager):
+        """Test legacy whole-second ticks are aligned to the deadline"""
+        socketio = RecordingSocketIO()
+        timer_manager.set_socketio(socketio)
+        timer_manager.set_resync_interval(0)
+        
+        timer_manager.create_timer(2 / 60, "toast")
+        
+        assert socketio.finished.wait(5)
+        remaining = [data['remaining_seconds'] for name, data in socketio.events if name == 'timer_update']
+        assert remaining == [1, 0]
+    
+    def test_deleted_timer_does_not_fire(self, timer_manager):
+        """Test deleting a timer cancels its alert"""
+        socketio = RecordingSocketIO()
+        timer_manager.set_socketio(socketio)
+        
+        timer_manager.create_timer(0.005, "rice")
+        timer_manager.delete_timer("rice")
+        timer_manager.create_timer(0.01, "beans")
+        
+        assert socketio.finished.wait(3)
+        assert socketio.names('timer_finished') == ['beans']
+        assert 'rice' not in socketio.names('timer_update')
+    
+    def test_earliest_deadline_fires_first(self, timer_manager):
+        """Test a shorter timer created later fires before a longer one"""
+        socketio = RecordingSocketIO()
+        timer_manager.create_timer(0.015, "slow")
+        timer_manager.create_timer(0.005, "fast")
+        timer_manager.set_socketio(socketio)
+        
+        time.sleep(1.5)
+        
+        assert socketio.names('timer_finished') == ['fast', 'slow']
+    
+    def test_single_scheduler_thread(self, timer_manager):
+        """Test many timers share one thread"""
+        threads_before = threading.active_count()
+        
+        for i in range(100):
+            timer_manager.create_timer(10, f"timer {i}")
+        
+        assert threading.active_count() - threads_before <= 1
+    
+    def test_name_lookup_is_case_insensitive(self, timer_manager):
+        """Test deleting by name removes the oldest timer with that name"""
+        first = timer_manager.create_timer(10, "Pasta")["timer"]["id"]
+        second = timer_manager.create_timer(10, "pasta")["timer"]["id"]
+        
+        assert timer_manager.find_timer("PASTA") == first
+        timer_manager.delete_timer("pasta")
+        
+        assert timer_manager.find_timer("pasta") == second
+    
+    def test_owner_scoping(self, timer_manager):
+        """Test owned timers are only visible to their owner"""
+        socketio = RecordingSocketIO()
+        timer_manager.set_socketio(socketio)
+        mine = timer_manager.create_timer(10, "pasta", owner="user:1")["timer"]["id"]
+        timer_manager.create_timer(10, "pasta", owner="user:2")
+        
+        assert [t["id"] for t in timer_manager.list_timers("user:1")["timers"]] == [mine]
+        assert timer_manager.list_timers("user:3") == {"message": "No active timers"}
+        assert "error" in timer_manager.delete_timer(mine, owner="user:2")
+        assert "error" not in timer_manager.delete_timer("pasta", owner="user:2")
+        assert timer_manager.find_timer("pasta") == mine
+    
+    def test_events_sent_to_owner_room(self, timer_manager):
+        """Test owned timers emit to their room instead of broadcasting"""
+        rooms = []
+        socketio = RecordingSocketIO()
+        socketio.emit = lambda event, data=None, **kwargs: rooms.append((event, kwargs.get('to')))
+        timer_manager.set_socketio(socketio)
+        
+        timer_manager.create_timer(0.005, "eggs", owner="user:1")
+        time.sleep(0.8)
+        
+        assert ('timer_finished', 'user:1') in rooms
+        assert all(room == 'user:1' for _, room in rooms)
+    
+    def test_concurrent_creation_gets_unique_ids(self, timer_manager):
+        """Test the timer counter is safe to increment from many threads"""
+        ids = []
+        
+        def create():
+            for _ in range(50):
+                ids.append(timer_manager.create_timer(10)["timer"]["id"])
+        
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(set(ids)) == 400
+        assert timer_manager.timer_counter == 400
+
+
+class TestTimerSyncProtocol:
+    """Test suite for deadline-based client countdowns"""
+    
+    def test_no_per_second_ticks(self, timer_manager):
+        """Test only sync frames and the final alert are sent"""
+        socketio = RecordingSocketIO()
+        timer_manager.set_socketio(socketio)
+        
+        timer_manager.create_timer(2 / 60, "toast", owner="user:1")
+        
+        assert socketio.finished.wait(5)
+        events = [name for name, _ in socketio.events]
+        assert 'timer_update' not in events
+        assert events[0] == 'timer_sync'
+        assert events[-2:] == ['timer_finished', 'final_text']
+    
+    def test_sync_carries_all_owner_timers(self, timer_manager):
+        """Test create and delete send one frame with the owner's deadlines"""
+        socketio = RecordingSocketIO()
+        timer_manager.set_socketio(socketio)
+        
+        timer_manager.create_timer(10, "rice", owner="user:1")
+        timer_manager.create_timer(5, "beans", owner="user:1")
+        timer_manager.create_timer(5, "other", owner="user:2")
+        timer_manager.delete_timer("rice", owner="user:1")
+        
+        frames = [data for name, data in socketio.events if name == 'timer_sync']
+        assert [[t['name'] for t in frame['timers']] for frame in frames] == [
+            ['rice'], ['rice', 'beans'], ['other'], ['beans']
+        ]
+        beans = frames[-1]['timers'][0]
+        assert 299000 < beans['remaining_ms'] <= 300000
+        assert beans['remaining'] == '05:00'
+        assert 'end_time' in beans
+    
+    def test_periodic_resync_is_coalesced(self, timer_manager):
+        """Test each owner gets one frame per resync interval"""
+        socketio = RecordingSocketIO()
+        timer_manager.set_socketio(socketio)
+        timer_manager.set_resync_interval(0.2)
+        for name in ["rice", "beans", "soup"]:
+            timer_manager.create_timer(10, name, owner="user:1")
+        timer_manager.create_timer(10, "other", owner="user:2")
+        socketio.events.clear()
+        
+        time.sleep(0.5)
+        
+        frames = [data for name, data in socketio.events if name == 'timer_sync']
+        assert 2 <= len(frames) <= 6
+        assert {len(frame['timers']) for frame in frames} == {1, 3}
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,202 @@
+"""
+Unit tests for the durable timer journal
+"""
+import json
+import os
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from app.models.timer_model import TimerManager
+from app.models.timer_store import TimerJournal
+
+
+class RecordingSocketIO:
+    """Collects emitted events"""
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data=None, **kwargs):
+        self.events.append((event, data))
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Journal in a temporary directory"""
+    journal = TimerJournal(str(tmp_path), flush_interval=0.01)
+    yield journal
+    journal.close()
+
+
+class TestTimerJournal:
+    """Test suite for the journal file"""
+
+    def test_round_trip(self, journal):
+        """Test create records are replayed in order"""
+        journal.append({"op": "create", "id": 1, "name": "pasta"})
+        journal.append({"op": "create", "id": 2, "name": "rice"})
+        journal.flush()
+
+        records, max_id = TimerJournal(journal.directory).load()
+
+        assert [r["name"] for r in records] == ["pasta", "rice"]
+        assert max_id == 2
+
+    def test_deleted_timers_are_not_restored(self, journal):
+        """Test a delete record cancels the matching create"""
+        journal.append({"op": "create", "id": 1, "name": "pasta"})
+        journal.append({"op": "create", "id": 2, "name": "rice"})
+        journal.append({"op": "delete", "id": 1})
+        journal.flush()
+
+        records, max_id = TimerJournal(journal.directory).load()
+
+        assert [r["id"] for r in records] == [2]
+        assert max_id == 2
+
+    def test_torn_last_line_is_ignored(self, journal):
+        """Test a partial write from a crash does not lose earlier timers"""
+        journal.append({"op": "create", "id": 1, "name": "pasta"})
+        journal.flush()
+        with open(journal.path, 'a', encoding='utf-8') as journal_file:
+            journal_file.write('{"op": "create", "id": 2, "na')
+
+        records, _ = TimerJournal(journal.directory).load()
+
+        assert [r["id"] for r in records] == [1]
+
+    def test_missing_file_loads_empty(self, tmp_path):
+        """Test a fresh directory has nothing to restore"""
+        assert TimerJournal(str(tmp_path / "timers")).load() == ([], 0)
+
+    def test_compact_keeps_only_live_timers(self, journal):
+        """Test compaction rewrites the file with the live records"""
+        for i in range(1, 11):
+            journal.append({"op": "create", "id": i, "name": f"t{i}"})
+            journal.append({"op": "delete", "id": i})
+        journal.append({"op": "create", "id": 11, "name": "soup"})
+        journal.flush()
+
+        records, _ = journal.load()
+        journal.compact(records)
+
+        with open(journal.path, encoding='utf-8') as journal_file:
+            lines = [json.loads(line) for line in journal_file]
+        assert [r["id"] for r in lines] == [11]
+        assert journal.stats()['records'] == 1
+        assert not os.path.exists(journal.path + '.tmp')
+
+    def test_burst_is_fsynced_once(self, journal):
+        """Test appends made together share one write and fsync"""
+        with patch('app.models.timer_store.os.fsync') as fsync:
+            for i in range(100):
+                journal.append({"op": "create", "id": i, "name": f"t{i}"})
+            deadline = time.monotonic() + 2
+            while journal.stats()['pending'] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            journal.flush()
+
+        assert journal.stats()['records'] == 100
+        assert fsync.call_count <= 2
+
+
+class TestTimerRecovery:
+    """Test suite for restoring timers after a restart"""
+
+    def test_timers_survive_restart(self, journal):
+        """Test a new manager picks up running timers with their deadlines"""
+        before = TimerManager()
+        before.recover(journal)
+        before.create_timer(10, "pasta", owner="user:1")
+        before.create_timer(20, "rice", owner="user:2")
+        before.delete_timer("rice", owner="user:2")
+        journal.flush()
+        end_time = before.active_timers[1]["end_time"]
+        before.active_timers.clear()
+
+        after = TimerManager()
+        restored = after.recover(TimerJournal(journal.directory))
+
+        assert restored == 1
+        timer = after.active_timers[1]
+        assert timer["name"] == "pasta"
+        assert timer["owner"] == "user:1"
+        assert abs((timer["end_time"] - end_time).total_seconds()) < 0.01
+        assert after.list_timers(owner="user:1")["timers"][0]["remaining_ms"] > 590000
+        after.active_timers.clear()
+
+    def test_ids_continue_after_restart(self, journal):
+        """Test restored managers never reuse a timer ID"""
+        before = TimerManager()
+        before.recover(journal)
+        before.create_timer(10, "pasta")
+        before.create_timer(10, "rice")
+        before.delete_timer(2)
+        journal.flush()
+        before.active_timers.clear()
+
+        after = TimerManager()
+        after.recover(TimerJournal(journal.directory))
+        result = after.create_timer(5, "eggs")
+
+        assert result["timer"]["id"] == 3
+        after.active_timers.clear()
+
+    def test_expired_timers_wait_for_their_owner(self, journal):
+        """Test timers that ran out while the server was down alert once their owner connects"""
+        now = time.time()
+        journal.append({"op": "create", "id": 1, "name": "pasta", "duration_minutes": 1,
+                        "end_time": now - 5, "created_at": now - 65, "owner": "user:1"})
+        journal.flush()
+
+        manager = TimerManager()
+        socketio = RecordingSocketIO()
+        manager.set_socketio(socketio)
+        manager.recover(TimerJournal(journal.directory))
+        time.sleep(0.05)
+
+        # Nobody was listening yet: the alert is held and the timer stays journaled
+        assert socketio.events == []
+        assert not manager.active_timers
+        assert [r["id"] for r in TimerJournal(journal.directory).load()[0]] == [1]
+
+        assert manager.deliver_pending("user:2") == 0
+        assert manager.deliver_pending("user:1") == 1
+        assert manager.deliver_pending("user:1") == 0
+
+        assert [data["name"] for event, data in socketio.events if event == 'timer_finished'] == ["pasta"]
+        manager.journal.flush()
+        records, _ = TimerJournal(journal.directory).load()
+        assert records == []
+
+    def test_compaction_runs_on_the_flusher(self, journal):
+        """Test removals request compaction instead of rewriting under the timer lock"""
+        journal.COMPACT_MIN_RECORDS = 10
+        manager = TimerManager()
+        manager.recover(journal)
+        compact = journal.compact
+        threads = []
+
+        def recording_compact(live_records):
+            threads.append(threading.current_thread().name)
+            compact(live_records)
+
+        with patch.object(journal, 'compact', side_effect=recording_compact):
+            for i in range(10):
+                manager.create_timer(10, f"t{i}")
+                manager.delete_timer(f"t{i}")
+                journal.flush()
+            manager.create_timer(10, "soup")
+            deadline = time.monotonic() + 2
+            while not threads and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        assert threads and set(threads) == {'timer-journal'}
+        journal.flush()
+        records, _ = TimerJournal(journal.directory).load()
+        assert [r["name"] for r in records] == ["soup"]
+        manager.active_timers.clear()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
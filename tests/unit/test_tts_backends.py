@@ -0,0 +1,169 @@
+"""
+Unit tests for the Coqui TTS backend pool
+"""
+import pytest
+import requests
+from unittest.mock import Mock
+from app.services.tts_backends import BackendPool, ENDPOINTS
+from app.services.tts_service import TTSService
+
+
+def response(status=200, content=b'RIFFaudio'):
+    """Fake HTTP response"""
+    resp = Mock()
+    resp.status_code = status
+    resp.content = content
+    resp.raise_for_status = Mock(
+        side_effect=requests.exceptions.HTTPError(str(status)) if status >= 400 else None
+    )
+    return resp
+
+
+@pytest.fixture
+def pool():
+    """Two-backend pool with mocked HTTP sessions"""
+    backends = BackendPool(['http://tts-a:5002', 'http://tts-b:5002/'], probe_interval=0)
+    for backend in backends.backends:
+        backend.session = Mock()
+        backend.session.request = Mock(return_value=response())
+        backend.session.get = Mock(return_value=response())
+    return backends
+
+
+class TestEndpointDiscovery:
+    """Test suite for per-backend endpoint discovery"""
+
+    def test_working_endpoint_is_remembered(self, pool):
+        """Test 404 fallbacks are paid once, not on every request"""
+        backend = pool.backends[0]
+        backend.session.request = Mock(side_effect=[response(404), response(), response()])
+
+        backend.synthesize("Hello", "p300", 5)
+        backend.synthesize("Hello again", "p300", 5)
+
+        methods = [call.args[0] for call in backend.session.request.call_args_list]
+        assert methods == ['GET', 'POST', 'POST']
+        assert ENDPOINTS[backend.endpoint][:2] == ("POST", "/api/tts")
+
+    def test_all_endpoints_failing_raises(self, pool):
+        """Test a node with no working endpoint raises"""
+        backend = pool.backends[0]
+        backend.session.request = Mock(return_value=response(404))
+
+        with pytest.raises(Exception, match="404"):
+            backend.synthesize("Hello", "p300", 5)
+
+
+class TestRouting:
+    """Test suite for latency-weighted routing and failover"""
+
+    def test_prefers_lower_latency(self, pool):
+        """Test requests go to the backend with the lowest expected latency"""
+        fast, slow = pool.backends[1], pool.backends[0]
+        fast.latency, slow.latency = 0.001, 0.010
+
+        pool.fetch("Hello", "p300", 5)
+
+        assert fast.session.request.call_count == 1
+        assert slow.session.request.call_count == 0
+
+    def test_inflight_load_shifts_traffic(self, pool):
+        """Test a busy fast backend loses to an idle slightly slower one"""
+        fast, slow = pool.backends[0], pool.backends[1]
+        fast.latency, slow.latency = 0.001, 0.0015
+        fast.inflight = 2
+
+        pool.fetch("Hello", "p300", 5)
+
+        assert slow.session.request.call_count == 1
+
+    def test_cold_pool_spreads_load(self, pool):
+        """Test requests before any latency is measured don't all go to the first backend"""
+        first, second = pool.backends
+        first.inflight = 1
+
+        pool.fetch("Hello", "p300", 5)
+
+        assert second.session.request.call_count == 1
+
+    def test_cold_pool_ties_break_on_requests(self, pool):
+        """Test unmeasured idle backends take turns"""
+        first, second = pool.backends
+        first.requests = 1
+
+        assert pool._ordered() == [second, first]
+
+    def test_failover_and_dead_node_skipped(self, pool):
+        """Test an unreachable node fails over once and is then skipped"""
+        dead, alive = pool.backends
+        dead.latency, alive.latency = 0.001, 0.002
+        dead.session.request = Mock(side_effect=requests.exceptions.ConnectionError("refused"))
+
+        assert pool.fetch("Hello", "p300", 5) == b'RIFFaudio'
+        assert dead.healthy is False
+
+        pool.fetch("Hello again", "p300", 5)
+        assert dead.session.request.call_count == 1
+
+    def test_probe_restores_backend(self, pool):
+        """Test a recovered node returns to rotation after a health probe"""
+        backend = pool.backends[0]
+        backend.healthy = False
+
+        pool.probe_all()
+
+        assert backend.healthy is True
+
+    def test_probe_marks_dead_backend(self, pool):
+        """Test a failing probe takes a node out of rotation"""
+        backend = pool.backends[1]
+        backend.session.get = Mock(side_effect=requests.exceptions.ConnectionError("refused"))
+
+        pool.probe_all()
+
+        assert backend.healthy is False
+
+    def test_latency_is_ewma_per_character(self, pool):
+        """Test latency samples are smoothed"""
+        backend = pool.backends[0]
+
+        pool._record_success(backend, 0.010)
+        pool._record_success(backend, 0.020)
+
+        assert backend.latency == pytest.approx(0.013)
+
+
+class TestServicePool:
+    """Test suite for TTSService on a backend pool"""
+
+    def test_all_backends_down_reports_connection_error(self, pool):
+        """Test the service keeps its connection error message when every node is down"""
+        service = TTSService(coqui_urls=['http://tts-a:5002', 'http://tts-b:5002'])
+        for backend in service.backends.backends:
+            backend.session = Mock()
+            backend.session.request = Mock(side_effect=requests.exceptions.ConnectionError("refused"))
+
+        result = service.generate_speech("Hello there")
+
+        assert result['success'] is False
+        assert 'Cannot connect' in result['error']
+        assert all(not b.healthy for b in service.backends.backends)
+
+    def test_set_url_keeps_pool_settings(self):
+        """Test changing the URL keeps health checks, probe interval and the scheduler cap"""
+        service = TTSService(coqui_urls=['http://tts-a:5002', 'http://tts-b:5002'])
+        service.scheduler = Mock(backend_concurrency=2)
+        pool = service.backends
+        pool.probe_interval = 30
+
+        service.set_url('http://tts-c:5002/')
+
+        assert service.backends is pool
+        assert [b.url for b in pool.backends] == ['http://tts-c:5002']
+        assert service.coqui_url == 'http://tts-c:5002'
+        assert pool.probe_interval == 30
+        service.scheduler.set_backend_limit.assert_called_once_with(service.backend_name, 2)
+
+    def test_urls_are_normalized(self, pool):
+        """Test trailing slashes are stripped from backend URLs"""
+        assert [b.url for b in pool.backends] == ['http://tts-a:5002', 'http://tts-b:5002']
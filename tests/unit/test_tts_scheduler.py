@@ -0,0 +1,191 @@
+"""
+Unit tests for the TTS scheduler
+"""
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from app.services.tts_scheduler import TTSScheduler, Priority
+from app.services.tts_service import TTSService
+from app.services.tts_cache import AudioCache
+
+
+@pytest.fixture
+def blocked_scheduler():
+    """Single-worker scheduler whose worker is held busy until release is set"""
+    scheduler = TTSScheduler(max_workers=1, max_queue=3, backend_concurrency=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+        return {'success': True}
+
+    scheduler.submit('blocker', block)
+    started.wait(5)
+    yield scheduler, release
+    release.set()
+
+
+def job(order, name):
+    """Job that records when it ran"""
+    def run():
+        order.append(name)
+        return {'success': True, 'name': name}
+    return run
+
+
+class TestTTSScheduler:
+    """Test suite for priority scheduling"""
+
+    def test_alerts_run_before_replies_and_prefetch(self, blocked_scheduler):
+        """Test queued work runs in priority order, not arrival order"""
+        scheduler, release = blocked_scheduler
+        order = []
+
+        futures = [
+            scheduler.submit('p', job(order, 'prefetch'), priority=Priority.PREFETCH),
+            scheduler.submit('r', job(order, 'reply'), priority=Priority.REPLY),
+            scheduler.submit('a', job(order, 'alert'), priority=Priority.ALERT),
+        ]
+        release.set()
+        for future in futures:
+            future.result(5)
+
+        assert order == ['alert', 'reply', 'prefetch']
+
+    def test_duplicate_inflight_text_shares_job(self, blocked_scheduler):
+        """Test duplicate submissions reuse the in-flight job"""
+        scheduler, release = blocked_scheduler
+        fn = Mock(return_value={'success': True})
+
+        first = scheduler.submit('same', fn)
+        second = scheduler.submit('same', fn)
+        release.set()
+
+        assert first is second
+        assert first.result(5) == {'success': True}
+        assert fn.call_count == 1
+        assert scheduler.stats()['deduplicated'] == 1
+
+    def test_duplicate_promotes_priority(self, blocked_scheduler):
+        """Test an alert for a queued prefetch text moves it up"""
+        scheduler, release = blocked_scheduler
+        order = []
+
+        scheduler.submit('r', job(order, 'reply'), priority=Priority.REPLY)
+        prefetch = scheduler.submit('alert-text', job(order, 'alert-text'), priority=Priority.PREFETCH)
+        scheduler.submit('alert-text', job(order, 'ignored'), priority=Priority.ALERT)
+        release.set()
+        prefetch.result(5)
+        time.sleep(0.05)
+
+        assert order[0] == 'alert-text'
+        assert 'ignored' not in order
+
+    def test_load_shedding_drops_least_important(self, blocked_scheduler):
+        """Test a full queue sheds prefetch work to admit an alert"""
+        scheduler, release = blocked_scheduler
+        order = []
+
+        scheduler.submit('r1', job(order, 'r1'), priority=Priority.REPLY)
+        scheduler.submit('r2', job(order, 'r2'), priority=Priority.REPLY)
+        prefetch = scheduler.submit('p', job(order, 'p'), priority=Priority.PREFETCH)
+        alert = scheduler.submit('a', job(order, 'a'), priority=Priority.ALERT)
+
+        assert prefetch.result(1)['shed'] is True
+        release.set()
+        assert alert.result(5)['success'] is True
+        assert 'p' not in order
+
+    def test_load_shedding_rejects_new_low_priority(self, blocked_scheduler):
+        """Test new work is rejected when nothing less important is queued"""
+        scheduler, release = blocked_scheduler
+
+        for name in ['a1', 'a2', 'a3']:
+            scheduler.submit(name, Mock(return_value={'success': True}), priority=Priority.ALERT)
+        rejected = scheduler.submit('r', Mock(), priority=Priority.REPLY)
+
+        assert rejected.result(1)['success'] is False
+        assert scheduler.stats()['shed'] == 1
+
+    def test_backend_concurrency_cap(self):
+        """Test jobs for one backend never exceed its cap while others proceed"""
+        scheduler = TTSScheduler(max_workers=4, backend_concurrency=1)
+        running = {'coqui': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def synth():
+            with lock:
+                running['coqui'] += 1
+                running['peak'] = max(running['peak'], running['coqui'])
+            time.sleep(0.02)
+            with lock:
+                running['coqui'] -= 1
+            return {'success': True}
+
+        futures = [scheduler.submit(i, synth, backend='coqui') for i in range(4)]
+        other = scheduler.submit('other', Mock(return_value={'success': True}), backend='other')
+
+        assert other.result(1)['success'] is True
+        for future in futures:
+            future.result(5)
+        assert running['peak'] == 1
+
+    def test_job_exception_becomes_error_result(self):
+        """Test a raising job resolves to an error result"""
+        scheduler = TTSScheduler(max_workers=1)
+
+        result = scheduler.submit('boom', Mock(side_effect=Exception("backend down"))).result(5)
+
+        assert result == {'success': False, 'error': 'backend down'}
+
+
+class TestTTSServiceScheduling:
+    """Test suite for TTSService running through the scheduler"""
+
+    def test_generate_speech_uses_scheduler(self):
+        """Test synthesis goes through the scheduler when one is attached"""
+        service = TTSService()
+        service.scheduler = TTSScheduler(max_workers=2)
+        service._fetch_audio = Mock(return_value=b'RIFFaudio')
+
+        result = service.generate_speech("Hello there", priority=Priority.ALERT)
+
+        assert result['success'] is True
+        assert service.scheduler.stats()['completed'] == 1
+
+    def test_cached_audio_skips_queue(self, tmp_path):
+        """Test cached phrases are served without queueing behind synthesis"""
+        service = TTSService(cache=AudioCache(str(tmp_path)))
+        service.scheduler = TTSScheduler(max_workers=1)
+        service._fetch_audio = Mock(return_value=b'RIFFaudio')
+        service.generate_speech("Hello there")
+
+        service.generate_speech("Hello there")
+
+        assert service.scheduler.stats()['submitted'] == 1
+
+    def test_long_reply_does_not_shed_its_own_chunks(self):
+        """Test a reply with more sentences than the queue holds is spoken in full"""
+        service = TTSService()
+        service.scheduler = TTSScheduler(max_workers=2, max_queue=32)
+        service._fetch_audio = Mock(return_value=b'RIFFaudio')
+        text = " ".join(f"Now do step number {step} of the recipe." for step in range(40))
+
+        chunks = service.generate_speech_chunks(text)
+
+        assert len(chunks) == 40
+        assert all(chunk['success'] for chunk in chunks)
+        assert service.scheduler.stats()['shed'] == 0
+
+    def test_chunks_do_not_share_result_dicts(self):
+        """Test deduplicated sentences get their own chunk metadata"""
+        service = TTSService()
+        service.scheduler = TTSScheduler(max_workers=2)
+        service._fetch_audio = Mock(return_value=b'RIFFaudio')
+
+        chunks = service.generate_speech_chunks("Stir the sauce well. Stir the sauce well.", voice=None)
+
+        assert [chunk['chunk_index'] for chunk in chunks] == list(range(len(chunks)))
@@ -2,9 +2,14 @@
 Unit tests for Text-to-Speech service
 Tests TTS generation, audio processing, and error handling
 """
+import random
+import re
+
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from app.services.tts_service import TTSService, init_tts_service, get_tts_service
+from app.services.tts_cache import AudioCache
+from app.services import audio_codec
 
 
 class TestTTSGeneration:
@@ -53,6 +58,41 @@ class TestTTSGeneration:
         assert isinstance(result, dict)
 
 
+def legacy_clean_text_for_tts(text):
+    """Reference cleaner (uncompiled re.sub calls) the service must match"""
+    clean = re.sub(r'[🎤🤖✅❌🛠️🔗💡🎯🔊🎙️⚡🎬🍳👨‍🍳🎉]', '', text)
+    clean = re.sub(r'\{"tool_name":[^}]+\}', '', clean)
+    clean = re.sub(r'\*\*(.*?)\*\*', r'\1', clean)
+    clean = re.sub(r'\*(.*?)\*', r'\1', clean)
+    clean = re.sub(r'`(.*?)`', r'\1', clean)
+    clean = re.sub(r'#{1,6}\s?', '', clean)
+    clean = re.sub(r'\n+', '. ', clean)
+    clean = re.sub(r'\s+', ' ', clean)
+    clean = re.sub(r'http[s]?://\S+', '', clean)
+    clean = re.sub(r'[^\w\s.,!?;:()-]', '', clean)
+    return clean.strip()
+
+
+GOLDEN_CORPUS = [
+    "Hello, world!",
+    "Too    many     spaces",
+    "Check out https://example.com for recipes",
+    "Watch this: https://youtube.com/watch?v=abc123\nThen start cooking.",
+    "Link at the end http://example.com",
+    "http://\nbroken link",
+    "## Perfect Pasta 🍳\n\nHere's a **quick** recipe for *garlic* pasta:",
+    "1. Boil water with `salt`.\n2. Cook for 8 minutes.\r\n3. Drain!",
+    "Let me set that up {\"tool_name\": \"set_timer\", \"minutes\": 5} for you ✅",
+    "👨‍🍳 Chef's tip 🛠️: don't overcrowd the pan — it steams instead of searing.",
+    "Line one \n\n \n line two\t\tend",
+    "#Heading without space\n###### Deep heading",
+    "Temperature: 180°C (350°F) — about 20-25 minutes; enjoy! 🎉",
+    "Unclosed *italic and **bold markers",
+    "   \n\n   ",
+    "",
+]
+
+
 class TestTextCleaning:
     """Test suite for text cleaning before TTS"""
     
@@ -96,6 +136,24 @@ class TestTextCleaning:
         cleaned = tts._clean_text_for_tts("")
         
         assert cleaned == "" or isinstance(cleaned, str)
+    
+    @pytest.mark.parametrize("text", GOLDEN_CORPUS)
+    def test_clean_text_matches_golden_corpus(self, text):
+        """Test the cleaner matches the reference"""
+        tts = TTSService()
+        
+        assert tts._clean_text_for_tts(text) == legacy_clean_text_for_tts(text)
+    
+    def test_clean_text_matches_reference_on_random_input(self):
+        """Test equivalence on random mixes of the tricky fragments"""
+        tts = TTSService()
+        fragments = ['a', 'x', ' ', '  ', '\n', '\n\n', '\t', '\r', '.', '*', '**', '`', '#', '##',
+                     '{"tool_name":"x"}', '}', 'http://', 'https://a.b/c', '🍳', '👨‍🍳', 'é', "'", '-', '—', '\xa0']
+        rng = random.Random(42)
+        
+        for _ in range(5000):
+            text = ''.join(rng.choice(fragments) for _ in range(rng.randint(0, 12)))
+            assert tts._clean_text_for_tts(text) == legacy_clean_text_for_tts(text), repr(text)
 
 
 class TestTTSErrorHandling:
@@ -182,5 +240,279 @@ class TestTTSServiceInit:
         assert len(results) == 3
 
 
+class TestAudioCache:
+    """Test suite for the disk-backed TTS audio cache"""
+    
+    def test_put_and_get(self, tmp_path):
+        """Test cached audio round-trips through disk"""
+        cache = AudioCache(str(tmp_path))
+        key = cache.make_key("Hello there", "p300", "coqui-tts")
+        
+        cache.put(key, b'RIFFaudio')
+        
+        assert cache.get(key) == b'RIFFaudio'
+    
+    def test_key_depends_on_speaker_and_backend(self):
+        """Test cache keys separate speakers and backends"""
+        base = AudioCache.make_key("Hello", "p300", "coqui-tts")
+        
+        assert base == AudioCache.make_key("Hello", "p300", "coqui-tts")
+        assert base != AudioCache.make_key("Hello", "p301", "coqui-tts")
+        assert base != AudioCache.make_key("Hello", "p300", "other-backend")
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted past max_bytes"""
+        cache = AudioCache(str(tmp_path), max_bytes=20)
+        cache.put('a', b'x' * 8)
+        cache.put('b', b'x' * 8)
+        cache.get('a')  # 'b' is now least recent
+        cache.put('c', b'x' * 8)
+        
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+        assert cache.stats()['total_bytes'] <= 20
+    
+    def test_persists_across_instances(self, tmp_path):
+        """Test entries survive a restart"""
+        AudioCache(str(tmp_path)).put('key', b'audio')
+        
+        cache = AudioCache(str(tmp_path))
+        
+        assert cache.get('key') == b'audio'
+    
+    def test_stats(self, tmp_path):
+        """Test hit rate and bytes saved are reported"""
+        cache = AudioCache(str(tmp_path))
+        cache.put('key', b'12345')
+        cache.get('key')
+        cache.get('missing')
+        
+        stats = cache.stats()
+        
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+        assert stats['bytes_saved'] == 5
+    
+    def test_service_skips_synthesis_on_repeat(self, tmp_path):
+        """Test repeated phrases are only synthesized once"""
+        tts = TTSService(cache=AudioCache(str(tmp_path)))
+        tts._fetch_audio = Mock(return_value=b'RIFFaudio')
+        
+        first = tts.generate_speech("I found 6 recipes for you.")
+        second = tts.generate_speech("I found 6 recipes for you.")
+        
+        assert tts._fetch_audio.call_count == 1
+        assert first['cached'] == False
+        assert second['cached'] == True
+        assert second['audio_base64'] == first['audio_base64']
+        assert tts.get_cache_stats()['bytes_saved'] == len(b'RIFFaudio')
+    
+    def test_cache_disabled_by_default(self):
+        """Test the service reports a disabled cache when none is configured"""
+        tts = TTSService()
+        
+        assert tts.get_cache_stats() == {'enabled': False}
+
+
+class TestAudioCodec:
+    """Test suite for compact TTS audio encodings"""
+    
+    @pytest.fixture
+    def wav_bytes(self):
+        """One second of 22.05 kHz stereo 16-bit speech-like audio (Coqui's output shape)"""
+        import io
+        import math
+        import struct
+        import wave
+        
+        rate = 22050
+        frames = b''.join(
+            struct.pack('<hh', int(8000 * math.sin(2 * math.pi * 220 * i / rate)),
+                        int(8000 * math.sin(2 * math.pi * 220 * i / rate)))
+            for i in range(rate)
+        )
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(frames)
+        return buffer.getvalue()
+    
+    def test_wav_passthrough(self, wav_bytes):
+        """Test the default format leaves backend audio untouched"""
+        result = audio_codec.transcode(wav_bytes, 'wav')
+        
+        assert result['audio'] is wav_bytes
+        assert result['mime_type'] == 'audio/wav'
+    
+    def test_pcm16_downsample_and_downmix(self, wav_bytes):
+        """Test wav-pcm16 produces a valid 16 kHz mono WAV"""
+        import io
+        import wave
+        
+        result = audio_codec.transcode(wav_bytes, 'wav-pcm16')
+        
+        with wave.open(io.BytesIO(result['audio']), 'rb') as wav:
+            assert wav.getnchannels() == 1
+            assert wav.getframerate() == 16000
+            assert wav.getsampwidth() == 2
+        assert len(wav_bytes) / len(result['audio']) > 2.5
+    
+    def test_ulaw_is_several_fold_smaller(self, wav_bytes):
+        """Test wav-ulaw writes a mu-law WAV header and shrinks the audio"""
+        import struct
+        
+        result = audio_codec.transcode(wav_bytes, 'wav-ulaw')
+        audio = result['audio']
+        
+        assert result['format'] == 'wav-ulaw'
+        assert audio[:4] == b'RIFF' and audio[8:12] == b'WAVE'
+        assert struct.unpack('<H', audio[20:22])[0] == audio_codec.WAVE_FORMAT_MULAW
+        assert struct.unpack('<I', audio[4:8])[0] == len(audio) - 8
+        assert len(wav_bytes) / len(audio) > 5
+    
+    def test_invalid_audio_falls_back_to_wav(self):
+        """Test undecodable audio is sent as-is rather than dropped"""
+        result = audio_codec.transcode(b'not a wav file', 'wav-ulaw')
+        
+        assert result['audio'] == b'not a wav file'
+        assert result['format'] == 'wav'
+    
+    def test_negotiate_format(self):
+        """Test the first client format the server can produce wins"""
+        with patch('app.services.audio_codec._ffmpeg_path', return_value=None):
+            assert audio_codec.negotiate_format(['opus', 'wav-pcm16', 'wav']) == 'wav-pcm16'
+            assert audio_codec.negotiate_format(['flac']) == 'wav'
+            assert audio_codec.negotiate_format(None) == 'wav'
+        with patch('app.services.audio_codec._ffmpeg_path', return_value='/usr/bin/ffmpeg'):
+            assert audio_codec.negotiate_format(['opus', 'wav']) == 'opus'
+    
+    def test_opus_is_encoded_once_per_content_key(self, wav_bytes):
+        """Test cached or banked audio only goes through ffmpeg on its first play"""
+        audio_codec._encoded_cache.clear()
+        with patch('app.services.audio_codec._encode_opus', return_value=b'OggSaudio') as encode:
+            first = audio_codec.transcode(wav_bytes, 'opus', cache_key='k1')
+            second = audio_codec.transcode(wav_bytes, 'opus', cache_key='k1')
+            audio_codec.transcode(wav_bytes, 'opus')
+            audio_codec.transcode(wav_bytes, 'opus')
+        
+        assert first == second
+        assert second['format'] == 'opus'
+        assert encode.call_count == 3  # Once for k1, every time without a key
+        assert audio_codec.encoded_cache_stats()['hits'] >= 1
+    
+    def test_service_reuses_opus_for_cached_audio(self, tmp_path, wav_bytes):
+        """Test repeated playback of a cached phrase reuses its Opus encoding"""
+        audio_codec._encoded_cache.clear()
+        service = TTSService(cache=AudioCache(str(tmp_path)))
+        service._fetch_audio = Mock(return_value=wav_bytes)
+        
+        with patch('app.services.audio_codec._encode_opus', return_value=b'OggSaudio') as encode:
+            for _ in range(3):
+                result = service.generate_speech("Hello there", return_format='bytes', audio_format='opus')
+        
+        assert result['audio_bytes'] == b'OggSaudio'
+        encode.assert_called_once()
+        service._fetch_audio.assert_called_once()
+    
+    def test_service_encodes_but_caches_source(self, tmp_path, wav_bytes):
+        """Test the cache keeps backend WAV while each request gets its own format"""
+        service = TTSService(cache=AudioCache(str(tmp_path)))
+        service._fetch_audio = Mock(return_value=wav_bytes)
+        
+        compact = service.generate_speech("Hello there", return_format='bytes', audio_format='wav-ulaw')
+        original = service.generate_speech("Hello there", return_format='bytes')
+        
+        assert compact['audio_format'] == 'wav-ulaw'
+        assert compact['source_size'] == len(wav_bytes)
+        assert compact['audio_size'] < compact['source_size']
+        assert original['cached'] is True
+        assert original['audio_bytes'] == wav_bytes
+        service._fetch_audio.assert_called_once()
+
+
+class TestChunkedSpeech:
+    """Test suite for sentence-chunked, concurrent TTS"""
+    
+    def test_split_sentences(self):
+        """Test cleaned text is split on sentence punctuation"""
+        tts = TTSService()
+        
+        chunks = tts._split_sentences(
+            "I found 6 recipes for you. Check the recipe section below! Want more?"
+        )
+        
+        assert chunks == [
+            "I found 6 recipes for you.",
+            "Check the recipe section below! Want more?"
+        ]
+    
+    def test_split_merges_short_fragments(self):
+        """Test tiny sentences are merged so each chunk is worth a request"""
+        tts = TTSService()
+        
+        chunks = tts._split_sentences("Ok. Sure. Your pasta timer has finished!")
+        
+        assert chunks == ["Ok. Sure. Your pasta timer has finished!"]
+    
+    def test_chunks_delivered_in_order(self):
+        """Test chunks reach the callback in sentence order even if they finish out of order"""
+        import time
+        tts = TTSService()
+        
+        def slow_first(text, speaker_id):
+            if text.startswith("First"):
+                time.sleep(0.2)
+            return text.encode('utf-8')
+        
+        tts._fetch_audio = Mock(side_effect=slow_first)
+        received = []
+        
+        results = tts.generate_speech_chunks(
+            "First sentence is slow to make. Second sentence comes back fast.",
+            return_format='bytes',
+            on_chunk=lambda chunk: received.append(chunk['chunk_index'])
+        )
+        
+        assert received == [0, 1]
+        assert [r['audio_bytes'] for r in results] == [
+            b"First sentence is slow to make.",
+            b"Second sentence comes back fast."
+        ]
+        assert all(r['chunk_count'] == 2 for r in results)
+    
+    def test_chunks_synthesized_concurrently(self):
+        """Test sentences are synthesized in parallel on the worker pool"""
+        import threading
+        tts = TTSService()
+        barrier = threading.Barrier(3, timeout=2)
+        
+        def wait_for_peers(text, speaker_id):
+            barrier.wait()  # Only passes if all three run at once
+            return b'audio'
+        
+        tts._fetch_audio = Mock(side_effect=wait_for_peers)
+        
+        results = tts.generate_speech_chunks(
+            "This is sentence number one. This is sentence number two. This is sentence number three."
+        )
+        
+        assert len(results) == 3
+        assert all(r['success'] for r in results)
+    
+    def test_chunk_failure_is_reported(self):
+        """Test a failed sentence yields an error chunk instead of raising"""
+        tts = TTSService()
+        tts._fetch_audio = Mock(side_effect=Exception("Coqui down"))
+        
+        results = tts.generate_speech_chunks("A sentence that will fail to synthesize.")
+        
+        assert results[0]['success'] == False
+        assert results[0]['chunk_index'] == 0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -3,7 +3,10 @@ Unit tests for User model
 Tests user creation, authentication, and preferences
 """
 import pytest
-from app.models.user_model import User
+from unittest.mock import patch
+from bson.objectid import ObjectId
+from app.models import user_model
+from app.models.user_model import User, get_user_cache_stats
 from app.models.database import db
 
 
@@ -140,6 +143,62 @@ class TestUserPreferences:
         assert 'total_messages' in stats or stats is not None
 
 
+class TestUserCache:
+    """Test suite for the Flask-Login user cache"""
+    
+    @pytest.fixture
+    def user_doc(self):
+        """User document served by a mocked database, with an empty cache"""
+        user_model._user_cache.clear()
+        doc = {'_id': ObjectId(), 'username': 'cached', 'email': 'cached@test.com',
+               'preferences': {'theme': 'dark'}}
+        with patch.object(user_model.db, 'get_user_by_id', return_value=doc) as get_user_by_id:
+            yield doc, get_user_by_id
+        user_model._user_cache.clear()
+    
+    def test_repeat_loads_read_mongo_once(self, user_doc):
+        """Test only the first load of a user reaches MongoDB"""
+        doc, get_user_by_id = user_doc
+        
+        for _ in range(10):
+            user = User.load(str(doc['_id']))
+        
+        assert user.username == 'cached'
+        assert get_user_by_id.call_count == 1
+        assert get_user_cache_stats()['mongo_reads_per_load'] == 0.1
+    
+    def test_loaded_users_are_independent(self, user_doc):
+        """Test changing one request's user doesn't change the cached copy"""
+        doc, _ = user_doc
+        
+        User.load(str(doc['_id'])).preferences['theme'] = 'light'
+        
+        assert User.load(str(doc['_id'])).preferences['theme'] == 'dark'
+    
+    def test_writes_invalidate(self, user_doc):
+        """Test preference and login updates force a fresh read"""
+        doc, get_user_by_id = user_doc
+        user = User.load(str(doc['_id']))
+        
+        with patch.object(user_model.db, 'update_user_preferences', return_value=True), \
+             patch.object(user_model.db, 'update_last_login', return_value=True):
+            user.update_preferences({'theme': 'light'})
+            User.load(user.id)
+            user.update_last_login()
+            User.load(user.id)
+        
+        assert get_user_by_id.call_count == 3
+    
+    def test_missing_user_is_not_cached(self, user_doc):
+        """Test an unknown ID is looked up again next time"""
+        _, get_user_by_id = user_doc
+        get_user_by_id.return_value = None
+        
+        assert User.load("000000000000000000000000") is None
+        assert User.load("000000000000000000000000") is None
+        assert get_user_by_id.call_count == 2
+
+
 class TestUserSessions:
     """Test suite for user sessions"""
     
@@ -0,0 +1,171 @@
+"""
+Unit tests for incremental user statistics
+"""
+import pytest
+from datetime import datetime, timezone
+from app.models import user_stats
+
+
+def message(role, content, day, user_id="user1", **extra):
+    """Conversation document at noon UTC on a given day of October 2026"""
+    return dict(user_id=user_id, role=role, content=content,
+                timestamp=datetime(2026, 10, day, 12, tzinfo=timezone.utc), **extra)
+
+
+class TestClassifyMessage:
+    """Test suite for per-message classification"""
+
+    def test_user_recipe_message(self):
+        """Test a user cooking question counts as a question and a recipe"""
+        counts, cuisines = user_stats.classify_message(message("user", "How do I cook pasta?", 1))
+
+        assert counts['user_questions'] == 1
+        assert counts['recipes_cooked'] == 1
+        assert counts['ai_responses'] == 0
+        assert cuisines == ['Italian']
+
+    def test_assistant_message_is_not_a_recipe(self):
+        """Test recipe keywords only count on user messages"""
+        counts, _ = user_stats.classify_message(message("assistant", "Here is the recipe", 1))
+
+        assert counts['ai_responses'] == 1
+        assert counts['recipes_cooked'] == 0
+
+    def test_voice_flag_in_metadata(self):
+        """Test voice commands are read from message metadata"""
+        counts, _ = user_stats.classify_message(message("user", "hi", 1, metadata={'voice_enabled': True}))
+
+        assert counts['voice_commands'] == 1
+
+
+class TestRebuildStats:
+    """Test suite for recomputing stats from history"""
+
+    def test_counters_and_histogram(self):
+        """Test counters and cuisine histogram over a history"""
+        history = [
+            message("user", "make curry", 1),
+            message("assistant", "Thai or Indian curry?", 1),
+            message("user", "sushi please", 2),
+        ]
+
+        stats = user_stats.rebuild_stats("user1", history)
+
+        assert stats['total_messages'] == 3
+        assert stats['user_questions'] == 2
+        assert stats['recipes_cooked'] == 1
+        assert stats['cuisines'] == {'Indian': 2, 'Thai': 2, 'Japanese': 1}
+
+    def test_streak_counts_consecutive_days(self):
+        """Test a gap resets the streak"""
+        history = [message("user", "hi", day) for day in (1, 3, 4, 5)]
+
+        stats = user_stats.rebuild_stats("user1", history)
+
+        assert stats['streak'] == 3
+        assert stats['last_active_day'] == "2026-10-05"
+
+    def test_recent_is_capped(self):
+        """Test only the newest messages are kept for recent activity"""
+        history = [message("user", str(i), 1) for i in range(12)]
+
+        stats = user_stats.rebuild_stats("user1", history)
+
+        assert [entry['content'] for entry in stats['recent']] == [str(i) for i in range(7, 12)]
+
+
+class TestBuildUpdates:
+    """Test suite for incremental update pipelines"""
+
+    def test_one_update_per_user_and_day(self):
+        """Test messages are grouped by (day, user), oldest day first"""
+        batch = [
+            message("user", "a", 2),
+            message("user", "b", 1, user_id="user2"),
+            message("assistant", "c", 2),
+        ]
+
+        updates = user_stats.build_updates(batch)
+
+        assert [user_id for user_id, _ in updates] == ["user2", "user1"]
+        fields = updates[1][1][0]['$set']
+        assert fields['total_messages'] == {'$add': [{'$ifNull': ['$total_messages', 0]}, 2]}
+        assert fields['last_active_day'] == {'$max': ['$last_active_day', "2026-10-02"]}
+
+    def test_message_text_is_literal(self):
+        """Test content starting with $ is not read as a field path"""
+        updates = user_stats.build_updates([message("user", "$total_messages", 1)])
+
+        recent = updates[0][1][0]['$set']['recent']
+        assert recent['$slice'][0]['$concatArrays'][1]['$literal'][0]['content'] == "$total_messages"
+
+    def test_messages_without_timestamp_are_skipped(self):
+        """Test unparseable timestamps don't produce updates"""
+        assert user_stats.build_updates([{'user_id': "user1", 'role': "user", 'content': "hi"}]) == []
+
+
+class TestAggregationPath:
+    """Test suite for the aggregation-pipeline stats path"""
+
+    def test_pipeline_matches_then_sorts_on_the_index(self):
+        """Test the pipeline starts with the indexed $match and $sort"""
+        pipeline = user_stats.aggregation_pipeline("user1")
+
+        assert pipeline[0] == {'$match': {'user_id': "user1"}}
+        assert pipeline[1] == {'$sort': {'timestamp': -1}}
+        assert set(pipeline[3]['$facet']) == {'roles', 'totals', 'days', 'recent'}
+
+    def test_result_matches_python_path(self):
+        """Test a pipeline result converts to the same stats as rebuild_stats"""
+        history = [
+            message("user", "make curry", 3),
+            message("assistant", "Thai or Indian curry?", 4),
+            message("user", "sushi please", 5, metadata={'voice_enabled': True}),
+        ]
+        result = {
+            'roles': [{'_id': 'user', 'count': 2}, {'_id': 'assistant', 'count': 1}],
+            'totals': [{'_id': None, 'recipes_cooked': 1, 'voice_commands': 1,
+                        **{f'cuisine_{i}': {'Indian': 2, 'Thai': 2, 'Japanese': 1}.get(cuisine, 0)
+                           for i, cuisine in enumerate(user_stats.CUISINE_KEYWORDS)}}],
+            'days': [{'_id': "2026-10-05"}, {'_id': "2026-10-04"}, {'_id': "2026-10-03"}],
+            'recent': [dict(m, voice_enabled=bool((m.get('metadata') or {}).get('voice_enabled')))
+                       for m in reversed(history)],
+        }
+
+        aggregated = user_stats.from_aggregation("user1", result)
+        expected = user_stats.rebuild_stats("user1", history)
+
+        for field in user_stats.COUNTERS + ('cuisines', 'streak', 'last_active_day', 'recent'):
+            assert aggregated[field] == expected[field], field
+
+    def test_empty_history(self):
+        """Test a user without conversations gets zeroed stats"""
+        stats = user_stats.from_aggregation("user1", {'roles': [], 'totals': [], 'days': [], 'recent': []})
+
+        assert stats['total_messages'] == 0
+        assert stats['streak'] == 0
+        assert stats['last_active_day'] is None
+
+    @pytest.mark.parametrize("text", [
+        "pad thai", "I love cooking", "hospital food", "mac and cheese", "Tacos!", "a wok"
+    ])
+    def test_label_patterns_agree_with_classifier(self, text):
+        """Test the per-label regexes sent to MongoDB match what CLASSIFIER finds"""
+        import re
+        found = {label for label, pattern in user_stats.LABEL_PATTERNS.items()
+                 if re.search(pattern, text, re.IGNORECASE)}
+
+        assert found == user_stats.CLASSIFIER.labels(text)
+
+
+class TestCurrentStreak:
+    """Test suite for streak as of today"""
+
+    @pytest.mark.parametrize("last_active, expected", [
+        ("2026-10-19", 4), ("2026-10-18", 4), ("2026-10-17", 0), (None, 0)
+    ])
+    def test_streak_needs_recent_activity(self, last_active, expected):
+        """Test the streak lapses after a missed day"""
+        stats = {'streak': 4, 'last_active_day': last_active}
+
+        assert user_stats.current_streak(stats, today="2026-10-19") == expected
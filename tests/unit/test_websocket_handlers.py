@@ -304,5 +304,168 @@ class TestBroadcastEvents:
         client2.disconnect()
 
 
+class TestAudioTransport:
+    """Test binary vs base64 audio transport negotiation"""
+    
+    @pytest.fixture
+    def app(self):
+        app = create_app(TestingConfig)
+        app.config['TESTING'] = True
+        
+        mock_a4f = Mock()
+        mock_ai_response = Mock(return_value="Test response")
+        mock_extract_tool = Mock(return_value=None)
+        init_routes(app, socketio, mock_a4f, mock_ai_response, mock_extract_tool)
+        
+        return app
+    
+    @pytest.fixture
+    def tts(self):
+        """Patch the TTS service to return fixed audio in the requested format"""
+        audio = b'RIFF' + bytes(range(256)) * 8
+        
+        def generate_speech(text, return_format='base64', **kwargs):
+            import base64
+            result = {'success': True, 'mime_type': 'audio/wav', 'audio_size': len(audio)}
+            if return_format in ['base64', 'both']:
+                result['audio_base64'] = base64.b64encode(audio).decode('ascii')
+            if return_format in ['bytes', 'both']:
+                result['audio_bytes'] = audio
+            return result
+        
+        service = Mock()
+        service.generate_speech.side_effect = generate_speech
+        with patch('app.routes.get_tts_service', return_value=service):
+            yield audio
+    
+    def test_default_is_base64(self, app, tts):
+        """Test clients that never negotiate keep receiving base64 audio"""
+        client = socketio.test_client(app, flask_test_client=app.test_client())
+        client.get_received()
+        client.emit('generate_tts', {'text': 'Hello there'})
+        
+        received = client.get_received()
+        events = [r for r in received if r['name'] == 'ai_audio_base64']
+        assert len(events) == 1
+        assert 'audio_b64' in events[0]['args'][0]
+        client.disconnect()
+    
+    def test_binary_after_negotiation(self, app, tts):
+        """Test negotiated clients receive raw bytes as a binary attachment"""
+        client = socketio.test_client(app, flask_test_client=app.test_client())
+        client.emit('audio_capabilities', {'binary': True})
+        ack = [r for r in client.get_received() if r['name'] == 'audio_capabilities_ack']
+        assert ack and ack[0]['args'][0] == {'binary': True, 'format': 'wav'}
+        
+        client.emit('generate_tts', {'text': 'Hello there'})
+        events = [r for r in client.get_received() if r['name'] == 'ai_audio']
+        assert len(events) == 1
+        assert events[0]['args'][0]['audio'] == tts
+        assert events[0]['args'][0]['mime'] == 'audio/wav'
+        client.disconnect()
+    
+    def test_format_negotiation(self, app, tts):
+        """Test the server picks the first announced format it can produce"""
+        client = socketio.test_client(app, flask_test_client=app.test_client())
+        client.emit('audio_capabilities', {'binary': True, 'formats': ['flac', 'wav-ulaw', 'wav']})
+        ack = [r for r in client.get_received() if r['name'] == 'audio_capabilities_ack']
+        
+        assert ack[0]['args'][0]['format'] == 'wav-ulaw'
+        client.disconnect()
+    
+    def test_record_audio_transport(self):
+        """Test bandwidth accounting against the base64 size"""
+        from app.routes import record_audio_transport
+        
+        assert record_audio_transport(3000, binary=True) == 1000
+        assert record_audio_transport(3000, binary=False) == 0
+
+
+class TestTimerScoping:
+    """Test timer events only reach the owner's connections"""
+    
+    @pytest.fixture
+    def app(self):
+        app = create_app(TestingConfig)
+        app.config['TESTING'] = True
+        
+        mock_a4f = Mock()
+        mock_ai_response = Mock(return_value="Test response")
+        mock_extract_tool = Mock(return_value=None)
+        init_routes(app, socketio, mock_a4f, mock_ai_response, mock_extract_tool)
+        
+        yield app
+        from app.models.timer_model import timer_manager
+        for timer_id in list(timer_manager.active_timers):
+            timer_manager.delete_timer(timer_id)
+    
+    def connect(self, app):
+        """Connect a guest client and return it with its owner room"""
+        from app.routes import owner_room_for
+        client = socketio.test_client(app, flask_test_client=app.test_client())
+        session_event = [r for r in client.get_received() if r['name'] == 'session_id'][0]
+        return client, owner_room_for(session_id=session_event['args'][0]['session_id'])
+    
+    def test_timer_events_reach_owner_only(self, app):
+        """Test sync frames and alerts are not broadcast to other users"""
+        import time
+        from app.models.timer_model import timer_manager
+        owner, owner_room = self.connect(app)
+        other, _ = self.connect(app)
+        
+        timer_manager.create_timer(0.01, "eggs", owner=owner_room)
+        time.sleep(1.2)
+        
+        owner_events = [r['name'] for r in owner.get_received()]
+        assert 'timer_finished' in owner_events
+        assert 'timer_sync' in owner_events
+        assert other.get_received() == []
+        owner.disconnect()
+        other.disconnect()
+    
+    def test_get_timers_is_scoped(self, app):
+        """Test clients only list and delete their own timers"""
+        from app.models.timer_model import timer_manager
+        owner, owner_room = self.connect(app)
+        other, _ = self.connect(app)
+        timer_id = timer_manager.create_timer(10, "rice", owner=owner_room)["timer"]["id"]
+        
+        other.emit('get_timers')
+        assert [r['args'][0] for r in other.get_received() if r['name'] == 'timers_list'] == [{'timers': []}]
+        other.emit('delete_timer', {'timer_id': timer_id})
+        assert timer_id in timer_manager.active_timers
+        
+        owner.emit('get_timers')
+        timers = [r['args'][0] for r in owner.get_received() if r['name'] == 'timers_list'][0]['timers']
+        assert [timer['name'] for timer in timers] == ['rice']
+        owner.disconnect()
+        other.disconnect()
+    
+    def test_restored_guest_session_rejoins_room(self, app):
+        """Test a reconnecting guest gets events for timers of its restored session"""
+        from app.routes import client_owner_rooms, owner_room_for, session_tokens
+        session_tokens['kitchen1'] = 'secret'
+        client, _ = self.connect(app)
+        
+        client.emit('restore_session', {'session_id': 'kitchen1', 'session_token': 'secret'})
+        
+        assert owner_room_for(session_id='kitchen1') in client_owner_rooms.values()
+        client.disconnect()
+    
+    def test_guessed_guest_session_is_not_joined(self, app):
+        """Test a guest can't join the timer room of a session it didn't create"""
+        from app.routes import client_owner_rooms, owner_room_for
+        victim, victim_room = self.connect(app)
+        attacker, _ = self.connect(app)
+        victim_session = victim_room.split(':', 1)[1]
+        
+        attacker.emit('restore_session', {'session_id': victim_session})
+        attacker.emit('restore_session', {'session_id': victim_session, 'session_token': 'guess'})
+        
+        assert list(client_owner_rooms.values()).count(victim_room) == 1
+        victim.disconnect()
+        attacker.disconnect()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
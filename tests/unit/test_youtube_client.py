@@ -0,0 +1,87 @@
+"""
+Unit tests for the pooled YouTube search client
+"""
+import json
+import threading
+import time
+import httpx
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app.services.youtube_client import YouTubeSearchClient, PooledVideosSearch
+
+
+def search_response(query, count=3):
+    """Minimal YouTube search API response with `count` videos titled after the query"""
+    videos = [
+        {
+            'videoRenderer': {
+                'videoId': f'{query.replace(" ", "_")}_{i}',
+                'title': {'runs': [{'text': f'{query} #{i}'}]},
+                'thumbnail': {'thumbnails': [{'url': f'http://thumb/{i}.jpg'}]},
+                'ownerText': {'runs': [{'text': 'Chef', 'navigationEndpoint': {'browseEndpoint': {'browseId': 'c1'}}}]}
+            }
+        }
+        for i in range(count)
+    ]
+    return {
+        'contents': {'twoColumnSearchResultsRenderer': {'primaryContents': {'sectionListRenderer': {
+            'contents': [{'itemSectionRenderer': {'contents': videos}}]
+        }}}}
+    }
+
+
+def fake_youtube(latency=0.0):
+    """httpx transport answering search requests after `latency` seconds"""
+    def handler(request):
+        time.sleep(latency)
+        query = json.loads(request.content)['query']
+        return httpx.Response(200, json=search_response(query))
+    return httpx.MockTransport(handler)
+
+
+class TestYouTubeSearchClient:
+    """Test suite for the pooled search client"""
+
+    def test_search_parses_results(self):
+        """Test searches go through the pooled client and parse normally"""
+        client = YouTubeSearchClient(transport=fake_youtube())
+
+        result = client.search("garlic pasta", limit=2)
+
+        assert [video['title'] for video in result['result']] == ['garlic pasta #0', 'garlic pasta #1']
+        assert client.stats()['requests'] == 1
+
+    def test_does_not_patch_httpx(self):
+        """Test searching leaves the process-global httpx functions alone"""
+        original_post = httpx.post
+        client = YouTubeSearchClient(transport=fake_youtube())
+
+        PooledVideosSearch("soup", limit=1, client=client)
+
+        assert httpx.post is original_post
+
+    def test_concurrent_searches_are_isolated(self):
+        """Test parallel searches each get their own results"""
+        client = YouTubeSearchClient(transport=fake_youtube(latency=0.01))
+        queries = [f"recipe {i}" for i in range(16)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda q: client.search(q, limit=1), queries))
+
+        assert [r['result'][0]['title'] for r in results] == [f"{q} #0" for q in queries]
+        assert client.stats() == {'max_connections': 20, 'requests': 16, 'errors': 0}
+
+    def test_errors_are_counted_and_raised(self):
+        """Test transport failures propagate to the caller"""
+        def handler(request):
+            raise httpx.ConnectError("unreachable")
+        client = YouTubeSearchClient(transport=httpx.MockTransport(handler))
+
+        with pytest.raises(httpx.ConnectError):
+            client.search("soup")
+
+        assert client.stats()['errors'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
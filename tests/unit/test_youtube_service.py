@@ -2,15 +2,27 @@
 Unit tests for YouTube service
 Tests video search, metadata extraction, and error handling
 """
+import threading
 import pytest
 from unittest.mock import Mock, patch
-from app.services.youtube_service import search_youtube, get_video_details
+from app.services.youtube_service import (
+    search_youtube, get_video_details, get_related_videos,
+    clear_youtube_cache, get_youtube_cache_stats
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """Start every test with empty YouTube caches"""
+    clear_youtube_cache()
+    yield
+    clear_youtube_cache()
 
 
 class TestYouTubeSearch:
     """Test suite for YouTube video search"""
     
-    @patch('app.services.youtube_service.VideosSearch')
+    @patch('app.services.youtube_service.PooledVideosSearch')
     def test_search_youtube_videos_success(self, mock_search):
         """Test successful YouTube search"""
         mock_result = {
@@ -30,7 +42,7 @@ class TestYouTubeSearch:
         
         assert isinstance(results, (list, dict))
     
-    @patch('app.services.youtube_service.VideosSearch')
+    @patch('app.services.youtube_service.PooledVideosSearch')
     def test_search_youtube_videos_empty(self, mock_search):
         """Test YouTube search with no results"""
         mock_search.return_value.result.return_value = {'result': []}
@@ -39,7 +51,7 @@ class TestYouTubeSearch:
         
         assert isinstance(results, (list, dict))
     
-    @patch('app.services.youtube_service.VideosSearch')
+    @patch('app.services.youtube_service.PooledVideosSearch')
     def test_search_youtube_videos_error(self, mock_search):
         """Test YouTube search error handling"""
         mock_search.return_value.result.side_effect = Exception("API Error")
@@ -53,7 +65,7 @@ class TestYouTubeSearch:
 class TestVideoDetails:
     """Test suite for video details extraction"""
     
-    @patch('app.services.youtube_service.VideosSearch')
+    @patch('app.services.youtube_service.PooledVideosSearch')
     def test_get_video_details(self, mock_search):
         """Test getting video details"""
         details = get_video_details("test_id")
@@ -62,5 +74,160 @@ class TestVideoDetails:
         assert details is None or isinstance(details, dict)
 
 
+class TestYouTubeCache:
+    """Test suite for cached YouTube searches and video details"""
+    
+    MOCK_RESULT = {
+        'result': [
+            {'id': 'video1', 'title': 'Test Recipe Video', 'thumbnails': [{'url': 'http://thumb.jpg'}]}
+        ]
+    }
+    
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_repeat_query_served_from_cache(self, mock_search):
+        """Test popular queries hit YouTube once, regardless of case and spacing"""
+        mock_search.return_value.result.return_value = self.MOCK_RESULT
+        
+        first = search_youtube("Pasta Recipe")
+        second = search_youtube("  pasta   recipe ")
+        
+        assert first == second
+        assert mock_search.call_count == 1
+        assert get_youtube_cache_stats()['search']['hits'] == 1
+    
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_fallback_results_not_cached(self, mock_search):
+        """Test failed searches are retried instead of cached"""
+        mock_search.return_value.result.return_value = {'result': []}
+        
+        assert search_youtube("nothing here").get('fallback') is True
+        search_youtube("nothing here")
+        
+        assert mock_search.call_count == 2
+    
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_cached_results_are_copies(self, mock_search):
+        """Test callers mutating results do not corrupt the cache"""
+        mock_search.return_value.result.return_value = self.MOCK_RESULT
+        
+        search_youtube("pasta")["videos"].clear()
+        
+        assert len(search_youtube("pasta")["videos"]) == 1
+    
+    @patch('youtubesearchpython.Video')
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_video_details_cached(self, mock_search, mock_video):
+        """Test repeat page views reuse details, ingredients and steps"""
+        mock_search.return_value.result.return_value = self.MOCK_RESULT
+        mock_video.getInfo.return_value = {
+            'title': 'Garlic Pasta',
+            'description': 'Ingredients:\n200g pasta\n2 cloves garlic\n\nSteps:\n1. Boil the pasta in salted water',
+            'channel': {'name': 'Chef', 'id': 'c1'},
+        }
+        
+        first = get_video_details("abc123")
+        second = get_video_details("abc123")
+        
+        assert first == second
+        assert second['video']['ingredients'] == ['200g pasta', '2 cloves garlic']
+        assert mock_video.getInfo.call_count == 1
+    
+    @patch('youtubesearchpython.Video')
+    def test_video_details_fallback_not_cached(self, mock_video):
+        """Test error fallbacks are not cached"""
+        mock_video.getInfo.side_effect = Exception("blocked")
+        
+        get_video_details("abc123")
+        get_video_details("abc123")
+        
+        assert mock_video.getInfo.call_count == 2
+
+
+class TestVideoDetailAssembly:
+    """Test suite for concurrent and lazy related-video loading"""
+    
+    VIDEO_INFO = {
+        'title': 'Garlic Pasta',
+        'description': 'A quick pasta dinner',
+        'channel': {'name': 'Chef', 'id': 'c1'},
+    }
+    SEARCH_RESULT = {
+        'result': [
+            {'id': 'abc123', 'title': 'Garlic Pasta', 'thumbnails': [{'url': 'http://thumb.jpg'}]},
+            {'id': 'def456', 'title': 'Lemon Pasta', 'thumbnails': [{'url': 'http://thumb2.jpg'}]}
+        ]
+    }
+    
+    @patch('youtubesearchpython.Video')
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_related_search_overlaps_video_info(self, mock_search, mock_video):
+        """Test a known title lets both upstream calls run at the same time"""
+        mock_search.return_value.result.return_value = self.SEARCH_RESULT
+        search_youtube("garlic pasta")
+        searches_before = mock_search.call_count
+        
+        # Each call waits for the other; in series this barrier would break
+        barrier = threading.Barrier(2, timeout=2)
+        
+        def info(video_id):
+            barrier.wait()
+            return self.VIDEO_INFO
+        
+        def related():
+            barrier.wait()
+            return self.SEARCH_RESULT
+        
+        mock_video.getInfo.side_effect = info
+        mock_search.return_value.result.side_effect = related
+        
+        details = get_video_details("abc123", title_hint="Garlic Pasta related")
+        
+        assert details['video']['title'] == 'Garlic Pasta'
+        assert len(details['video']['related_videos']) == 2
+        assert mock_search.call_count == searches_before + 1
+    
+    @patch('youtubesearchpython.Video')
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_lazy_mode_skips_related_search(self, mock_search, mock_video):
+        """Test the page shell depends only on Video.getInfo in lazy mode"""
+        mock_video.getInfo.return_value = self.VIDEO_INFO
+        mock_search.return_value.result.return_value = self.SEARCH_RESULT
+        
+        details = get_video_details("abc123", include_related=False)
+        
+        assert details['video']['related_lazy'] is True
+        assert details['video']['related_videos'] == []
+        assert mock_search.call_count == 0
+        
+        related = get_related_videos("abc123")
+        
+        assert [video['video_id'] for video in related] == ['abc123', 'def456']
+        assert mock_video.getInfo.call_count == 1
+        mock_search.assert_called_once_with('Garlic Pasta', limit=3)
+    
+    @patch('youtubesearchpython.Video')
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_related_videos_cached(self, mock_search, mock_video):
+        """Test related videos are searched once per video"""
+        mock_video.getInfo.return_value = self.VIDEO_INFO
+        mock_search.return_value.result.return_value = self.SEARCH_RESULT
+        
+        get_related_videos("abc123")
+        details = get_video_details("abc123", include_related=False)
+        
+        assert mock_search.call_count == 1
+        assert len(details['video']['related_videos']) == 2
+        assert details['video']['related_lazy'] is False
+    
+    @patch('youtubesearchpython.Video')
+    @patch('app.services.youtube_service.PooledVideosSearch')
+    def test_unavailable_video_has_no_related(self, mock_search, mock_video):
+        """Test the lazy endpoint does not search for a fallback title"""
+        mock_video.getInfo.side_effect = Exception("blocked")
+        
+        assert get_related_videos("abc123") == []
+        assert mock_search.call_count == 0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])